@@ -1,6 +1,7 @@
 # Home.py
 import streamlit as st
 from app.ui import inject_global_css, render_header
+from app.session import data_context, filtered_count
 
 st.set_page_config(page_title="UKM Dashboard", page_icon="📊", layout="wide")
 
@@ -23,20 +24,17 @@ st.markdown("""
 # =========================
 # AMBIL DATA DARI SESSION
 # =========================
-df_all = st.session_state.get("df_all")
-df_filtered = st.session_state.get("df_filtered")
 df_upload = st.session_state.get("df_upload")
 df_manual = st.session_state.get("df_manual")
 
 has_upload = df_upload is not None
 has_manual = hasattr(df_manual, "empty") and (not df_manual.empty) if df_manual is not None else False
 
-has_all = df_all is not None
-has_filtered = df_filtered is not None
-is_ready = has_all and has_filtered
+ctx = data_context()
+is_ready = ctx is not None
 
-total_all = int(len(df_all)) if has_all else 0
-total_filtered = int(len(df_filtered)) if has_filtered else 0
+total_all = int(len(ctx["base"])) if is_ready else 0
+total_filtered = filtered_count()
 
 # =========================
 # STATUS DATA
@@ -62,7 +60,7 @@ st.markdown("""
 <div class="glass" style="padding:16px; margin-bottom:14px;">
   <div style="font-weight:900; font-size:15px; margin-bottom:8px;">✨ Cara Pakai (3 Langkah)</div>
   <ol style="margin:0; padding-left:18px; color:rgba(226,232,240,.9); font-size:13px; line-height:1.7;">
-    <li><b>Upload</b> file Excel (.xlsx) atau isi data di <b>Manual Input</b></li>
+    <li><b>Upload</b> file Excel (.xlsx) / CSV / Parquet atau isi data di <b>Manual Input</b></li>
     <li>Atur <b>Sumber Data</b> + <b>Filter Global</b> di halaman Upload</li>
     <li>Buka halaman <b>Dashboard / Data Quality / Grafik / Tabel / Report</b></li>
   </ol>
@@ -92,7 +90,7 @@ with b2:
             pass
 
 with b3:
-    if st.button("🧪 Data Quality", use_container_width=True, disabled=not has_all, key="qa_dq"):
+    if st.button("🧪 Data Quality", use_container_width=True, disabled=not is_ready, key="qa_dq"):
         try:
             st.switch_page("pages/03_Data_Quality.py")
         except Exception:
@@ -0,0 +1,166 @@
+# app/batch.py
+"""
+Batch CLI tanpa Streamlit/Plotly: proses semua file data di satu folder
+(mis. workbook per kecamatan) untuk job malam.
+
+Per file input ditulis ke folder output:
+- <nama>.xlsx : data KPI lengkap + rekomendasi (export_excel)
+- <nama>.pdf  : report ringkas (generate_pdf_report)
+- <nama>.json : ringkasan metrik, kualitas data, durasi per tahap
+
+Jalankan dari root project:
+    python -m app.batch data/kecamatan -o hasil -j 4
+"""
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from app import timing
+from app.core import (
+    DEFAULT_WEIGHTS,
+    REQUIRED_COLS,
+    data_quality_summary,
+    export_excel,
+    generate_pdf_report,
+    report_inputs,
+    with_recommendation_text,
+)
+from app.ingest import SKIPPED_ATTR, SUPPORTED_TYPES, read_upload_batch
+from app.pipeline import normalize_weights, run_pipeline
+
+
+def _jsonable(v):
+    """NaN/inf -> null (JSON standar), angka NumPy -> float/int Python."""
+    if isinstance(v, dict):
+        return {str(k): _jsonable(x) for k, x in v.items()}
+    if isinstance(v, (list, tuple)):
+        return [_jsonable(x) for x in v]
+    if hasattr(v, "item"):
+        v = v.item()
+    if isinstance(v, float) and not math.isfinite(v):
+        return None
+    return v
+
+
+def list_inputs(input_dir: Path) -> list:
+    """File berformat yang didukung (tidak rekursif), urut nama; file sementara Excel (~$) dilewati."""
+    return sorted(
+        p for p in input_dir.iterdir()
+        if p.is_file() and p.suffix.lower().lstrip(".") in SUPPORTED_TYPES and not p.name.startswith("~$")
+    )
+
+
+def _output_stems(paths: list) -> dict:
+    """Nama dasar output per input; kalau stem bentrok (a.csv & a.xlsx) ekstensi ikut dipakai."""
+    stems = [p.stem for p in paths]
+    return {p: (p.stem if stems.count(p.stem) == 1 else p.name.replace(".", "_")) for p in paths}
+
+
+def process_file(task) -> dict:
+    """Satu file (dijalankan di worker process). Return ringkasan yang juga ditulis ke <nama>.json."""
+    path, out_dir, stem, weights = task
+    path, out_dir = Path(path), Path(out_dir)
+    t0 = time.perf_counter()
+    run = timing.new_run(path.name)
+    summary = {"file": path.name, "status": "ok"}
+    try:
+        with timing.stage("parsing") as rec:
+            # max_workers=1: paralelisme sudah di level file, jangan buat pool di dalam worker
+            df_raw = read_upload_batch([(path.name, path.read_bytes())], max_workers=1)
+            rec["rows"] = len(df_raw)
+        summary["skipped_sheets"] = df_raw.attrs.get(SKIPPED_ATTR, [])
+
+        missing = [c for c in REQUIRED_COLS if c not in df_raw.columns]
+        if missing:
+            raise ValueError(f"Kolom wajib tidak ada: {missing}")
+
+        with timing.stage("pipeline", rows=len(df_raw)):
+            df, _ = run_pipeline(df_raw, weights)
+
+        metrics, top_best, top_risk, sektor_summary = report_inputs(df)
+        outputs = {}
+
+        excel_bytes, _ = export_excel(with_recommendation_text(df))
+        outputs["excel"] = str(out_dir / f"{stem}.xlsx")
+        Path(outputs["excel"]).write_bytes(excel_bytes)
+
+        pdf_bytes = generate_pdf_report(metrics, top_best, top_risk, sektor_summary)
+        outputs["pdf"] = str(out_dir / f"{stem}.pdf")
+        Path(outputs["pdf"]).write_bytes(pdf_bytes)
+
+        summary.update({
+            "rows": int(len(df)),
+            "weights": list(weights),
+            "metrics": metrics,
+            "data_quality": data_quality_summary(df),
+            "sektor": sektor_summary.to_dict(orient="records"),
+            "outputs": outputs,
+        })
+    except Exception as e:
+        summary.update({"status": "error", "error": f"{type(e).__name__}: {e}"})
+    finally:
+        timing.end_run()
+
+    summary["seconds"] = round(time.perf_counter() - t0, 3)
+    summary["stages_ms"] = [
+        {"stage": s["stage"], "depth": s["depth"], "ms": round(s["ms"], 2), "rows": s["rows"]}
+        for s in run["stages"]
+        if s["ms"] is not None
+    ]
+    summary = _jsonable(summary)
+    (out_dir / f"{stem}.json").write_text(json.dumps(summary, ensure_ascii=False, indent=2), encoding="utf-8")
+    return summary
+
+
+def run_batch(input_dir, out_dir, workers: int = 1, weights=DEFAULT_WEIGHTS) -> list:
+    """Proses semua file di input_dir; return list ringkasan per file (urut nama file)."""
+    input_dir, out_dir = Path(input_dir), Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    paths = list_inputs(input_dir)
+    stems = _output_stems(paths)
+    tasks = [(str(p), str(out_dir), stems[p], tuple(weights)) for p in paths]
+
+    workers = max(1, min(workers, len(tasks)))
+    if workers == 1:
+        return [process_file(t) for t in tasks]
+
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as ex:
+        return list(ex.map(process_file, tasks))
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("input_dir", help="folder berisi file .xlsx / .csv / .tsv / .parquet")
+    ap.add_argument("-o", "--output", required=True, help="folder output (dibuat kalau belum ada)")
+    ap.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1, help="jumlah worker (file diproses paralel)")
+    ap.add_argument("--bobot", default=",".join(str(w) for w in DEFAULT_WEIGHTS), help="bobot ROI,PM,Growth")
+    args = ap.parse_args()
+
+    input_dir = Path(args.input_dir)
+    if not input_dir.is_dir():
+        ap.error(f"folder input tidak ditemukan: {input_dir}")
+
+    weights = normalize_weights([float(x) for x in args.bobot.split(",")])
+    t0 = time.perf_counter()
+    results = run_batch(input_dir, args.output, workers=args.jobs, weights=weights)
+    if not results:
+        print(f"Tidak ada file {'/'.join(SUPPORTED_TYPES)} di {input_dir}")
+        sys.exit(1)
+
+    failed = [r for r in results if r["status"] != "ok"]
+    for r in results:
+        info = f"{r['rows']:,} baris, skor rata-rata {r['metrics']['avg_score'] or 0:.2f}" if r["status"] == "ok" else r["error"]
+        print(f"{'OK' if r['status'] == 'ok' else 'GAGAL':<5} {r['file']:<40} {r['seconds']:>7.2f}s  {info}")
+    print(f"{len(results) - len(failed)}/{len(results)} file berhasil dalam {time.perf_counter() - t0:.1f}s -> {args.output}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
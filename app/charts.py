@@ -0,0 +1,180 @@
+# app/charts.py
+"""
+Pembuat grafik Plotly yang ukurannya tidak ikut membengkak dengan jumlah UKM
+(tanpa Streamlit).
+
+Scatter: jumlah titik menentukan cara render
+- <= SCATTER_SVG_MAX  : SVG biasa (warna per bidang, hover lengkap)
+- <= SCATTER_GL_MAX   : WebGL (scattergl), hover diringkas
+- di atasnya          : binning grid 2D, warna = log10 jumlah UKM per sel
+Ambang bisa diatur lewat env UKM_SCATTER_SVG_MAX / UKM_SCATTER_GL_MAX.
+
+Box plot: kuartil & whisker dihitung di server (groupby), yang dikirim hanya
+statistik per kelompok + sampel outlier terbatas.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+SCATTER_SVG_MAX = int(os.environ.get("UKM_SCATTER_SVG_MAX", 5_000))
+SCATTER_GL_MAX = int(os.environ.get("UKM_SCATTER_GL_MAX", 100_000))
+SCATTER_BINS = 120
+
+SCATTER_MODE_LABEL = {"svg": "SVG", "webgl": "WebGL", "bin": "grid 2D (log jumlah)"}
+
+
+def scatter_mode(n_points: int, svg_max: int = None, gl_max: int = None) -> str:
+    """'svg' / 'webgl' / 'bin' sesuai jumlah titik."""
+    svg_max = SCATTER_SVG_MAX if svg_max is None else svg_max
+    gl_max = SCATTER_GL_MAX if gl_max is None else gl_max
+    if n_points <= svg_max:
+        return "svg"
+    if n_points <= gl_max:
+        return "webgl"
+    return "bin"
+
+
+def _binned_heatmap(x: np.ndarray, y: np.ndarray, lo: float, hi: float, bins: int) -> go.Heatmap:
+    counts, xe, ye = np.histogram2d(x, y, bins=bins, range=[[lo, hi], [lo, hi]])
+    counts = counts.T  # histogram2d: [x, y] -> heatmap: [baris y, kolom x]
+    with np.errstate(divide="ignore"):
+        z = np.where(counts > 0, np.log10(counts), np.nan)  # sel kosong transparan
+    zmax = float(np.nanmax(z)) if np.isfinite(z).any() else 1.0
+    ticks = np.arange(0, int(np.ceil(zmax)) + 1)
+    return go.Heatmap(
+        x=(xe[:-1] + xe[1:]) / 2,
+        y=(ye[:-1] + ye[1:]) / 2,
+        z=z,
+        customdata=counts.astype(np.int64),
+        colorscale="Viridis",
+        colorbar=dict(title="Jumlah UKM", tickvals=ticks, ticktext=[f"{10 ** int(t):,}" for t in ticks]),
+        hovertemplate="Tahun lalu: %{x:,.0f}<br>Tahun ini: %{y:,.0f}<br>Jumlah UKM: %{customdata:,}<extra></extra>",
+        name="Kepadatan",
+    )
+
+
+def revenue_scatter(
+    d,
+    x: str,
+    y: str,
+    bounds: tuple,
+    color: str = None,
+    hover_name: str = None,
+    hover_data: dict = None,
+    mode: str = None,
+    bins: int = SCATTER_BINS,
+) -> tuple[go.Figure, str]:
+    """
+    Scatter x vs y + garis y=x. bounds = (min, max) gabungan kedua kolom dari
+    statistik dataset (cube agregat), tidak dihitung ulang dari baris.
+    Return (figure, mode yang dipakai).
+    """
+    mode = mode or scatter_mode(len(d))
+    lo, hi = bounds
+
+    if mode == "bin":
+        fig = go.Figure(_binned_heatmap(
+            d[x].to_numpy(dtype=np.float64), d[y].to_numpy(dtype=np.float64), lo, hi, bins
+        ))
+        fig.update_layout(xaxis_title=x, yaxis_title=y)
+    else:
+        fig = px.scatter(
+            d,
+            x=x,
+            y=y,
+            color=color,
+            hover_name=hover_name,
+            # WebGL: hover cukup nama + x/y, supaya payload tidak membawa kolom tambahan per titik
+            hover_data=hover_data if mode == "svg" else None,
+            opacity=0.75,
+            render_mode="svg" if mode == "svg" else "webgl",
+        )
+
+    fig.add_trace(go.Scatter(
+        x=[lo, hi],
+        y=[lo, hi],
+        mode="lines",
+        name="Garis y=x (stabil)",
+        line=dict(dash="dash"),
+    ))
+    return fig, mode
+
+
+# =========================
+# BOX PLOT (statistik dihitung di server)
+# =========================
+# maks titik outlier yang dikirim per kelompok (sampel acak, nilai ekstrem selalu ikut)
+BOX_MAX_OUTLIERS = 150
+
+
+def box_stats(df, col: str, by: str = None, max_outliers: int = BOX_MAX_OUTLIERS, seed: int = 0):
+    """
+    Statistik box plot per kelompok (Tukey, kuartil linear seperti Plotly):
+    return (stats: index kelompok, kolom n/q1/median/q3/lowerfence/upperfence,
+            outliers: frame [by, col] berisi sampel outlier <= max_outliers per kelompok).
+    """
+    v = df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+    ok = ~np.isnan(v)
+    v = v[ok]
+    if by is None:
+        keys = np.zeros(len(v), dtype=np.int64)
+        names = ["Semua"]
+    else:
+        keys, names = pd.factorize(df[by].to_numpy()[ok], sort=True)
+        keep = keys >= 0
+        keys, v = keys[keep], v[keep]
+    s = pd.Series(v)
+    g = s.groupby(keys)
+
+    q = g.quantile([0.25, 0.5, 0.75]).unstack()
+    stats = pd.DataFrame({"n": g.size(), "q1": q[0.25], "median": q[0.5], "q3": q[0.75]})
+    iqr = stats["q3"] - stats["q1"]
+    lo_lim = (stats["q1"] - 1.5 * iqr).to_numpy()[keys]
+    hi_lim = (stats["q3"] + 1.5 * iqr).to_numpy()[keys]
+    inside = (v >= lo_lim) & (v <= hi_lim)
+    # whisker = nilai terjauh yang masih di dalam 1.5 IQR
+    stats["lowerfence"] = s[inside].groupby(keys[inside]).min()
+    stats["upperfence"] = s[inside].groupby(keys[inside]).max()
+    stats.index = pd.Index(np.asarray(names)[stats.index.to_numpy()], name=by or "Kelompok")
+
+    out_idx = np.flatnonzero(~inside)
+    if len(out_idx):
+        # urutan acak per kelompok; min & max kelompok diberi prioritas supaya rentang tetap benar
+        rank_key = np.random.default_rng(seed).random(len(out_idx))
+        o = pd.Series(v[out_idx])
+        og = o.groupby(keys[out_idx])
+        rank_key[og.idxmin().to_numpy()] = -1.0
+        rank_key[og.idxmax().to_numpy()] = -1.0
+        r = pd.Series(rank_key).groupby(keys[out_idx]).rank(method="first").to_numpy()
+        out_idx = out_idx[r <= max_outliers]
+    outliers = pd.DataFrame({by or "Kelompok": np.asarray(names)[keys[out_idx]], col: v[out_idx]})
+    return stats, outliers
+
+
+def box_figure(stats, outliers, col: str) -> go.Figure:
+    """Box dari statistik jadi (go.Box q1/median/q3/fence) + titik outlier sampel."""
+    by = stats.index.name
+    x = stats.index.astype(str).tolist()
+    fig = go.Figure(go.Box(
+        x=x,
+        q1=stats["q1"],
+        median=stats["median"],
+        q3=stats["q3"],
+        lowerfence=stats["lowerfence"],
+        upperfence=stats["upperfence"],
+        name=col,
+        boxpoints=False,
+    ))
+    if len(outliers):
+        fig.add_trace(go.Scatter(
+            x=outliers[by].astype(str),
+            y=outliers[col],
+            mode="markers",
+            marker=dict(size=4, opacity=0.6),
+            name="Outlier (sampel)",
+        ))
+    fig.update_layout(showlegend=False, xaxis_title=by if by != "Kelompok" else "", yaxis_title=col)
+    return fig
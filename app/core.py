@@ -1,8 +1,12 @@
 import numpy as np
 import pandas as pd
+from functools import lru_cache
 from io import BytesIO
 from pathlib import Path
 
+from app.index import top_n_frame
+from app.timing import timed
+
 REQUIRED_COLS = [
     "Bidang Usaha",
     "Nama Usaha",
@@ -12,6 +16,16 @@ REQUIRED_COLS = [
     "Total Modal/Investasi (Rp)",
 ]
 
+# kolom tambahan yang ikut dibaca kalau ada di file (mis. untuk filter wilayah)
+OPTIONAL_COLS = ["Kecamatan"]
+
+NUMERIC_COLS = [
+    "Pendapatan Tahun Ini (Rp)",
+    "Pendapatan Tahun Lalu (Rp)",
+    "Total Biaya (Rp)",
+    "Total Modal/Investasi (Rp)",
+]
+
 
 def to_num(s):
     return pd.to_numeric(s, errors="coerce")
@@ -29,123 +43,339 @@ def safe_div(a, b):
     return a.div(b_safe)
 
 
-def clip_minmax_score(series, low_q=0.05, high_q=0.95):
-    """Normalize -> 0..100 with quantile clipping for robustness."""
+def clip_minmax_score(series, low_q=0.05, high_q=0.95, bounds=None):
+    """
+    Normalize -> 0..100 with quantile clipping for robustness.
+    bounds=(lo, hi): pakai batas yang sudah dihitung (mis. dari sketch global data per chunk).
+    """
     s = pd.to_numeric(series, errors="coerce")
     if s.dropna().empty:
         return pd.Series([np.nan] * len(s), index=s.index)
 
-    lo = s.quantile(low_q)
-    hi = s.quantile(high_q)
+    if bounds is not None:
+        lo, hi = bounds
+    else:
+        lo = s.quantile(low_q)
+        hi = s.quantile(high_q)
 
     if pd.isna(lo) or pd.isna(hi) or hi == lo:
         # fallback: percentile rank
         return s.rank(pct=True) * 100
 
-    sc = s.clip(lo, hi)
+    return pd.Series(minmax_score_array(s.to_numpy(dtype=np.float64), lo, hi), index=s.index)
+
+
+def minmax_score_array(v: np.ndarray, lo: float, hi: float) -> np.ndarray:
+    """Inti clip_minmax_score untuk array NumPy dengan batas (lo < hi) yang sudah diketahui."""
+    sc = np.clip(v, lo, hi)
     sc = (sc - lo) / (hi - lo)
     return sc * 100
 
 
-def compute_kpis(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
+KPI_COLS = ["Laba Bersih (Rp)", "ROI (%)", "Profit Margin (%)", "Growth Rate (%)", "Cost Ratio"]
 
-    # coerce numeric
-    df["Pendapatan Tahun Ini (Rp)"] = to_num(df["Pendapatan Tahun Ini (Rp)"])
-    df["Pendapatan Tahun Lalu (Rp)"] = to_num(df["Pendapatan Tahun Lalu (Rp)"])
-    df["Total Biaya (Rp)"] = to_num(df["Total Biaya (Rp)"])
-    df["Total Modal/Investasi (Rp)"] = to_num(df["Total Modal/Investasi (Rp)"])
-
-    # KPIs
-    df["Laba Bersih (Rp)"] = df["Pendapatan Tahun Ini (Rp)"] - df["Total Biaya (Rp)"]
-    df["ROI (%)"] = safe_div(df["Laba Bersih (Rp)"], df["Total Modal/Investasi (Rp)"]) * 100
-    df["Profit Margin (%)"] = safe_div(df["Laba Bersih (Rp)"], df["Pendapatan Tahun Ini (Rp)"]) * 100
-    df["Growth Rate (%)"] = safe_div(
-        (df["Pendapatan Tahun Ini (Rp)"] - df["Pendapatan Tahun Lalu (Rp)"]),
-        df["Pendapatan Tahun Lalu (Rp)"],
-    ) * 100
-
-    # KPI tambahan
-    df["Cost Ratio"] = safe_div(df["Total Biaya (Rp)"], df["Pendapatan Tahun Ini (Rp)"])  # makin kecil makin bagus
-
-    # Valid flags
-    df["Valid_Data"] = True
-    df.loc[df["Total Modal/Investasi (Rp)"].isna() | (df["Total Modal/Investasi (Rp)"] <= 0), "Valid_Data"] = False
-    df.loc[df["Pendapatan Tahun Ini (Rp)"].isna() | (df["Pendapatan Tahun Ini (Rp)"] <= 0), "Valid_Data"] = False
-    df.loc[df["Pendapatan Tahun Lalu (Rp)"].isna() | (df["Pendapatan Tahun Lalu (Rp)"] <= 0), "Valid_Data"] = False
-    df.loc[df["Total Biaya (Rp)"].isna() | (df["Total Biaya (Rp)"] < 0), "Valid_Data"] = False
+# KPI disimpan dibulatkan 2 desimal (setelah cek outlier), jadi skor & aturan rekomendasi
+# memakai angka yang sama dengan yang tampil di layar
+KPI_DECIMALS = 2
 
-    # Outlier detection (robust): ROI > p99.5 OR ProfitMargin > p99.5 OR Growth > p99.5
-    df["Perlu_Verifikasi"] = False
-    for col in ["ROI (%)", "Profit Margin (%)", "Growth Rate (%)"]:
-        s = pd.to_numeric(df[col], errors="coerce")
-        if s.dropna().empty:
+# KPI yang dicek outlier-nya (di atas kuantil OUTLIER_Q -> Perlu_Verifikasi)
+OUTLIER_COLS = ["ROI (%)", "Profit Margin (%)", "Growth Rate (%)"]
+OUTLIER_Q = 0.995
+
+
+def _ratio_into(a: np.ndarray, b: np.ndarray, scale: float, out: np.ndarray) -> np.ndarray:
+    """out = a / b * scale; pembagi 0 / NaN -> NaN (sama dengan safe_div)."""
+    ok = b != 0
+    ok &= ~np.isnan(b)
+    np.divide(a, b, out=out, where=ok)
+    out[~ok] = np.nan
+    if scale != 1.0:
+        out *= scale
+    return out
+
+
+def kpi_kernel(rev_now, rev_prev, cost, capital, out: dict = None) -> dict:
+    """
+    Hitung Laba, ROI, PM, Growth, Cost Ratio, dan Valid_Data sekali jalan (vektor NumPy).
+    Input: array float64 contiguous. out (opsional): dict array hasil yang sudah dialokasikan.
+    """
+    n = len(rev_now)
+    if out is None:
+        out = {c: np.empty(n, dtype=np.float64) for c in KPI_COLS}
+        out["Valid_Data"] = np.empty(n, dtype=bool)
+
+    laba = np.subtract(rev_now, cost, out=out["Laba Bersih (Rp)"])
+    _ratio_into(laba, capital, 100.0, out["ROI (%)"])
+    _ratio_into(laba, rev_now, 100.0, out["Profit Margin (%)"])
+    growth = np.subtract(rev_now, rev_prev, out=out["Growth Rate (%)"])
+    _ratio_into(growth, rev_prev, 100.0, growth)
+    _ratio_into(cost, rev_now, 1.0, out["Cost Ratio"])  # makin kecil makin bagus
+
+    # valid: modal, pendapatan ini & lalu > 0, biaya >= 0 (NaN otomatis gagal)
+    valid = np.greater(capital, 0, out=out["Valid_Data"])
+    valid &= rev_now > 0
+    valid &= rev_prev > 0
+    valid &= cost >= 0
+    return out
+
+
+def round_kpis(kpis: dict) -> dict:
+    """Bulatkan array KPI_COLS ke KPI_DECIMALS, in-place (tanpa salinan frame)."""
+    for c in KPI_COLS:
+        np.round(kpis[c], KPI_DECIMALS, out=kpis[c])
+    return kpis
+
+
+def outlier_flags(kpis: dict, thresholds: dict = None) -> np.ndarray:
+    """Perlu_Verifikasi: KPI > kuantil OUTLIER_Q (atau ambang yang diberikan) di salah satu OUTLIER_COLS."""
+    n = len(next(iter(kpis.values())))
+    flag = np.zeros(n, dtype=bool)
+    for col in OUTLIER_COLS:
+        v = kpis[col]
+        if thresholds is not None:
+            thr = thresholds.get(col, np.nan)
+        elif np.isnan(v).all():
             continue
-        thr = s.quantile(0.995)
-        df.loc[s > thr, "Perlu_Verifikasi"] = True
+        else:
+            thr = np.nanquantile(v, OUTLIER_Q)
+        if not np.isnan(thr):
+            flag |= v > thr
+    return flag
+
 
-    df = df.round(2)
+@timed("KPI (compute_kpis)")
+def compute_kpis(df: pd.DataFrame, outlier_thresholds: dict = None) -> pd.DataFrame:
+    """
+    KPI per baris. Outlier dicek dari nilai penuh, lalu KPI dibulatkan KPI_DECIMALS
+    (round_kpis, hanya kolom KPI) sebelum dipakai skor & rekomendasi.
+    outlier_thresholds: ambang global per KPI (untuk data per chunk); default kuantil frame ini.
+    """
+    df = df.copy(deep=False)  # hanya kolom baru yang dialokasikan
+
+    # coerce numeric -> float64 contiguous (sekali per kolom)
+    num = {c: np.ascontiguousarray(to_num(df[c]).to_numpy(dtype=np.float64)) for c in NUMERIC_COLS}
+    for c, v in num.items():
+        df[c] = v
+
+    kpis = kpi_kernel(
+        num["Pendapatan Tahun Ini (Rp)"],
+        num["Pendapatan Tahun Lalu (Rp)"],
+        num["Total Biaya (Rp)"],
+        num["Total Modal/Investasi (Rp)"],
+    )
+    # Outlier detection (robust): ROI > p99.5 OR ProfitMargin > p99.5 OR Growth > p99.5
+    verif = outlier_flags(kpis, outlier_thresholds)
+    for c, v in round_kpis(kpis).items():
+        df[c] = v
+    df["Perlu_Verifikasi"] = verif
     return df
 
 
-def score_and_classify(df: pd.DataFrame, w_roi=0.40, w_pm=0.35, w_gr=0.25) -> pd.DataFrame:
-    df = df.copy()
+def round_for_display(df: pd.DataFrame, decimals: int = 2) -> pd.DataFrame:
+    """Pembulatan kolom angka desimal untuk tampilan / export saja."""
+    out = df.copy(deep=False)
+    for c in out.columns:
+        if out[c].dtype.kind == "f":
+            out[c] = out[c].round(decimals)
+    return out
 
-    roi_sc = clip_minmax_score(df["ROI (%)"])
-    pm_sc = clip_minmax_score(df["Profit Margin (%)"])
-    gr_sc = clip_minmax_score(df["Growth Rate (%)"])
 
-    df["Skor_ROI"] = roi_sc
-    df["Skor_PM"] = pm_sc
-    df["Skor_GR"] = gr_sc
+# bobot default Skor KPI: (ROI, Profit Margin, Growth)
+DEFAULT_WEIGHTS = (0.40, 0.35, 0.25)
 
-    df["Skor_KPI"] = (w_roi * roi_sc + w_pm * pm_sc + w_gr * gr_sc)
+KATEGORI_ORDER = ["Baik", "Sedang", "Kurang", "Tidak Valid"]
 
-    # jika invalid -> skor NaN
-    df.loc[~df["Valid_Data"], ["Skor_ROI", "Skor_PM", "Skor_GR", "Skor_KPI"]] = np.nan
 
-    # kategori berbasis skor
-    df["Kategori_Skor"] = "Tidak Valid"
-    df.loc[df["Skor_KPI"] >= 75, "Kategori_Skor"] = "Baik"
-    df.loc[(df["Skor_KPI"] >= 55) & (df["Skor_KPI"] < 75), "Kategori_Skor"] = "Sedang"
-    df.loc[(df["Skor_KPI"] < 55), "Kategori_Skor"] = "Kurang"
+# KPI -> kolom skor normalisasinya (0..100)
+SCORE_COLS = {"ROI (%)": "Skor_ROI", "Profit Margin (%)": "Skor_PM", "Growth Rate (%)": "Skor_GR"}
 
+
+@timed("skor per KPI")
+def normalized_scores(df: pd.DataFrame, bounds: dict = None) -> pd.DataFrame:
+    """
+    Skor_ROI / Skor_PM / Skor_GR (quantile clipping). Tidak bergantung bobot,
+    jadi cukup dihitung sekali per dataset. Baris invalid -> NaN.
+    bounds: {KPI: (lo, hi)} global (untuk data per chunk); default kuantil frame ini.
+    """
+    df = df.copy(deep=False)
+    invalid = ~df["Valid_Data"].astype(bool).to_numpy()
+    for kpi, col in SCORE_COLS.items():
+        b = bounds.get(kpi) if bounds is not None else None
+        sc = clip_minmax_score(df[kpi], bounds=b).to_numpy(dtype=np.float64, copy=True)
+        sc[invalid] = np.nan
+        df[col] = sc
     return df
 
 
+@timed("bobot & kategori")
+def apply_weights(df: pd.DataFrame, w_roi=0.40, w_pm=0.35, w_gr=0.25) -> pd.DataFrame:
+    """
+    Skor_KPI + Kategori_Skor dari skor normalisasi yang sudah ada.
+    Cuma satu multiply-add + kategorisasi O(n), jadi ganti bobot terasa instan.
+    """
+    df = df.copy(deep=False)
+    s_roi = df["Skor_ROI"].to_numpy(dtype=np.float64)
+    s_pm = df["Skor_PM"].to_numpy(dtype=np.float64)
+    s_gr = df["Skor_GR"].to_numpy(dtype=np.float64)
+
+    skor = np.multiply(s_roi, w_roi)
+    tmp = np.multiply(s_pm, w_pm)
+    skor += tmp
+    np.multiply(s_gr, w_gr, out=tmp)
+    skor += tmp
+    df["Skor_KPI"] = skor
+
+    # kategori berbasis skor (kode sesuai KATEGORI_ORDER; NaN -> Tidak Valid)
+    codes = np.full(len(skor), 3, dtype=np.int8)
+    codes[skor < 55] = 2
+    codes[skor >= 55] = 1
+    codes[skor >= 75] = 0
+    df["Kategori_Skor"] = pd.Categorical.from_codes(codes, categories=KATEGORI_ORDER)
+    return df
+
+
+def score_and_classify(df: pd.DataFrame, w_roi=0.40, w_pm=0.35, w_gr=0.25) -> pd.DataFrame:
+    return apply_weights(normalized_scores(df), w_roi=w_roi, w_pm=w_pm, w_gr=w_gr)
+
+
+# =========================
+# REKOMENDASI (rule engine)
+# =========================
+REC_INVALID_TEXT = "⚠️ Data belum valid. Lengkapi pendapatan, biaya, modal, dan pendapatan tahun lalu."
+REC_OK_TEXT = "Kinerja relatif baik → pertahankan strategi dan siapkan rencana ekspansi bertahap."
+
+# aturan rekomendasi: (kolom, operator, ambang, teks). Aturan ke-i = bit ke-i di Rekomendasi_Kode,
+# urutan di sini = urutan teks di output.
+REC_RULES = [
+    ("ROI (%)", "<", 10, "ROI rendah → optimalkan penggunaan modal, kurangi aset tidak produktif."),
+    ("Profit Margin (%)", "<", 5, "Profit Margin rendah → tekan biaya produksi/operasional, evaluasi harga bertahap."),
+    ("Growth Rate (%)", "<", 0, "Growth negatif → perlu strategi pemasaran/produk baru/ekspansi pasar."),
+    ("Cost Ratio", ">", 0.85, "Cost Ratio tinggi → biaya mendekati pendapatan, fokus efisiensi & kontrol biaya."),
+]
+REC_INVALID_BIT = 0x80
+
+
+def recommendation_codes(df) -> np.ndarray:
+    """
+    Bitmask aturan yang aktif per baris (uint8), dievaluasi sebagai mask NumPy sekali jalan.
+    Nilai dibandingkan setelah dibulatkan KPI_DECIMALS (angka yang tampil di layar).
+    df: DataFrame atau dict {kolom: array} (mis. potongan partisi di app/parallel.py).
+    """
+    n = len(next(iter(df.values()))) if isinstance(df, dict) else len(df)
+    codes = np.zeros(n, dtype=np.uint8)
+    for bit, (col, op, thr, _) in enumerate(REC_RULES):
+        if col not in df:
+            continue
+        v = np.round(np.asarray(to_num(df[col]), dtype=np.float64), KPI_DECIMALS)
+        fired = (v < thr) if op == "<" else (v > thr)  # NaN -> False
+        codes |= fired.astype(np.uint8) << bit
+
+    if "Valid_Data" in df:
+        invalid = ~np.asarray(df["Valid_Data"], dtype=bool)
+        codes[invalid] = REC_INVALID_BIT
+    return codes
+
+
+@lru_cache(maxsize=None)
+def recommendation_text(code: int) -> str:
+    """Teks rekomendasi untuk satu bitmask."""
+    if code & REC_INVALID_BIT:
+        return REC_INVALID_TEXT
+    rec = [text for bit, (_, _, _, text) in enumerate(REC_RULES) if code >> bit & 1]
+    if not rec:
+        rec.append(REC_OK_TEXT)
+    return " • " + "\n • ".join(rec)
+
+
+def decode_recommendations(codes) -> np.ndarray:
+    """Bitmask -> teks. Teks dibuat sekali per kode unik lalu di-broadcast."""
+    codes = np.asarray(codes, dtype=np.uint8)
+    uniq, inv = np.unique(codes, return_inverse=True)
+    texts = np.array([recommendation_text(int(u)) for u in uniq], dtype=object)
+    return texts[inv.reshape(-1)]
+
+
 def make_recommendation(row) -> str:
     """Rekomendasi otomatis singkat per UKM."""
     if not bool(row.get("Valid_Data", True)):
-        return "⚠️ Data belum valid. Lengkapi pendapatan, biaya, modal, dan pendapatan tahun lalu."
-
-    rec = []
-    roi = row.get("ROI (%)", np.nan)
-    pm = row.get("Profit Margin (%)", np.nan)
-    gr = row.get("Growth Rate (%)", np.nan)
-    cr = row.get("Cost Ratio", np.nan)
-
-    # aturan rekomendasi
-    if pd.notna(roi) and roi < 10:
-        rec.append("ROI rendah → optimalkan penggunaan modal, kurangi aset tidak produktif.")
-    if pd.notna(pm) and pm < 5:
-        rec.append("Profit Margin rendah → tekan biaya produksi/operasional, evaluasi harga bertahap.")
-    if pd.notna(gr) and gr < 0:
-        rec.append("Growth negatif → perlu strategi pemasaran/produk baru/ekspansi pasar.")
-    if pd.notna(cr) and cr > 0.85:
-        rec.append("Cost Ratio tinggi → biaya mendekati pendapatan, fokus efisiensi & kontrol biaya.")
+        return REC_INVALID_TEXT
 
-    if not rec:
-        rec.append("Kinerja relatif baik → pertahankan strategi dan siapkan rencana ekspansi bertahap.")
-
-    return " • " + "\n • ".join(rec)
+    code = 0
+    for bit, (col, op, thr, _) in enumerate(REC_RULES):
+        v = row.get(col, np.nan)
+        if pd.isna(v):
+            continue
+        v = np.round(float(v), KPI_DECIMALS)
+        if (v < thr) if op == "<" else (v > thr):
+            code |= 1 << bit
+    return recommendation_text(code)
 
 
-def add_recommendations(df: pd.DataFrame) -> pd.DataFrame:
+@timed("rekomendasi")
+def add_recommendations(df: pd.DataFrame, with_text: bool = True) -> pd.DataFrame:
+    """
+    Tambah Rekomendasi_Kode (bitmask aturan). with_text=False: teks tidak dibuat di sini,
+    tapi nanti lewat with_recommendation_text() hanya untuk baris yang ditampilkan/diekspor.
+    """
     df = df.copy()
-    df["Rekomendasi"] = df.apply(make_recommendation, axis=1)
+    df["Rekomendasi_Kode"] = recommendation_codes(df)
+    if with_text:
+        df["Rekomendasi"] = decode_recommendations(df["Rekomendasi_Kode"].to_numpy())
     return df
 
 
+def with_recommendation_text(df: pd.DataFrame) -> pd.DataFrame:
+    """Ganti kolom Rekomendasi_Kode dengan teks Rekomendasi (untuk tampilan / export)."""
+    if "Rekomendasi_Kode" not in df.columns:
+        return df
+    out = df.drop(columns=["Rekomendasi_Kode"])
+    if "Rekomendasi" not in out.columns:
+        pos = df.columns.get_loc("Rekomendasi_Kode")
+        out.insert(pos, "Rekomendasi", decode_recommendations(df["Rekomendasi_Kode"].to_numpy()))
+    return out
+
+
+# kolom teks yang nilainya banyak berulang -> cocok jadi categorical
+CATEGORY_COLS = ["Bidang Usaha", "Kecamatan", "Sumber File", "Sheet"]
+
+
+@timed("kompaksi memori")
+def compact_frame(df: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Versi hemat memori dari frame hasil pipeline:
+    - sektor/wilayah/kategori -> categorical
+    - Rekomendasi -> cukup Rekomendasi_Kode (bitmask aturan); teks dibuat saat ditampilkan.
+      Kalau kodenya tidak ada, teks dijadikan categorical (kode integer + teks unik)
+    - Valid_Data & Perlu_Verifikasi -> bool
+    Return (df_compact, laporan byte yang dihemat per kolom).
+    """
+    before = df.memory_usage(deep=True, index=False)
+    out = df.copy(deep=False)
+
+    for c in CATEGORY_COLS:
+        if c in out.columns and not isinstance(out[c].dtype, pd.CategoricalDtype):
+            out[c] = out[c].astype("category")
+
+    if "Kategori_Skor" in out.columns:
+        out["Kategori_Skor"] = pd.Categorical(out["Kategori_Skor"], categories=KATEGORI_ORDER)
+
+    if "Rekomendasi" in out.columns and "Rekomendasi_Kode" in out.columns:
+        out = out.drop(columns=["Rekomendasi"])
+    elif "Rekomendasi" in out.columns and not isinstance(out["Rekomendasi"].dtype, pd.CategoricalDtype):
+        out["Rekomendasi"] = out["Rekomendasi"].astype("category")
+
+    for c in ["Valid_Data", "Perlu_Verifikasi"]:
+        if c in out.columns and out[c].dtype != bool:
+            out[c] = out[c].fillna(False).astype(bool)
+
+    after = out.memory_usage(deep=True, index=False)
+    report = pd.DataFrame({"Kolom": before.index, "Sebelum (byte)": before.values, "Sesudah (byte)": after.values})
+    report["Hemat (byte)"] = report["Sebelum (byte)"] - report["Sesudah (byte)"]
+    report = report[report["Hemat (byte)"] != 0].sort_values("Hemat (byte)", ascending=False)
+    return out, report.reset_index(drop=True)
+
+
+@timed("ringkasan kualitas data")
 def data_quality_summary(df: pd.DataFrame) -> dict:
     s = {}
     s["total_rows"] = int(len(df))
@@ -165,13 +395,76 @@ def data_quality_summary(df: pd.DataFrame) -> dict:
     return s
 
 
+XLSX_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+@timed("export Excel")
 def export_excel(df: pd.DataFrame, filename="KPI_UMKM_Serang.xlsx") -> tuple[bytes, str]:
     out = BytesIO()
     with pd.ExcelWriter(out, engine="openpyxl") as writer:
-        df.to_excel(writer, index=False, sheet_name="KPI")
+        round_for_display(df).to_excel(writer, index=False, sheet_name="KPI")
     return out.getvalue(), filename
 
 
+def _safe_mean(frame: pd.DataFrame, col: str) -> float:
+    return float(frame[col].mean(skipna=True)) if col in frame.columns and len(frame) else 0.0
+
+
+def report_inputs(
+    df: pd.DataFrame,
+    top_n: int = 10,
+    sektor_summary: pd.DataFrame = None,
+    top_best: pd.DataFrame = None,
+    top_risk: pd.DataFrame = None,
+) -> tuple[dict, pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """
+    Input generate_pdf_report dari frame hasil pipeline (dipakai halaman Generate Report & app/batch.py):
+    (metrics, top terbaik, top butuh perhatian + teks rekomendasi, ringkasan rata-rata per sektor).
+    Rata-rata & ranking hanya dari data valid. sektor_summary / top_best / top_risk yang
+    sudah jadi (cube agregat, index rank di app/session.py) dipakai apa adanya;
+    kalau tidak ada, top N dipilih dengan argpartition (tanpa sort penuh).
+    """
+    valid = df[df["Valid_Data"] == True] if "Valid_Data" in df.columns else df
+
+    kategori = valid["Kategori_Skor"] if "Kategori_Skor" in valid.columns else pd.Series(dtype=object)
+    metrics = {
+        "total": int(len(df)),
+        "avg_roi": _safe_mean(valid, "ROI (%)"),
+        "avg_pm": _safe_mean(valid, "Profit Margin (%)"),
+        "avg_gr": _safe_mean(valid, "Growth Rate (%)"),
+        "avg_score": _safe_mean(valid, "Skor_KPI"),
+        "baik": int((kategori == "Baik").sum()),
+        "sedang": int((kategori == "Sedang").sum()),
+        "kurang": int((kategori == "Kurang").sum()),
+    }
+
+    has_score = "Skor_KPI" in valid.columns
+    if top_best is None:
+        top_best = top_n_frame(valid, "Skor_KPI", top_n) if has_score else valid.head(0)
+    if top_risk is None:
+        top_risk = top_n_frame(valid, "Skor_KPI", top_n, ascending=True) if has_score else valid.head(0)
+    top_risk = with_recommendation_text(top_risk)
+
+    if sektor_summary is not None:
+        return metrics, top_best, top_risk, sektor_summary
+
+    sektor_summary = pd.DataFrame()
+    if "Bidang Usaha" in valid.columns:
+        kpi_cols = [c for c in ["ROI (%)", "Profit Margin (%)", "Growth Rate (%)", "Skor_KPI"] if c in valid.columns]
+        if kpi_cols:
+            sektor_summary = (
+                valid.groupby("Bidang Usaha", observed=True)[kpi_cols]
+                .mean(numeric_only=True)
+                .round(2)
+                .reset_index()
+            )
+            if "Growth Rate (%)" in sektor_summary.columns:
+                sektor_summary = sektor_summary.sort_values("Growth Rate (%)", ascending=False)
+
+    return metrics, top_best, top_risk, sektor_summary
+
+
+@timed("generate PDF")
 def generate_pdf_report(
     metrics: dict,
     top_best: pd.DataFrame,
@@ -0,0 +1,118 @@
+# app/cube.py
+"""
+Cube agregat sektor: statistik per KPI per sel (Bidang Usaha, Valid_Data[, Kecamatan]),
+dibangun sekali per versi dataset (lihat app/session.py: sector_cube).
+
+Isi tiap sel: count, sum, m2, min, max. m2 = jumlah kuadrat selisih terhadap
+rata-rata sel (bukan sum x^2 mentah: untuk nilai Rupiah / Growth besar
+sum x^2 - n*mean^2 kehilangan presisi). Sel bisa digabung (rumus Chan) jadi
+mean/std per sektor untuk filter apa pun tanpa menyentuh baris data lagi:
+ganti filter = gabung ulang beberapa ratus sel cube.
+"""
+import numpy as np
+import pandas as pd
+
+from app.core import NUMERIC_COLS
+from app.timing import timed
+
+CUBE_DIMS = ["Bidang Usaha", "Valid_Data", "Kecamatan"]
+CUBE_COLS = ["Skor_KPI", "ROI (%)", "Profit Margin (%)", "Growth Rate (%)", "Cost Ratio"] + NUMERIC_COLS
+CUBE_STATS = ["count", "sum", "m2", "min", "max"]
+
+# parameter filter rollup -> dimensi cube
+_FILTER_DIMS = {"bidang": "Bidang Usaha", "valid": "Valid_Data", "kecamatan": "Kecamatan"}
+
+
+@timed("cube agregat sektor")
+def build_cube(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Index = dimensi yang ada di df (MultiIndex), kolom = MultiIndex (KPI, stat).
+    Baris dengan Kecamatan kosong tetap masuk (dropna=False).
+    """
+    dims = [d for d in CUBE_DIMS if d in df.columns]
+    cols = [c for c in CUBE_COLS if c in df.columns]
+    g = df.groupby(dims, observed=True, dropna=False, sort=True)[cols]
+
+    count = g.count()
+    parts = {
+        "count": count,
+        "sum": g.sum(),
+        "m2": (g.var(ddof=0) * count).fillna(0.0),  # var groupby pakai Welford (stabil)
+        "min": g.min(),
+        "max": g.max(),
+    }
+    cube = pd.concat(parts, axis=1).swaplevel(axis=1)
+    return cube.reindex(columns=pd.MultiIndex.from_product([cols, CUBE_STATS]))
+
+
+def _cube_mask(cube: pd.DataFrame, filters: dict) -> np.ndarray:
+    mask = np.ones(len(cube), dtype=bool)
+    for key, values in filters.items():
+        if values is None:
+            continue
+        dim = _FILTER_DIMS[key]
+        if dim not in cube.index.names:
+            continue  # kolom tidak ada di data (mis. Kecamatan) -> filter diabaikan
+        level = cube.index.get_level_values(dim)
+        if isinstance(values, (bool, np.bool_)):
+            mask &= np.asarray(level == values)
+        else:
+            mask &= np.asarray(level.astype(str).isin([str(v) for v in values]))
+    return mask
+
+
+def rollup(cube: pd.DataFrame, by="Bidang Usaha", bidang=None, valid=None, kecamatan=None) -> pd.DataFrame:
+    """
+    Gabung sel cube per `by` (None = satu baris total) setelah filter
+    (bidang/kecamatan: list nilai, valid: True/False; None = semua).
+    Return index = nilai `by`, kolom MultiIndex (KPI, stat) dengan
+    stat count, sum, m2, min, max, mean, std (ddof=1, sama dengan pandas).
+    """
+    sub = cube[_cube_mask(cube, {"bidang": bidang, "valid": valid, "kecamatan": kecamatan})]
+
+    if by is None:
+        codes, keys = np.zeros(len(sub), dtype=np.int64), pd.Index(["Semua"])
+    else:
+        codes, keys = pd.factorize(sub.index.get_level_values(by), sort=True)
+        keep = codes >= 0  # sektor kosong (NaN) tidak ikut, sama dengan groupby biasa
+        sub, codes = sub[keep], codes[keep]
+    n_out = len(keys)
+
+    out = {}
+    for col in sub.columns.get_level_values(0).unique():
+        cnt = sub[(col, "count")].to_numpy(dtype=np.float64)
+        tot = sub[(col, "sum")].to_numpy(dtype=np.float64)
+        n = np.bincount(codes, weights=cnt, minlength=n_out)
+        s = np.bincount(codes, weights=tot, minlength=n_out)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(n > 0, s / n, np.nan)
+            cell_mean = np.where(cnt > 0, tot / cnt, 0.0)
+            delta = np.where(cnt > 0, cell_mean - mean[codes], 0.0)
+            m2 = np.bincount(codes, weights=sub[(col, "m2")].to_numpy(dtype=np.float64) + cnt * delta**2, minlength=n_out)
+            std = np.where(n > 1, np.sqrt(m2 / (n - 1)), np.nan)
+
+        mn = np.full(n_out, np.nan)
+        mx = np.full(n_out, np.nan)
+        np.fmin.at(mn, codes, sub[(col, "min")].to_numpy(dtype=np.float64))
+        np.fmax.at(mx, codes, sub[(col, "max")].to_numpy(dtype=np.float64))
+
+        for stat, v in zip(["count", "sum", "m2", "min", "max", "mean", "std"], [n, s, m2, mn, mx, mean, std]):
+            out[(col, stat)] = v
+
+    res = pd.DataFrame(out, index=pd.Index(np.asarray(keys), name=by or "Total"))
+    res.columns = pd.MultiIndex.from_tuples(res.columns)
+    return res
+
+
+def sector_means(cube: pd.DataFrame, cols: list, by="Bidang Usaha", std_cols=(), decimals: int = 2, **filters) -> pd.DataFrame:
+    """
+    Pengganti df.groupby(by)[cols].mean().round(decimals).reset_index():
+    kolom `by` + rata-rata tiap kolom (+ "Std <kolom>" untuk std_cols, tidak dibulatkan).
+    """
+    r = rollup(cube, by=by, **filters)
+    cols = [c for c in cols if c in r.columns.get_level_values(0)]
+    out = pd.DataFrame({c: r[(c, "mean")] for c in cols}, index=r.index).round(decimals)
+    for c in std_cols:
+        if c in r.columns.get_level_values(0):
+            out[f"Std {c}"] = r[(c, "std")]
+    return out.reset_index()
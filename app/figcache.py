@@ -0,0 +1,81 @@
+# app/figcache.py
+"""
+Cache figure Plotly (tanpa Streamlit): spec JSON hasil fig.to_json() disimpan
+per key (versi dataset, filter, halaman, mode, metrik, Top N, ...), LRU terbatas.
+
+Rerun karena widget lain / bolak-balik mode & halaman cukup memuat ulang spec,
+tanpa menghitung data grafik + membangun figure lagi. Spec yang sangat besar
+(mis. scatter WebGL ratusan ribu titik) tidak disimpan: memuatnya ulang lebih
+mahal daripada membangun ulang.
+
+Satu instance dipakai bersama semua session (thread) lewat st.cache_resource:
+akses OrderedDict & penghitung dijaga lock; build() sendiri jalan di luar lock.
+"""
+import threading
+from collections import OrderedDict
+
+import plotly.io as pio
+
+# jumlah figure yang disimpan; yang paling lama tidak dipakai dibuang
+FIGURE_CACHE_ENTRIES = 64
+# spec lebih besar dari ini (byte JSON) tidak disimpan
+FIGURE_CACHE_MAX_BYTES = 1_000_000
+
+
+class FigureCache:
+    """LRU key -> spec JSON figure, dengan penghitung hit / miss."""
+
+    def __init__(self, max_entries: int = FIGURE_CACHE_ENTRIES, max_bytes: int = FIGURE_CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._specs = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.skipped = 0  # miss yang spec-nya terlalu besar untuk disimpan
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._specs)
+
+    def get_or_build(self, key: tuple, build):
+        """Figure untuk key; kalau belum ada, build() (tanpa argumen) dipanggil lalu spec-nya disimpan."""
+        with self._lock:
+            spec = self._specs.get(key)
+            if spec is not None:
+                self._specs.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+        if spec is not None:
+            return pio.from_json(spec)
+
+        # build di luar lock: session lain tidak menunggu figure yang tidak mereka pakai
+        fig = build()
+        spec = fig.to_json()
+        with self._lock:
+            if len(spec) > self.max_bytes:
+                self.skipped += 1
+                return fig
+            self._specs[key] = spec
+            self._specs.move_to_end(key)
+            while len(self._specs) > self.max_entries:
+                self._specs.popitem(last=False)
+        return fig
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "skipped": self.skipped,
+                "hit_rate": self.hits / total if total else 0.0,
+                "entries": len(self._specs),
+                "bytes": sum(len(s) for s in self._specs.values()),
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._specs.clear()
+            self.hits = self.misses = self.skipped = 0
@@ -0,0 +1,141 @@
+# app/index.py
+"""
+Index kategori -> posisi baris untuk filter global (Bidang Usaha, Kecamatan).
+
+Dibangun sekali per versi dataset dari kode categorical: posisi baris per
+kategori disimpan sebagai potongan dari satu array terurut. Filter = gabung
+potongan kategori terpilih (tanpa astype(str) / isin atas seluruh kolom).
+"""
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# jumlah hasil filter (kombinasi kategori) yang disimpan per index
+POSITIONS_CACHE = 32
+
+
+class CategoryIndex:
+    """Posisi baris per kategori dari satu kolom; hasil positions() urut sesuai baris asli."""
+
+    def __init__(self, values: pd.Series):
+        cat = values if isinstance(values.dtype, pd.CategoricalDtype) else values.astype("category")
+        codes = cat.cat.codes.to_numpy()
+        names = [str(c) for c in cat.cat.categories]
+
+        counts = np.bincount(codes[codes >= 0], minlength=len(names))
+        # posisi baris dikelompokkan per kode (stable -> tiap kelompok tetap urut baris)
+        order = np.argsort(codes, kind="stable")
+        order = order[len(codes) - int(counts.sum()):]  # buang baris NaN (kode -1, di depan)
+        self._order = order.astype(np.int64)
+        self._order.setflags(write=False)
+        self._offsets = np.concatenate([[0], np.cumsum(counts)])
+        self._codes = codes
+        self._lut = {name: i for i, name in enumerate(names)}
+        self.counts = dict(zip(names, counts.tolist()))
+        self.n_rows = len(codes)
+        self._cache = OrderedDict()
+
+    @property
+    def categories(self) -> list:
+        """Kategori yang punya baris, urut nama."""
+        return sorted(name for name, n in self.counts.items() if n > 0)
+
+    def _code_list(self, values) -> list:
+        return sorted({self._lut[str(v)] for v in values if str(v) in self._lut})
+
+    def positions(self, values) -> np.ndarray:
+        """Posisi baris (int64, naik, read-only) untuk kategori di `values`; nama tak dikenal diabaikan."""
+        codes = self._code_list(values)
+        key = tuple(codes)
+        hit = self._cache.get(key)
+        if hit is not None:
+            self._cache.move_to_end(key)
+            return hit
+
+        runs = [self._order[self._offsets[c]:self._offsets[c + 1]] for c in codes]
+        n_sel = sum(len(r) for r in runs)
+        if not runs:
+            out = np.empty(0, dtype=np.int64)
+        elif len(runs) == 1:
+            out = runs[0]  # potongan array index, tanpa salinan
+        elif n_sel < self.n_rows // 4:
+            # tiap run sudah urut: sort stable (timsort) cukup me-merge run-nya
+            out = np.sort(np.concatenate(runs), kind="stable")
+        else:
+            # pilihan besar: satu lintasan bitmap lebih murah dari merge
+            out = np.flatnonzero(self.mask(values)).astype(np.int64, copy=False)
+        out.setflags(write=False)
+
+        self._cache[key] = out
+        if len(self._cache) > POSITIONS_CACHE:
+            self._cache.popitem(last=False)
+        return out
+
+    def mask(self, values) -> np.ndarray:
+        """Bitmap baris (bool) untuk kategori di `values`, untuk digabung (&, |) dengan filter lain."""
+        lut = np.zeros(len(self._lut) + 1, dtype=bool)  # slot terakhir = NaN (kode -1)
+        lut[self._code_list(values)] = True
+        return lut.take(self._codes)
+
+
+# =========================
+# RANK (Top-N per KPI)
+# =========================
+def _order_rows(pos: np.ndarray, v: np.ndarray, ascending: bool) -> np.ndarray:
+    """Urutkan posisi terpilih berdasarkan nilai (seri: urut baris), hasil kecil jadi murah."""
+    key = v[pos] if ascending else -v[pos]
+    return pos[np.lexsort((pos, key))]
+
+
+def top_n_positions(values, n: int, ascending: bool = False) -> np.ndarray:
+    """
+    Fallback ad-hoc tanpa index: posisi n nilai teratas/terbawah (NaN dilewati)
+    pakai argpartition O(len), bukan sort penuh.
+    """
+    v = np.asarray(values, dtype=np.float64)
+    pos = np.flatnonzero(~np.isnan(v))
+    if n < len(pos):
+        key = v[pos] if ascending else -v[pos]
+        pos = pos[np.argpartition(key, n - 1)[:n]]
+    return _order_rows(pos, v, ascending)
+
+
+def top_n_frame(df: pd.DataFrame, col: str, n: int, ascending: bool = False) -> pd.DataFrame:
+    """Pengganti df.dropna(subset=[col]).sort_values(col).head(n) (fallback argpartition)."""
+    return df.iloc[top_n_positions(df[col].to_numpy(dtype=np.float64, na_value=np.nan), n, ascending)]
+
+
+class RankIndex:
+    """
+    Urutan baris satu kolom KPI (argsort sekali per versi dataset, NaN tidak ikut).
+    Top-N dengan filter = jalan dari ujung urutan sambil cek bitmap filter,
+    berhenti setelah N baris cocok: tanpa sort ulang, biaya ~ N / proporsi baris lolos filter.
+    """
+
+    def __init__(self, values):
+        v = np.asarray(values, dtype=np.float64)
+        pos = np.flatnonzero(~np.isnan(v))
+        dtype = np.int32 if len(v) < 2**31 else np.int64
+        self._order = pos[np.argsort(v[pos], kind="stable")].astype(dtype)
+        self._v = v
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def top(self, n: int, ascending: bool = False, mask: np.ndarray = None) -> np.ndarray:
+        """Posisi baris n teratas (ascending=False) / terbawah; mask = bitmap baris yang boleh ikut."""
+        seq = self._order if ascending else self._order[::-1]
+        if mask is None:
+            picked = seq[:n]
+        else:
+            parts, found, start, step = [], 0, 0, max(4 * n, 1024)
+            while found < n and start < len(seq):
+                block = seq[start:start + step]
+                hit = block[mask[block]]
+                parts.append(hit)
+                found += len(hit)
+                start += step
+                step *= 2
+            picked = np.concatenate(parts)[:n] if parts else seq[:0]
+        return _order_rows(picked.astype(np.int64), self._v, ascending)
@@ -0,0 +1,312 @@
+# app/ingest.py
+"""
+Pembaca file upload (tanpa Streamlit).
+
+Excel dibaca pakai openpyxl mode read-only: baris di-stream per chunk dan
+hanya kolom wajib + opsional yang diambil, jadi memori sebanding dengan
+kolom yang diproyeksikan, bukan dengan isi workbook.
+"""
+import io
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from operator import itemgetter
+
+import numpy as np
+import pandas as pd
+
+from app.core import REQUIRED_COLS, OPTIONAL_COLS, NUMERIC_COLS
+
+CHUNK_ROWS = 10_000
+
+DEFAULT_COLUMNS = REQUIRED_COLS + OPTIONAL_COLS
+
+
+def _to_float_array(values: list) -> np.ndarray:
+    """List nilai sel -> float64 (non-angka jadi NaN, sama seperti to_num)."""
+    arr = np.array(values, dtype=object)
+    try:
+        return arr.astype(np.float64)
+    except (TypeError, ValueError):
+        return pd.to_numeric(pd.Series(arr), errors="coerce").to_numpy(dtype=np.float64)
+
+
+def _open_sheet(file_bytes, sheet_name=None):
+    """file_bytes: isi file (bytes) atau path file di disk."""
+    from openpyxl import load_workbook
+
+    src = io.BytesIO(file_bytes) if isinstance(file_bytes, (bytes, bytearray)) else file_bytes
+    wb = load_workbook(src, read_only=True, data_only=True)
+    ws = wb.worksheets[0] if sheet_name is None else wb[sheet_name]
+    return wb, ws
+
+
+def iter_xlsx_chunks(file_bytes, columns=None, chunk_size: int = CHUNK_ROWS, sheet_name=None):
+    """
+    Stream sheet Excel per chunk.
+    Yield dict {kolom: np.ndarray}; kolom angka sudah float64, kolom teks object.
+    Baris pertama dianggap header. Kolom yang tidak ada di file dilewati.
+    """
+    columns = DEFAULT_COLUMNS if columns is None else list(columns)
+    wb, ws = _open_sheet(file_bytes, sheet_name)
+    try:
+        header = next(ws.iter_rows(min_row=1, max_row=1, values_only=True), None)
+        if header is None:
+            return
+
+        pos = {}
+        for i, h in enumerate(header):
+            name = str(h).strip() if h is not None else ""
+            if name in columns and name not in pos:
+                pos[name] = i
+        cols = [c for c in columns if c in pos]
+        if not cols:
+            return
+
+        # baca hanya rentang kolom yang dipakai; openpyxl mengisi sel kosong dengan None
+        lo = min(pos[c] for c in cols)
+        hi = max(pos[c] for c in cols)
+        pick = itemgetter(*[pos[c] - lo for c in cols])
+        single = len(cols) == 1
+
+        buf = []
+        for row in ws.iter_rows(min_row=2, min_col=lo + 1, max_col=hi + 1, values_only=True):
+            vals = (pick(row),) if single else pick(row)
+            if vals.count(None) == len(vals):
+                continue
+            buf.append(vals)
+            if len(buf) >= chunk_size:
+                yield _typed_chunk(cols, buf)
+                buf = []
+        if buf:
+            yield _typed_chunk(cols, buf)
+    finally:
+        wb.close()
+
+
+def _typed_chunk(cols: list, rows: list) -> dict:
+    out = {}
+    for c, vals in zip(cols, zip(*rows)):
+        if c in NUMERIC_COLS:
+            out[c] = _to_float_array([np.nan if v is None else v for v in vals])
+        else:
+            out[c] = np.array(vals, dtype=object)
+    return out
+
+
+def read_xlsx_projected(file_bytes: bytes, columns=None, chunk_size: int = CHUNK_ROWS, sheet_name=None) -> pd.DataFrame:
+    """Baca Excel (kolom terproyeksi) -> DataFrame dengan kolom NumPy bertipe."""
+    parts = {}
+    for chunk in iter_xlsx_chunks(file_bytes, columns=columns, chunk_size=chunk_size, sheet_name=sheet_name):
+        for c, arr in chunk.items():
+            parts.setdefault(c, []).append(arr)
+
+    data = {c: (arrs[0] if len(arrs) == 1 else np.concatenate(arrs)) for c, arrs in parts.items()}
+    return pd.DataFrame(data)
+
+
+# =========================
+# CSV / TSV / PARQUET
+# =========================
+SUPPORTED_TYPES = ["xlsx", "csv", "tsv", "parquet"]
+
+
+def _sniff_sep(file_bytes: bytes) -> str:
+    """Tebak pemisah CSV dari baris header (',' / ';' / tab)."""
+    head = file_bytes[:4096].split(b"\n", 1)[0]
+    counts = {sep: head.count(sep.encode()) for sep in [",", ";", "\t"]}
+    return max(counts, key=counts.get)
+
+
+def _coerce_projected(df: pd.DataFrame) -> pd.DataFrame:
+    for c in df.columns:
+        if c in NUMERIC_COLS and df[c].dtype != np.float64:
+            df[c] = pd.to_numeric(df[c], errors="coerce").astype(np.float64)
+    return df
+
+
+def read_csv_projected(file_bytes: bytes, sep=None, columns=None) -> pd.DataFrame:
+    """Baca CSV/TSV pakai parser C pandas, hanya kolom yang dipakai + dtype eksplisit."""
+    columns = DEFAULT_COLUMNS if columns is None else list(columns)
+    sep = _sniff_sep(file_bytes) if sep is None else sep
+    opts = dict(sep=sep, encoding="utf-8-sig")
+
+    header = pd.read_csv(io.BytesIO(file_bytes), nrows=0, **opts).columns
+    raw = {}
+    for h in header:
+        name = str(h).strip()
+        if name in columns and name not in raw.values():
+            raw[h] = name
+    if not raw:
+        return pd.DataFrame()
+
+    dtype = {h: (np.float64 if name in NUMERIC_COLS else object) for h, name in raw.items()}
+    try:
+        df = pd.read_csv(io.BytesIO(file_bytes), usecols=list(raw), dtype=dtype, **opts)
+    except ValueError:
+        # ada sel non-angka di kolom angka -> baca sebagai teks lalu coerce (NaN)
+        dtype = {h: object for h in raw}
+        df = pd.read_csv(io.BytesIO(file_bytes), usecols=list(raw), dtype=dtype, **opts)
+
+    df = df.rename(columns=raw)
+    return _coerce_projected(df[[c for c in columns if c in df.columns]])
+
+
+def read_parquet_projected(file_bytes: bytes, columns=None) -> pd.DataFrame:
+    """Baca Parquet (pyarrow), hanya kolom yang dipakai."""
+    try:
+        import pyarrow.parquet as pq
+    except Exception as e:
+        raise RuntimeError("pyarrow belum terinstall. Install: pip install pyarrow") from e
+
+    columns = DEFAULT_COLUMNS if columns is None else list(columns)
+    pf = pq.ParquetFile(io.BytesIO(file_bytes))
+    cols = [c for c in columns if c in pf.schema_arrow.names]
+    if not cols:
+        return pd.DataFrame()
+
+    df = pf.read(columns=cols).to_pandas()
+    for c in cols:
+        if c not in NUMERIC_COLS and df[c].dtype != object:
+            df[c] = df[c].astype(object)
+    return _coerce_projected(df)
+
+
+def read_upload_bytes(file_bytes: bytes, filename: str) -> pd.DataFrame:
+    """Pilih parser sesuai ekstensi file. Semua menghasilkan kontrak df_upload yang sama."""
+    ext = filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
+    if ext == "csv":
+        return read_csv_projected(file_bytes)
+    if ext == "tsv":
+        return read_csv_projected(file_bytes, sep="\t")
+    if ext == "parquet":
+        return read_parquet_projected(file_bytes)
+    return read_xlsx_projected(file_bytes)
+
+
+# =========================
+# BATCH: MULTI FILE + MULTI SHEET
+# =========================
+SOURCE_COLS = ["Sumber File", "Sheet"]
+
+# df.attrs[SKIPPED_ATTR]: sheet / file yang dilewati karena kolom wajib tidak lengkap
+SKIPPED_ATTR = "skipped_sources"
+
+# di bawah ukuran ini biaya start worker lebih mahal dari parsing-nya sendiri
+PARALLEL_MIN_BYTES = 4 * 1024 * 1024
+
+
+def xlsx_sheet_names(file_bytes: bytes) -> list:
+    from openpyxl import load_workbook
+
+    wb = load_workbook(io.BytesIO(file_bytes), read_only=True)
+    try:
+        return list(wb.sheetnames)
+    finally:
+        wb.close()
+
+
+def _source_label(name: str, sheet) -> str:
+    return name if sheet is None else f"{name} [{sheet}]"
+
+
+def _parse_task(task) -> pd.DataFrame:
+    """
+    Dijalankan di worker process: parse satu sheet / satu file lalu beri tag sumber.
+    Sheet / file tanpa semua kolom wajib (mis. sheet lookup atau catatan) -> frame kosong.
+    """
+    name, file_bytes, sheet = task
+    if sheet is None:
+        df = read_upload_bytes(file_bytes, name)
+    else:
+        df = read_xlsx_projected(file_bytes, sheet_name=sheet)
+    if not all(c in df.columns for c in REQUIRED_COLS):
+        return pd.DataFrame()
+    df["Sumber File"] = name
+    df["Sheet"] = sheet if sheet is not None else ""
+    return df
+
+
+def read_upload_batch(files, max_workers=None) -> pd.DataFrame:
+    """
+    Parse banyak file sekaligus (list of (nama_file, bytes)).
+    Tiap sheet xlsx jadi satu task di process pool, hasil digabung sekali di akhir.
+    Sheet / file yang kolom wajibnya tidak lengkap tidak ikut digabung; labelnya
+    ("file" atau "file [sheet]") ada di df.attrs[SKIPPED_ATTR].
+    """
+    tasks = []
+    for name, file_bytes in files:
+        if name.lower().endswith(".xlsx"):
+            tasks += [(name, file_bytes, sh) for sh in xlsx_sheet_names(file_bytes)]
+        else:
+            tasks.append((name, file_bytes, None))
+
+    workers = min(len(tasks), max_workers or os.cpu_count() or 1)
+    if sum(len(b) for _, b in files) < PARALLEL_MIN_BYTES:
+        workers = 1
+
+    if workers <= 1:
+        frames = [_parse_task(t) for t in tasks]
+    else:
+        # spawn: aman dipanggil dari thread script Streamlit (tanpa fork state thread lain)
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as ex:
+            frames = list(ex.map(_parse_task, tasks))
+
+    skipped = [_source_label(name, sheet) for (name, _, sheet), f in zip(tasks, frames) if not len(f.columns)]
+    frames = [f for f in frames if len(f.columns)]
+    df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    df.attrs[SKIPPED_ATTR] = skipped
+    return df
+
+
+# =========================
+# STREAM FILE DI DISK (mode out-of-core)
+# =========================
+def iter_file_chunks(path, chunk_size: int = CHUNK_ROWS, columns=None):
+    """
+    Stream file di disk per chunk -> DataFrame (kontrak kolom sama dengan df_upload).
+    Tidak pernah memuat seluruh file ke memori; dipakai app/outofcore.py.
+    """
+    path = str(path)
+    columns = DEFAULT_COLUMNS if columns is None else list(columns)
+    ext = path.rsplit(".", 1)[-1].lower() if "." in path else ""
+
+    if ext in ("csv", "tsv"):
+        with open(path, "rb") as f:
+            sep = "\t" if ext == "tsv" else _sniff_sep(f.read(4096))
+        opts = dict(sep=sep, encoding="utf-8-sig")
+        header = pd.read_csv(path, nrows=0, **opts).columns
+        raw = {}
+        for h in header:
+            name = str(h).strip()
+            if name in columns and name not in raw.values():
+                raw[h] = name
+        if not raw:
+            return
+        # semua teks dulu: sel non-angka bisa muncul di chunk mana saja, coerce per chunk
+        reader = pd.read_csv(path, usecols=list(raw), dtype={h: object for h in raw}, chunksize=chunk_size, **opts)
+        for df in reader:
+            df = df.rename(columns=raw)
+            yield _coerce_projected(df[[c for c in columns if c in df.columns]])
+
+    elif ext == "parquet":
+        try:
+            import pyarrow.parquet as pq
+        except Exception as e:
+            raise RuntimeError("pyarrow belum terinstall. Install: pip install pyarrow") from e
+
+        pf = pq.ParquetFile(path)
+        cols = [c for c in columns if c in pf.schema_arrow.names]
+        if not cols:
+            return
+        for batch in pf.iter_batches(batch_size=chunk_size, columns=cols):
+            df = batch.to_pandas()
+            for c in cols:
+                if c not in NUMERIC_COLS and df[c].dtype != object:
+                    df[c] = df[c].astype(object)
+            yield _coerce_projected(df)
+
+    else:
+        for chunk in iter_xlsx_chunks(path, columns=columns, chunk_size=chunk_size):
+            yield pd.DataFrame(chunk)
@@ -0,0 +1,333 @@
+# app/outofcore.py
+"""
+Mode out-of-core: pipeline dua lintasan untuk dataset yang lebih besar dari RAM
+(skala kabupaten / provinsi).
+
+Lintasan 1: KPI per chunk -> sketch kuantil (app/sketch.py) + statistik dasar;
+nilai KPI non-NaN di-spill ke file float64 di disk. Kuantil exact = braket dari
+sketch + satu scan memmap untuk kandidat di dalam braket, jadi memori sebanding
+dengan ukuran braket, bukan jumlah baris.
+Lintasan 2: KPI, skor, kategori, kode rekomendasi per chunk pakai ambang global
+-> ditulis ke Parquet (satu row group per chunk). Dashboard membaca agregat dari
+file itu (sector_summary), bukan DataFrame penuh.
+
+Skor_KPI & Kategori_Skor identik dengan mode in-memory (run_pipeline), termasuk
+kasus kuantil 5% == 95% (percentile rank dihitung global, bukan per chunk).
+
+Jalankan dari root project:
+    python -m app.outofcore data_besar.csv -o hasil.parquet
+"""
+import argparse
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from app.core import DEFAULT_WEIGHTS, KATEGORI_ORDER, KPI_DECIMALS
+from app.ingest import CHUNK_ROWS, iter_file_chunks
+from app.pipeline import normalize_weights, score_chunk
+from app.sketch import DEFAULT_K, SKETCH_COLS, QuantileSketch, kpi_sketches, thresholds_from_sketches
+
+# blok baca memmap saat scan kandidat kuantil
+SCAN_ROWS = 1_000_000
+
+
+# =========================
+# KUANTIL EXACT DARI SPILL + SKETCH
+# =========================
+def _linear_quantile(m: int, q: float, stat) -> float:
+    """
+    Kuantil 'linear' (sama persis dengan np.quantile) dari n=m data terurut;
+    stat(r) = order statistic ke-r (0-based).
+    """
+    vi = np.float64(m - 1) * np.float64(q)
+    prev = int(np.floor(vi))
+    if prev >= m - 1:
+        return float(stat(m - 1))
+    if prev < 0:
+        return float(stat(0))
+    gamma = vi - np.float64(prev)
+    a, b = np.float64(stat(prev)), np.float64(stat(prev + 1))
+    diff = b - a
+    # urutan operasi mengikuti numpy (_lerp) supaya hasil bit-identik
+    if gamma >= 0.5:
+        return float(b - diff * (1 - gamma))
+    return float(a + diff * gamma)
+
+
+def _order_stats(values: np.ndarray, ranks, sketch: QuantileSketch = None) -> dict:
+    """
+    Order statistic exact untuk beberapa rank sekaligus.
+    Data kecil / sketch masih exact -> sort biasa. Data besar -> braket nilai dari
+    sketch, hitung jumlah nilai di bawah braket + kumpulkan kandidat di dalamnya,
+    sort kandidat saja. Braket diperlebar kalau ternyata meleset.
+    """
+    m = len(values)
+    ranks = sorted(set(int(r) for r in ranks))
+    if sketch is None or sketch.exact or m <= SCAN_ROWS:
+        v = np.sort(np.asarray(values))
+        return {r: v[r] for r in ranks}
+
+    out = {}
+    margin = 2 * sketch.eps
+    while len(out) < len(ranks):
+        todo = [r for r in ranks if r not in out]
+        q = np.array(todo, dtype=np.float64) / max(m - 1, 1)
+        lo = np.where(q - margin <= 0, -np.inf, sketch.quantiles(np.clip(q - margin, 0, 1)))
+        hi = np.where(q + margin >= 1, np.inf, sketch.quantiles(np.clip(q + margin, 0, 1)))
+
+        below = np.zeros(len(todo), dtype=np.int64)
+        cands = [[] for _ in todo]
+        for s in range(0, m, SCAN_ROWS):
+            v = np.asarray(values[s : s + SCAN_ROWS])
+            for j in range(len(todo)):
+                below[j] += np.count_nonzero(v < lo[j])
+                cands[j].append(v[(v >= lo[j]) & (v <= hi[j])])
+
+        for j, r in enumerate(todo):
+            c = np.sort(np.concatenate(cands[j]))
+            k = r - below[j]
+            if 0 <= k < len(c):
+                out[r] = c[k]
+        margin *= 4
+    return out
+
+
+def exact_quantiles(values: np.ndarray, qs, sketch: QuantileSketch = None, decimals: int = None) -> np.ndarray:
+    """
+    Kuantil exact (metode linear numpy) dari array besar / memmap tanpa sort penuh.
+    decimals -> kuantil dari nilai yang dibulatkan: pembulatan monoton, jadi order
+    statistic nilai bulat = order statistic nilai asli yang dibulatkan.
+    """
+    m = len(values)
+    qs = np.atleast_1d(np.asarray(qs, dtype=np.float64))
+    if m == 0:
+        return np.full(len(qs), np.nan)
+
+    ranks = []
+    for q in qs:
+        prev = int(np.floor(np.float64(m - 1) * q))
+        ranks += [min(max(prev, 0), m - 1), min(max(prev + 1, 0), m - 1)]
+    stats = _order_stats(values, ranks, sketch)
+    if decimals is not None:
+        stats = {r: np.round(v, decimals) for r, v in stats.items()}
+    return np.array([_linear_quantile(m, q, stats.__getitem__) for q in qs])
+
+
+class _RankTable:
+    """
+    Percentile rank global (pandas rank(pct=True), method average) untuk kolom
+    yang kuantil 5%-nya == 95%: >= 90% data bernilai sama, sisanya muat di memori.
+    Nilai spill dibulatkan KPI_DECIMALS dulu (sama dengan kolom KPI yang diskor).
+    """
+
+    def __init__(self, values: np.ndarray, mode_value: float):
+        self.m = len(values)
+        self.mode_value = mode_value
+        parts, n_mode = [], 0
+        for s in range(0, self.m, SCAN_ROWS):
+            v = np.round(np.asarray(values[s : s + SCAN_ROWS]), KPI_DECIMALS)
+            eq = v == mode_value
+            n_mode += int(np.count_nonzero(eq))
+            parts.append(v[~eq])
+        self.others = np.sort(np.concatenate(parts)) if parts else np.empty(0)
+        self.n_mode = n_mode
+
+    def pct_score(self, x: np.ndarray) -> np.ndarray:
+        left = np.searchsorted(self.others, x, side="left")
+        right = np.searchsorted(self.others, x, side="right")
+        below = left + np.where(x > self.mode_value, self.n_mode, 0)
+        eq = (right - left) + np.where(x == self.mode_value, self.n_mode, 0)
+        rank = below + (eq + 1) / 2.0
+        return np.where(np.isnan(x), np.nan, rank / self.m) * 100
+
+
+# =========================
+# LINTASAN 1: SKETCH + SPILL
+# =========================
+def scan_pass(chunks, work_dir: str, k: int = DEFAULT_K, seed=None) -> dict:
+    """
+    Lintasan 1 (sketch.kpi_sketches + spill). Return {"rows", "valid_rows", "sketches",
+    "spill": {KPI: path}}. Nilai KPI non-NaN ditulis apa adanya (float64) ke work_dir.
+    """
+    spill = {c: os.path.join(work_dir, f"kpi_{i}.f64") for i, c in enumerate(SKETCH_COLS)}
+    files = {c: open(p, "wb") for c, p in spill.items()}
+    counts = {"rows": 0, "valid_rows": 0}
+
+    def write_spill(chunk, kpis):
+        counts["rows"] += len(chunk)
+        counts["valid_rows"] += int(np.count_nonzero(kpis["Valid_Data"]))
+        for c in SKETCH_COLS:
+            files[c].write(kpis[c][~np.isnan(kpis[c])].tobytes())
+
+    try:
+        sketches = kpi_sketches(chunks, k=k, seed=seed, on_chunk=write_spill)
+    finally:
+        for f in files.values():
+            f.close()
+    return {**counts, "sketches": sketches, "spill": spill}
+
+
+def _open_spill(path: str) -> np.ndarray:
+    if os.path.getsize(path) == 0:
+        return np.empty(0, dtype=np.float64)
+    return np.memmap(path, dtype=np.float64, mode="r")
+
+
+def global_thresholds(scan: dict) -> dict:
+    """
+    Ambang global exact dari hasil scan_pass: sketch.thresholds_from_sketches dengan
+    kuantil exact dari spill (sketch hanya untuk braket), + "ranks" untuk kolom skor degenerate.
+    """
+    sketches, spill = scan["sketches"], scan["spill"]
+
+    def spill_quantiles(c, qs, decimals=None):
+        return exact_quantiles(_open_spill(spill[c]), qs, sketches[c], decimals)
+
+    thresholds = thresholds_from_sketches(sketches, quantiles=spill_quantiles)
+    ranks = {}
+    for c, (lo, hi) in thresholds["bounds"].items():
+        if sketches[c].n and lo == hi:
+            ranks[c] = _RankTable(_open_spill(spill[c]), lo)
+    return {**thresholds, "ranks": ranks}
+
+
+# =========================
+# LINTASAN 2: SKOR PER CHUNK -> PARQUET
+# =========================
+def _to_arrow(df: pd.DataFrame, schema=None):
+    import pyarrow as pa
+
+    df = df.copy(deep=False)
+    for c in df.columns:
+        if df[c].dtype.kind not in "biuf":
+            df[c] = df[c].astype("string")  # skema konsisten antar chunk (kategori/teks/None)
+    return pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+
+
+def run_out_of_core(
+    make_chunks,
+    out_path: str,
+    weights=DEFAULT_WEIGHTS,
+    k: int = DEFAULT_K,
+    work_dir: str = None,
+) -> dict:
+    """
+    Pipeline out-of-core lengkap.
+    make_chunks: callable tanpa argumen -> iterable DataFrame mentah (dipanggil 2x,
+    mis. lambda: iter_file_chunks(path)). Return info ringkas (jumlah baris, ambang).
+    """
+    try:
+        import pyarrow.parquet as pq
+    except Exception as e:
+        raise RuntimeError("pyarrow belum terinstall. Install: pip install pyarrow") from e
+
+    with tempfile.TemporaryDirectory(prefix="ukm_ooc_", dir=work_dir) as tmp:
+        scan = scan_pass(make_chunks(), tmp, k=k)
+        thresholds = global_thresholds(scan)
+
+        writer, rows = None, 0
+        try:
+            for chunk in make_chunks():
+                table = _to_arrow(score_chunk(chunk, thresholds, weights), None if writer is None else writer.schema)
+                if writer is None:
+                    writer = pq.ParquetWriter(out_path, table.schema)
+                writer.write_table(table)
+                rows += table.num_rows
+        finally:
+            if writer is not None:
+                writer.close()
+
+    return {
+        "path": out_path,
+        "rows": rows,
+        "valid_rows": scan["valid_rows"],
+        "bounds": thresholds["bounds"],
+        "outlier": thresholds["outlier"],
+    }
+
+
+# =========================
+# AGREGAT DARI FILE HASIL
+# =========================
+SUMMARY_COLS = ["Skor_KPI", "ROI (%)", "Profit Margin (%)", "Growth Rate (%)", "Cost Ratio"]
+
+# kolom minimal file hasil supaya bisa dibaca halaman Dashboard (mode out-of-core)
+RESULT_COLS = ["Bidang Usaha", "Skor_KPI", "Kategori_Skor"]
+
+
+def missing_result_cols(path: str) -> list:
+    """Kolom RESULT_COLS yang tidak ada di file Parquet hasil (dibaca dari skema saja)."""
+    import pyarrow.parquet as pq
+
+    names = pq.ParquetFile(path).schema_arrow.names
+    return [c for c in RESULT_COLS if c not in names]
+
+
+def sector_summary(path: str, by: str = "Bidang Usaha") -> pd.DataFrame:
+    """
+    Agregat per sektor dibaca per row group (hanya kolom yang dipakai):
+    Jumlah UKM, rata-rata KPI/skor, jumlah per Kategori_Skor.
+    by=None -> satu baris total ("Semua").
+    """
+    import pyarrow.parquet as pq
+
+    pf = pq.ParquetFile(path)
+    names = pf.schema_arrow.names
+    kpis = [c for c in SUMMARY_COLS if c in names]
+    key = by or "Kelompok"
+    # by=None tetap butuh satu kolom untuk dibaca (jumlah baris per batch)
+    cols = [by or names[0]] + kpis + (["Kategori_Skor"] if "Kategori_Skor" in names else [])
+    cols = list(dict.fromkeys(cols))
+
+    parts = []
+    for batch in pf.iter_batches(columns=cols):
+        df = batch.to_pandas()
+        if by is None:
+            df[key] = "Semua"
+        g = df.groupby(key, observed=True, dropna=False)
+        part = g[kpis].sum(min_count=1).add_suffix("|sum").join(g[kpis].count().add_suffix("|n"))
+        part["Jumlah UKM"] = g.size()
+        if "Kategori_Skor" in df.columns:
+            part = part.join(pd.crosstab(df[key], df["Kategori_Skor"]))
+        parts.append(part)
+    if not parts:
+        return pd.DataFrame(columns=[key, "Jumlah UKM"] + kpis)
+
+    total = pd.concat(parts).groupby(level=0, dropna=False).sum(min_count=1)
+    out = pd.DataFrame(index=total.index)
+    out["Jumlah UKM"] = total["Jumlah UKM"].astype(np.int64)
+    for c in kpis:
+        out[c] = total[f"{c}|sum"] / total[f"{c}|n"].replace(0, np.nan)
+    for cat in KATEGORI_ORDER:
+        out[cat] = total[cat].fillna(0).astype(np.int64) if cat in total.columns else 0
+    out.index.name = key
+    return out.reset_index()
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("input", help="file .xlsx / .csv / .tsv / .parquet")
+    ap.add_argument("-o", "--output", required=True, help="file Parquet hasil")
+    ap.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS * 10)
+    ap.add_argument("--bobot", default=",".join(str(w) for w in DEFAULT_WEIGHTS), help="bobot ROI,PM,Growth")
+    ap.add_argument("--k", type=int, default=DEFAULT_K, help="ukuran sketch kuantil")
+    ap.add_argument("--work-dir", default=None, help="folder file sementara (spill KPI)")
+    args = ap.parse_args()
+
+    weights = normalize_weights([float(x) for x in args.bobot.split(",")])
+    info = run_out_of_core(
+        lambda: iter_file_chunks(args.input, chunk_size=args.chunk_rows),
+        args.output,
+        weights=weights,
+        k=args.k,
+        work_dir=args.work_dir,
+    )
+    print(f"{info['rows']:,} baris ({info['valid_rows']:,} valid) -> {info['path']}")
+    with pd.option_context("display.width", 160, "display.max_columns", 20):
+        print(sector_summary(args.output).round(2).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+# app/parallel.py
+"""
+Mode paralel untuk bagian pipeline yang tidak bergantung bobot (prepare_base):
+frame dipecah jadi partisi baris, kerja per baris dijalankan di process pool.
+
+Buffer kolom ada di multiprocessing.shared_memory: worker menulis hasil
+langsung ke buffer bersama (tanpa pickle array antar proses).
+Fase 1 (worker): kernel KPI per partisi.
+Reduksi (proses utama): ambang & flag outlier dari KPI penuh, pembulatan KPI,
+lalu kuantil global skor; urutan & fungsi sama dengan mode serial -> hasil identik.
+Fase 2 (worker): skor per KPI dan kode rekomendasi per partisi.
+"""
+import atexit
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from app.core import (
+    KPI_COLS,
+    NUMERIC_COLS,
+    OUTLIER_COLS,
+    OUTLIER_Q,
+    SCORE_COLS,
+    compact_frame,
+    kpi_kernel,
+    minmax_score_array,
+    outlier_flags,
+    round_kpis,
+    recommendation_codes,
+    to_num,
+)
+
+# di bawah ini biaya kirim task + start worker lebih mahal dari hitungannya
+PARALLEL_MIN_ROWS = 500_000
+
+# jumlah worker default (env UKM_PIPELINE_WORKERS; 1 = selalu serial)
+DEFAULT_WORKERS = int(os.environ.get("UKM_PIPELINE_WORKERS", os.cpu_count() or 1))
+
+_FLOAT_OUT = KPI_COLS + list(SCORE_COLS.values())
+_BUFFERS = (
+    [(c, np.float64) for c in NUMERIC_COLS + _FLOAT_OUT]
+    + [("Valid_Data", np.bool_), ("Perlu_Verifikasi", np.bool_), ("Rekomendasi_Kode", np.uint8)]
+)
+
+_EXECUTOR = None
+_EXECUTOR_WORKERS = 0
+
+
+def _executor(workers: int) -> ProcessPoolExecutor:
+    """
+    Pool dipakai ulang antar upload: start worker (spawn + import pandas)
+    cukup sekali per proses server, bukan per pipeline.
+    """
+    global _EXECUTOR, _EXECUTOR_WORKERS
+    if _EXECUTOR is None or _EXECUTOR_WORKERS != workers:
+        shutdown_pool()
+        # spawn: aman dipanggil dari thread script Streamlit (tanpa fork state thread lain)
+        ctx = multiprocessing.get_context("spawn")
+        _EXECUTOR = ProcessPoolExecutor(max_workers=workers, mp_context=ctx)
+        _EXECUTOR_WORKERS = workers
+    return _EXECUTOR
+
+
+@atexit.register
+def shutdown_pool() -> None:
+    global _EXECUTOR
+    if _EXECUTOR is not None:
+        _EXECUTOR.shutdown(cancel_futures=True)
+        _EXECUTOR = None
+
+
+# =========================
+# SHARED MEMORY
+# =========================
+def _attach(specs: dict):
+    """specs {kolom: (nama shm, dtype, n)} -> ({kolom: ndarray}, [handle shm])."""
+    arrays, handles = {}, []
+    for col, (name, dtype, n) in specs.items():
+        shm = shared_memory.SharedMemory(name=name)
+        handles.append(shm)
+        arrays[col] = np.ndarray((n,), dtype=dtype, buffer=shm.buf)
+    return arrays, handles
+
+
+def _detach(arrays: dict, handles: list) -> None:
+    arrays.clear()  # lepas view dulu, baru close buffer
+    for shm in handles:
+        shm.close()
+
+
+def _kpi_task(args) -> None:
+    """Fase 1 (di worker): kernel KPI untuk baris [start, stop)."""
+    specs, start, stop = args
+    arrays, handles = _attach(specs)
+    try:
+        part = {c: arrays[c][start:stop] for c in KPI_COLS + ["Valid_Data"]}
+        kpi_kernel(*(arrays[c][start:stop] for c in NUMERIC_COLS), out=part)
+        part.clear()
+    finally:
+        _detach(arrays, handles)
+
+
+def _score_task(args) -> None:
+    """Fase 2 (di worker): skor per KPI dan kode rekomendasi untuk [start, stop)."""
+    specs, start, stop, bounds = args
+    arrays, handles = _attach(specs)
+    try:
+        part = {c: arrays[c][start:stop] for c in KPI_COLS + ["Valid_Data"]}
+        invalid = ~part["Valid_Data"]
+        for kpi, col in SCORE_COLS.items():
+            if bounds.get(kpi) is None:
+                continue  # sudah diisi proses utama (fallback rank / semua NaN)
+            sc = minmax_score_array(part[kpi], *bounds[kpi])
+            sc[invalid] = np.nan
+            arrays[col][start:stop] = sc
+        arrays["Rekomendasi_Kode"][start:stop] = recommendation_codes(part)
+        part.clear()
+    finally:
+        _detach(arrays, handles)
+
+
+# =========================
+# REDUKSI GLOBAL (proses utama)
+# =========================
+def _global_reduce(arrays: dict) -> dict:
+    """
+    Langkah global dengan urutan & rumus yang sama persis dengan mode serial:
+    outlier_flags (np.nanquantile, KPI penuh) -> round_kpis -> batas skor
+    clip_minmax_score (Series.quantile, KPI bulat). Mengisi Perlu_Verifikasi.
+    Kolom skor tanpa batas valid (kosong / lo == hi) -> skor dihitung di sini.
+    Return batas skor per KPI (None = sudah diisi).
+    """
+    outlier = {}
+    for c in OUTLIER_COLS:
+        v = arrays[c]
+        outlier[c] = np.nan if np.isnan(v).all() else np.nanquantile(v, OUTLIER_Q)
+    arrays["Perlu_Verifikasi"][:] = outlier_flags(arrays, outlier)
+    round_kpis(arrays)
+
+    bounds = {}
+    invalid = ~arrays["Valid_Data"]
+    for kpi, col in SCORE_COLS.items():
+        s = pd.Series(arrays[kpi], copy=False)
+        lo, hi = (np.nan, np.nan) if s.dropna().empty else (s.quantile(0.05), s.quantile(0.95))
+        if pd.isna(lo) or pd.isna(hi) or hi == lo:
+            bounds[kpi] = None
+            sc = np.full(len(s), np.nan) if s.dropna().empty else (s.rank(pct=True) * 100).to_numpy()
+            sc[invalid] = np.nan
+            arrays[col][:] = sc
+        else:
+            bounds[kpi] = (lo, hi)
+    return bounds
+
+
+def _partitions(n: int, parts: int) -> list:
+    edges = np.linspace(0, n, parts + 1).astype(np.int64)
+    return [(int(a), int(b)) for a, b in zip(edges[:-1], edges[1:]) if b > a]
+
+
+def prepare_base_parallel(df_raw: pd.DataFrame, workers: int = None, partitions: int = None):
+    """
+    Sama dengan pipeline.prepare_base (hasil identik), tapi KPI/skor/rekomendasi
+    dihitung per partisi di process pool. Return (df base, laporan kompaksi memori).
+    """
+    workers = workers or DEFAULT_WORKERS
+    partitions = partitions or workers
+    n = len(df_raw)
+
+    blocks, specs, arrays = [], {}, {}
+    try:
+        for col, dtype in _BUFFERS:
+            shm = shared_memory.SharedMemory(create=True, size=max(1, n * np.dtype(dtype).itemsize))
+            blocks.append(shm)
+            specs[col] = (shm.name, np.dtype(dtype).str, n)
+        for (col, dtype), shm in zip(_BUFFERS, blocks):
+            arrays[col] = np.ndarray((n,), dtype=dtype, buffer=shm.buf)
+        for c in NUMERIC_COLS:
+            arrays[c][:] = to_num(df_raw[c]).to_numpy(dtype=np.float64)
+
+        ex = _executor(workers)
+        parts = _partitions(n, partitions)
+        list(ex.map(_kpi_task, [(specs, a, b) for a, b in parts]))
+        bounds = _global_reduce(arrays)
+        list(ex.map(_score_task, [(specs, a, b, bounds) for a, b in parts]))
+
+        # susun frame dengan urutan kolom yang sama dengan mode serial (salin keluar dari shm)
+        df = df_raw.copy(deep=False)
+        for c in NUMERIC_COLS + KPI_COLS + ["Valid_Data", "Perlu_Verifikasi"] + list(SCORE_COLS.values()) + ["Rekomendasi_Kode"]:
+            df[c] = arrays[c].copy()
+    finally:
+        arrays.clear()  # view harus dilepas sebelum buffer di-close
+        for shm in blocks:
+            shm.close()
+            shm.unlink()
+
+    return compact_frame(df)
@@ -0,0 +1,100 @@
+# app/parse_cache.py
+"""
+Cache hasil parsing upload di disk (format NumPy .npz, tanpa pickle).
+
+Key = hash MD5 isi file (upload_hash). File yang sama tidak perlu diparse
+ulang walau server restart / session baru. Ukuran total dibatasi dan file
+yang paling lama tidak dipakai dibuang duluan (LRU via mtime).
+"""
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from app.ingest import SKIPPED_ATTR
+
+# naikkan kalau format/proyeksi hasil parsing berubah, supaya cache lama diabaikan
+FORMAT_VERSION = 3
+
+CACHE_DIR = Path(
+    os.environ.get("UKM_CACHE_DIR", Path(__file__).resolve().parents[1] / ".cache" / "parse")
+)
+CACHE_MAX_BYTES = int(float(os.environ.get("UKM_CACHE_MAX_MB", "512")) * 1024 * 1024)
+
+
+def _path(key: str) -> Path:
+    return CACHE_DIR / f"{key}.v{FORMAT_VERSION}.npz"
+
+
+def load_frame(key: str):
+    """Ambil DataFrame dari cache disk, atau None kalau belum ada / rusak."""
+    p = _path(key)
+    if not p.exists():
+        return None
+    try:
+        with np.load(p, allow_pickle=False) as z:
+            names = z["__columns__"].tolist()
+            skipped = z["__skipped__"].tolist() if "__skipped__" in z.files else []
+            data = {}
+            for i, name in enumerate(names):
+                arr = z[f"c{i}"]
+                na_key = f"na{i}"
+                if na_key in z.files:
+                    arr = arr.astype(object)
+                    arr[z[na_key]] = None
+                data[name] = arr
+        os.utime(p)  # tandai baru dipakai (LRU)
+        df = pd.DataFrame(data, columns=names)
+        df.attrs[SKIPPED_ATTR] = skipped
+        return df
+    except Exception:
+        p.unlink(missing_ok=True)
+        return None
+
+
+def store_frame(key: str, df: pd.DataFrame, max_bytes: int = CACHE_MAX_BYTES) -> None:
+    """Simpan DataFrame ke cache disk lalu jalankan eviction. Gagal tulis = diabaikan."""
+    arrays = {
+        "__columns__": np.array([str(c) for c in df.columns], dtype=str),
+        "__skipped__": np.array(df.attrs.get(SKIPPED_ATTR, []), dtype=str),
+    }
+    for i, c in enumerate(df.columns):
+        s = df[c]
+        if s.dtype.kind in "biuf":
+            arrays[f"c{i}"] = s.to_numpy()
+        else:
+            na = s.isna().to_numpy()
+            arrays[f"c{i}"] = s.where(~na, "").astype(str).to_numpy(dtype=str)
+            if na.any():
+                arrays[f"na{i}"] = na
+
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        p = _path(key)
+        tmp = p.with_name(p.name + ".tmp")
+        with open(tmp, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(tmp, p)
+    except OSError:
+        return
+
+    evict(max_bytes)
+
+
+def evict(max_bytes: int = CACHE_MAX_BYTES) -> None:
+    """Hapus file cache paling lama dipakai sampai total ukuran <= max_bytes."""
+    try:
+        files = [(p, p.stat()) for p in CACHE_DIR.glob("*.npz")]
+    except OSError:
+        return
+
+    total = sum(st_.st_size for _, st_ in files)
+    for p, st_ in sorted(files, key=lambda x: x[1].st_mtime):
+        if total <= max_bytes:
+            break
+        try:
+            p.unlink()
+            total -= st_.st_size
+        except OSError:
+            pass
@@ -0,0 +1,87 @@
+# app/pipeline.py
+"""
+Pipeline data lengkap (tanpa Streamlit): KPI -> skor -> rekomendasi -> kompaksi.
+Dipakai halaman Upload (lewat cache di app/session.py).
+"""
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from app.core import (
+    DEFAULT_WEIGHTS,
+    SCORE_COLS,
+    add_recommendations,
+    apply_weights,
+    compact_frame,
+    compute_kpis,
+    normalized_scores,
+)
+from app.parallel import PARALLEL_MIN_ROWS, prepare_base_parallel
+
+
+def frame_fingerprint(df: pd.DataFrame) -> str:
+    """Hash isi DataFrame (untuk data tanpa upload_hash, mis. Manual Input)."""
+    h = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    return hashlib.md5(h.tobytes() + "|".join(map(str, df.columns)).encode()).hexdigest()
+
+
+def dataset_version(source_key: str, data_mode: str, weights=DEFAULT_WEIGHTS) -> str:
+    """ID versi dataset hasil pipeline: berubah kalau sumber, mode, atau bobot berubah."""
+    raw = f"{source_key}|{data_mode}|{tuple(float(w) for w in weights)}"
+    return hashlib.md5(raw.encode()).hexdigest()[:16]
+
+
+def source_version(source_key: str, data_mode: str) -> str:
+    """
+    ID versi baris data (sumber + mode, tanpa bobot): untuk struktur yang tidak membaca
+    Skor_KPI / Kategori_Skor (mis. index kategori), jadi ganti bobot tidak membangunnya ulang.
+    """
+    return hashlib.md5(f"{source_key}|{data_mode}".encode()).hexdigest()[:16]
+
+
+def prepare_base(df_raw: pd.DataFrame, workers: int = 1) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Bagian pipeline yang tidak bergantung bobot: KPI, skor normalisasi per KPI,
+    kode rekomendasi, kompaksi. Return (df base, laporan kompaksi memori).
+    workers > 1 dan data besar -> partisi paralel (app/parallel.py), hasil sama.
+    """
+    if workers > 1 and len(df_raw) >= PARALLEL_MIN_ROWS:
+        return prepare_base_parallel(df_raw, workers=workers)
+
+    df = compute_kpis(df_raw)
+    df = normalized_scores(df)
+    df = add_recommendations(df, with_text=False)  # teks dibuat nanti, hanya untuk baris yang tampil
+    return compact_frame(df)
+
+
+def normalize_weights(weights) -> tuple:
+    """Bobot dinormalisasi supaya jumlahnya 1 (semua 0 -> bobot default)."""
+    total = float(sum(weights))
+    if total <= 0:
+        return DEFAULT_WEIGHTS
+    return tuple(float(w) / total for w in weights)
+
+
+def score_chunk(df_raw: pd.DataFrame, thresholds: dict, weights=DEFAULT_WEIGHTS) -> pd.DataFrame:
+    """
+    Pipeline untuk satu chunk memakai ambang global (lihat app/sketch.py:
+    thresholds_from_sketches), jadi skor & outlier konsisten antar chunk.
+    thresholds["ranks"] (opsional, app/outofcore.py): {KPI: tabel rank global} untuk
+    kolom yang kuantil 5% == 95%, skornya percentile rank global (bukan per chunk).
+    """
+    df = compute_kpis(df_raw, outlier_thresholds=thresholds["outlier"])
+    df = normalized_scores(df, bounds=thresholds["bounds"])
+    invalid = ~df["Valid_Data"].to_numpy(dtype=bool)
+    for kpi, table in thresholds.get("ranks", {}).items():
+        sc = table.pct_score(df[kpi].to_numpy(dtype=np.float64))
+        sc[invalid] = np.nan
+        df[SCORE_COLS[kpi]] = sc
+    df = apply_weights(df, *weights)
+    return add_recommendations(df, with_text=False)
+
+
+def run_pipeline(df_raw: pd.DataFrame, weights=DEFAULT_WEIGHTS) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Return (df hasil, laporan kompaksi memori)."""
+    base, mem_report = prepare_base(df_raw)
+    return apply_weights(base, *weights), mem_report
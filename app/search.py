@@ -0,0 +1,165 @@
+# app/search.py
+"""
+Index trigram untuk pencarian Nama Usaha (tanpa Streamlit).
+
+Nama dinormalisasi (NFKC, casefold, spasi dirapikan) lalu dipecah jadi
+trigram; tiap trigram menyimpan daftar id nama unik (posting list, CSR).
+Query substring / awalan = irisan posting list trigram query, lalu dicek
+ulang hanya pada kandidat; biaya ~ jumlah kandidat, bukan jumlah baris.
+Mode toleran typo: nama diranking dari jumlah trigram yang sama.
+"""
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+SEARCH_MODES = {"substring": "Mengandung", "prefix": "Awalan", "fuzzy": "Toleran typo"}
+
+# penanda awal/akhir nama: tiap karakter nama jadi awal satu trigram,
+# jadi query 1–2 huruf bisa dijawab dari rentang key trigram
+_START, _END = "\x02", "\x03\x03"
+
+# mode fuzzy: minimal proporsi trigram query yang harus ada di nama
+FUZZY_MIN_SIMILARITY = 0.5
+FUZZY_MAX_RESULTS = 5_000
+
+
+def normalize_name(s: str) -> str:
+    return " ".join(unicodedata.normalize("NFKC", str(s)).casefold().split())
+
+
+def _normalize_series(s: pd.Series) -> pd.Series:
+    return s.astype(str).str.normalize("NFKC").str.casefold().str.split().str.join(" ")
+
+
+def _codepoints(text: str) -> np.ndarray:
+    return np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+
+
+def _tri_keys(cp: np.ndarray) -> np.ndarray:
+    """Key uint64 per trigram: 3 codepoint x 21 bit."""
+    return (cp[:-2] << np.uint64(42)) | (cp[1:-1] << np.uint64(21)) | cp[2:]
+
+
+class NameIndex:
+    """Posting list trigram -> id nama unik, plus id nama unik -> posisi baris."""
+
+    def __init__(self, names: pd.Series):
+        codes, uniques = pd.factorize(names, use_na_sentinel=True)
+        self.n_rows = len(codes)
+        self.names = _normalize_series(pd.Series(uniques, dtype=object)).to_numpy(dtype=object)
+
+        # id nama unik -> posisi baris (urut per id, tiap kelompok urut baris)
+        valid = codes >= 0
+        self._codes = codes
+        self._row_order = np.flatnonzero(valid)[np.argsort(codes[valid], kind="stable")]
+        self._row_offsets = np.concatenate([[0], np.cumsum(np.bincount(codes[valid], minlength=len(uniques)))])
+
+        # semua trigram semua nama sekaligus (satu array codepoint)
+        texts = [_START + t + _END for t in self.names]
+        lens = np.fromiter((len(t) for t in texts), dtype=np.int64, count=len(texts))
+        self._name_len = lens - len(_START) - len(_END)
+        cp = _codepoints("".join(texts))
+        n_tri = lens - 2
+        owner = np.repeat(np.arange(len(texts), dtype=np.uint32), n_tri)
+        text_start = np.concatenate([[0], np.cumsum(lens)[:-1]])
+        tri_start = np.concatenate([[0], np.cumsum(n_tri)[:-1]])
+        pos = np.arange(int(n_tri.sum())) + np.repeat(text_start - tri_start, n_tri)
+        keys = (cp[pos] << np.uint64(42)) | (cp[pos + 1] << np.uint64(21)) | cp[pos + 2]
+
+        # urut per key (stable: owner tetap naik), buang pasangan (key, owner) ganda
+        order = np.argsort(keys, kind="stable")
+        keys, owner = keys[order], owner[order]
+        keep = np.ones(len(keys), dtype=bool)
+        keep[1:] = (keys[1:] != keys[:-1]) | (owner[1:] != owner[:-1])
+        keys, owner = keys[keep], owner[keep]
+
+        first = np.ones(len(keys), dtype=bool)
+        first[1:] = keys[1:] != keys[:-1]
+        self._keys = keys[first]
+        self._offsets = np.concatenate([np.flatnonzero(first), [len(keys)]])
+        self._postings = owner
+
+    # ---------- posting list ----------
+    def _posting(self, key) -> np.ndarray:
+        i = np.searchsorted(self._keys, key)
+        if i < len(self._keys) and self._keys[i] == key:
+            return self._postings[self._offsets[i]:self._offsets[i + 1]]
+        return self._postings[:0]
+
+    def _key_range(self, lo, hi) -> np.ndarray:
+        """Id nama dengan trigram key di [lo, hi) (query 1–2 karakter)."""
+        a, b = np.searchsorted(self._keys, [lo, hi])
+        return np.unique(self._postings[self._offsets[a]:self._offsets[b]])
+
+    def _candidates(self, text: str) -> np.ndarray:
+        cp = _codepoints(text)
+        if len(cp) >= 3:
+            lists = sorted((self._posting(k) for k in np.unique(_tri_keys(cp))), key=len)
+            out = lists[0]
+            for p in lists[1:]:
+                if not len(out):
+                    break
+                out = np.intersect1d(out, p, assume_unique=True)
+            return out
+        if len(cp) == 2:
+            lo = (cp[0] << np.uint64(42)) | (cp[1] << np.uint64(21))
+            return self._key_range(lo, lo + (np.uint64(1) << np.uint64(21)))
+        lo = cp[0] << np.uint64(42)
+        return self._key_range(lo, lo + (np.uint64(1) << np.uint64(42)))
+
+    def _rows(self, ids, ordered: bool = False) -> np.ndarray:
+        """Posisi baris untuk id nama; ordered=True -> urutan id dipertahankan (fuzzy)."""
+        if not ordered and len(ids) > len(self.names) // 64:
+            # banyak nama cocok: satu lintasan bitmap atas kode baris lebih murah dari ribuan slice
+            lut = np.zeros(len(self.names) + 1, dtype=bool)  # slot terakhir = nama kosong (kode -1)
+            lut[ids] = True
+            return np.flatnonzero(lut.take(self._codes))
+        runs = [self._row_order[self._row_offsets[i]:self._row_offsets[i + 1]] for i in ids]
+        rows = np.concatenate(runs) if runs else np.empty(0, dtype=np.int64)
+        return rows if ordered else np.sort(rows)
+
+    # ---------- query ----------
+    def match_ids(self, query: str, mode: str = "substring") -> np.ndarray:
+        """Id nama unik yang cocok (fuzzy: urut kemiripan)."""
+        q = normalize_name(query)
+        if not q:
+            return np.empty(0, dtype=np.uint32)
+        if mode == "prefix":
+            ids = self._candidates(_START + q)
+            return ids[self._verify(ids, q, prefix=True)]
+        if mode == "fuzzy" and len(q) >= 3:
+            return self._fuzzy_ids(q)
+        ids = self._candidates(q)
+        if len(q) <= 3:
+            return ids  # trigram / rentang key sudah persis sama dengan substring
+        return ids[self._verify(ids, q)]
+
+    def _verify(self, ids, q: str, prefix: bool = False) -> np.ndarray:
+        """Cek ulang kandidat (semua trigram ada belum tentu berurutan)."""
+        cand = pd.Series(self.names[ids], dtype=object)
+        ok = cand.str.startswith(q) if prefix else cand.str.contains(q, regex=False)
+        return ok.to_numpy(dtype=bool)
+
+    def _fuzzy_ids(self, q: str) -> np.ndarray:
+        tri = np.unique(_tri_keys(_codepoints(q)))
+        lists = [self._posting(k) for k in tri]
+        hits = np.concatenate(lists) if lists else np.empty(0, dtype=np.uint32)
+        if not len(hits):
+            return hits
+        ids, counts = np.unique(hits, return_counts=True)
+        ok = counts / len(tri) >= FUZZY_MIN_SIMILARITY
+        ids, counts = ids[ok], counts[ok]
+        # ranking: kemiripan Jaccard (nama pendek yang hampir sama di atas nama panjang)
+        name_tri = self._name_len[ids] + 1  # jumlah trigram nama berpenanda = panjang + 1
+        jaccard = counts / (len(tri) + name_tri - counts)
+        order = np.lexsort((ids, -jaccard))[:FUZZY_MAX_RESULTS]
+        return ids[order]
+
+    def search(self, query: str, mode: str = "substring") -> np.ndarray:
+        """
+        Posisi baris yang cocok. substring / prefix: urut baris;
+        fuzzy: urut kemiripan (baris nama yang sama berurutan).
+        """
+        fuzzy = mode == "fuzzy" and len(normalize_name(query)) >= 3
+        return self._rows(self.match_ids(query, mode), ordered=fuzzy)
@@ -0,0 +1,370 @@
+# app/session.py
+"""Akses data hasil pipeline untuk halaman-halaman Streamlit (cache lintas rerun)."""
+import os
+from collections import deque
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from app import timing
+
+from app.core import apply_weights, export_excel
+from app.cube import build_cube
+from app.figcache import FigureCache
+from app.index import CategoryIndex, RankIndex
+from app.search import NameIndex
+from app.outofcore import sector_summary
+from app.parallel import DEFAULT_WORKERS
+from app.pipeline import prepare_base
+
+# jumlah kombinasi (sumber, mode[, bobot]) yang disimpan; yang paling lama dibuang
+PIPELINE_CACHE_ENTRIES = 8
+
+
+@st.cache_resource(max_entries=PIPELINE_CACHE_ENTRIES, show_spinner="Menghitung KPI...")
+def _base_cached(source_key: str, data_mode: str, _df_raw):
+    # _df_raw tidak di-hash Streamlit (prefix _): key cukup hash sumber + mode
+    return prepare_base(_df_raw, workers=DEFAULT_WORKERS)
+
+
+@st.cache_resource(max_entries=PIPELINE_CACHE_ENTRIES, show_spinner=False)
+def _weighted_cached(source_key: str, data_mode: str, weights: tuple, _base):
+    return apply_weights(_base, *weights)
+
+
+def prepare_dataset(df_raw, source_key: str, data_mode: str, weights: tuple):
+    """
+    Jalankan pipeline sekali per (sumber, mode); skor per KPI ikut di-cache,
+    jadi ganti bobot cuma multiply-add + kategorisasi ulang.
+    Rerun karena widget lain (filter bidang, tombol, dll) langsung pakai hasil cache.
+    Hasil dipakai bersama: jangan diubah in-place.
+    Return (df, laporan kompaksi memori).
+    """
+    weights = tuple(float(w) for w in weights)
+    base, mem_report = _base_cached(source_key, data_mode, df_raw)
+    return _weighted_cached(source_key, data_mode, weights, base), mem_report
+
+
+@st.cache_resource(max_entries=PIPELINE_CACHE_ENTRIES, show_spinner=False)
+def _cube_cached(data_version: str, _df):
+    return build_cube(_df)
+
+
+def sector_cube(df, data_version: str):
+    """
+    Cube agregat sektor (app/cube.py) untuk frame hasil prepare_dataset, sekali per versi
+    dataset. Halaman menghitung mean/std per bidang dari cube (rollup / sector_means),
+    jadi ganti filter bidang tidak perlu groupby ulang atas semua baris.
+    """
+    return _cube_cached(data_version, df)
+
+
+# kolom yang punya index kategori -> posisi baris (filter global & filter Kecamatan)
+INDEX_COLS = ["Bidang Usaha", "Kecamatan"]
+
+
+@st.cache_resource(max_entries=PIPELINE_CACHE_ENTRIES, show_spinner=False)
+def _indexes_cached(rows_version: str, _df):
+    return {c: CategoryIndex(_df[c]) for c in INDEX_COLS if c in _df.columns}
+
+
+def category_indexes(df, rows_version: str) -> dict:
+    """
+    {kolom: CategoryIndex} untuk INDEX_COLS yang ada di df (app/index.py), sekali per
+    versi baris data (pipeline.source_version): ganti bobot tidak membangun index ulang.
+    """
+    return _indexes_cached(rows_version, df)
+
+
+@st.cache_resource(max_entries=PIPELINE_CACHE_ENTRIES, show_spinner="Menyiapkan index pencarian nama...")
+def _name_index_cached(rows_version: str, _df):
+    return NameIndex(_df["Nama Usaha"])
+
+
+def name_index(df, rows_version: str):
+    """Index trigram Nama Usaha (app/search.py), sekali per versi baris data (pipeline.source_version)."""
+    return _name_index_cached(rows_version, df)
+
+
+# =========================
+# DATA CONTEXT (satu frame dasar per session)
+# =========================
+# st.session_state["data_ctx"]: frame hasil pipeline (tidak pernah diubah) + posisi
+# baris hasil filter global. Halaman tidak menyimpan / menyalin frame sendiri.
+_CTX_KEY = "data_ctx"
+
+
+def _read_only_column(s: pd.Series):
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        codes = s.cat.codes.to_numpy().view()
+        codes.setflags(write=False)
+        return pd.Categorical.from_codes(codes, dtype=s.dtype, validate=False)
+    if isinstance(s.dtype, np.dtype):
+        values = s.to_numpy().view()
+        values.setflags(write=False)
+        return values
+    return s.array
+
+
+def read_only_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Frame dengan data yang sama (tanpa salinan) tapi array NumPy-nya read-only,
+    tanpa mengubah opsi global pandas. View dangkal frame ini: ganti kolom penuh
+    (df[c] = ...) hanya mengganti kolom di view; tulis in-place (df.loc[...] = ...,
+    inplace=True) langsung error, jadi frame bersama tidak bisa ikut berubah.
+    """
+    cols = {c: _read_only_column(df[c]) for c in df.columns}
+    return pd.DataFrame(cols, index=df.index, copy=False)
+
+
+def set_data_context(
+    df, data_version: str, selected: list, positions=None, cube=None, indexes=None, rows_version: str = None
+) -> None:
+    """
+    Dipanggil halaman Upload. positions: array posisi baris hasil filter (None = semua baris).
+    rows_version: versi baris tanpa bobot (pipeline.source_version), key index nama / kategori.
+    """
+    if positions is not None:
+        positions = np.asarray(positions, dtype=np.int64)
+        positions.setflags(write=False)
+    st.session_state[_CTX_KEY] = {
+        "version": data_version,
+        "rows_version": rows_version or data_version,
+        "base": read_only_frame(df),
+        "positions": positions,
+        "selected": list(selected),
+        "cube": cube,
+        "indexes": indexes or {},
+    }
+
+
+def clear_data_context() -> None:
+    st.session_state.pop(_CTX_KEY, None)
+
+
+def data_context():
+    """Dict data context (version, rows_version, base, positions, selected, cube, indexes) atau None kalau belum ada."""
+    return st.session_state.get(_CTX_KEY)
+
+
+def has_data() -> bool:
+    return data_context() is not None
+
+
+def filtered_count() -> int:
+    ctx = data_context()
+    if ctx is None:
+        return 0
+    return len(ctx["base"]) if ctx["positions"] is None else len(ctx["positions"])
+
+
+@st.cache_resource(max_entries=PIPELINE_CACHE_ENTRIES, show_spinner=False)
+def _filtered_cached(data_version: str, filter_key: tuple, _base, _positions):
+    out = _base.take(_positions)
+    if isinstance(out["Bidang Usaha"].dtype, pd.CategoricalDtype):
+        out["Bidang Usaha"] = out["Bidang Usaha"].cat.remove_unused_categories()
+    return read_only_frame(out)
+
+
+def base_frame() -> pd.DataFrame:
+    """
+    Semua baris (tanpa filter). View dangkal read-only: kolom boleh diganti penuh
+    (df[c] = ...), tulis in-place ke frame bersama error (lihat read_only_frame).
+    """
+    return data_context()["base"].copy(deep=False)
+
+
+def filtered_frame() -> pd.DataFrame:
+    """
+    Baris sesuai filter global. Semua bidang dipilih -> view frame dasar (tanpa salinan);
+    selain itu satu salinan subset per (versi, filter), dipakai bersama semua halaman.
+    """
+    ctx = data_context()
+    if ctx["positions"] is None:
+        return base_frame()
+    key = tuple(sorted(ctx["selected"]))
+    return _filtered_cached(ctx["version"], key, ctx["base"], ctx["positions"]).copy(deep=False)
+
+
+# =========================
+# MODE OUT-OF-CORE (file Parquet hasil `python -m app.outofcore`)
+# =========================
+# st.session_state["ooc_path"]: path file hasil di server; Dashboard hanya membaca agregatnya
+_OOC_KEY = "ooc_path"
+
+
+def set_ooc_path(path) -> None:
+    """Aktifkan (path) / matikan (None) mode out-of-core; data context in-memory dilepas."""
+    clear_data_context()
+    if path:
+        st.session_state[_OOC_KEY] = path
+    else:
+        st.session_state.pop(_OOC_KEY, None)
+
+
+def ooc_path():
+    """Path file Parquet out-of-core yang aktif, atau None."""
+    return st.session_state.get(_OOC_KEY)
+
+
+@st.cache_resource(max_entries=PIPELINE_CACHE_ENTRIES, show_spinner="Membaca agregat file out-of-core...")
+def _ooc_summary_cached(path: str, mtime: float, size: int, by):
+    return sector_summary(path, by=by)
+
+
+def ooc_summary(path: str, by="Bidang Usaha") -> pd.DataFrame:
+    """Agregat per bidang (by=None -> total) dari file hasil, sekali per (path, mtime, ukuran)."""
+    info = os.stat(path)
+    return _ooc_summary_cached(path, info.st_mtime, info.st_size, by)
+
+
+# =========================
+# TOP-N (index rank per KPI)
+# =========================
+@st.cache_resource(max_entries=PIPELINE_CACHE_ENTRIES * 4, show_spinner=False)
+def _rank_cached(data_version: str, col: str, _df):
+    return RankIndex(_df[col].to_numpy(dtype=np.float64, na_value=np.nan))
+
+
+@st.cache_resource(max_entries=PIPELINE_CACHE_ENTRIES, show_spinner=False)
+def _mask_cached(data_version: str, filter_key: tuple, valid_only: bool, _base, _positions):
+    if _positions is None:
+        mask = np.ones(len(_base), dtype=bool)
+    else:
+        mask = np.zeros(len(_base), dtype=bool)
+        mask[_positions] = True
+    if valid_only and "Valid_Data" in _base.columns:
+        mask &= _base["Valid_Data"].to_numpy(dtype=bool)
+    mask.setflags(write=False)
+    return mask
+
+
+def filter_mask(valid_only: bool = False):
+    """Bitmap baris frame dasar yang lolos filter global (+ Valid_Data); None = semua baris."""
+    ctx = data_context()
+    base = ctx["base"]
+    if ctx["positions"] is None and not (valid_only and "Valid_Data" in base.columns):
+        return None
+    return _mask_cached(ctx["version"], tuple(sorted(ctx["selected"])), valid_only, base, ctx["positions"])
+
+
+def top_rows(col: str, n: int, ascending: bool = False, valid_only: bool = False) -> pd.DataFrame:
+    """
+    n baris teratas/terbawah `col` (NaN dilewati) sesuai filter global, dari index rank
+    yang dibangun sekali per versi dataset: geser slider Top N tidak men-sort data penuh.
+    """
+    ctx = data_context()
+    base = ctx["base"]
+    if col not in base.columns:
+        return base.head(0)
+    index = _rank_cached(ctx["version"], col, base)
+    return base.take(index.top(n, ascending=ascending, mask=filter_mask(valid_only)))
+
+
+@st.cache_resource(max_entries=PIPELINE_CACHE_ENTRIES * 2, show_spinner=False)
+def _sort_order_cached(data_version: str, view_key: tuple, col: str, ascending: bool, _df):
+    s = _df[col].reset_index(drop=True)
+    order = s.sort_values(ascending=ascending, kind="stable", na_position="last").index.to_numpy()
+    order.setflags(write=False)
+    return order
+
+
+def sort_order(df, col: str, ascending: bool = True, view_key: tuple = ()) -> np.ndarray:
+    """
+    Posisi baris df terurut menurut col (NaN di akhir), sekali per (versi, filter global,
+    view_key mis. query pencarian, kolom, arah): pindah halaman tabel tidak men-sort ulang.
+    df harus frame view yang sama untuk key yang sama (filtered_frame / search_rows).
+    """
+    ctx = data_context()
+    key = (tuple(sorted(ctx["selected"])),) + tuple(view_key)
+    return _sort_order_cached(ctx["version"], key, col, ascending, df)
+
+
+def search_rows(query: str, mode: str = "substring") -> pd.DataFrame:
+    """Baris (sesuai filter global) yang Nama Usaha-nya cocok dengan query, lewat index trigram."""
+    ctx = data_context()
+    base = ctx["base"]
+    index = ctx["indexes"].get("Nama Usaha")
+    if index is None:
+        index = _name_index_cached(ctx["rows_version"], base)
+    pos = index.search(query, mode)
+    mask = filter_mask()
+    if mask is not None:
+        pos = pos[mask[pos]]
+    return base.take(pos)
+
+
+# =========================
+# CACHE FIGURE (spec Plotly per versi dataset + parameter tampilan)
+# =========================
+@st.cache_resource(show_spinner=False)
+def figure_cache() -> FigureCache:
+    """Satu FigureCache per proses (key memuat versi dataset, jadi aman dibagi antar session)."""
+    return FigureCache()
+
+
+def cached_figure(page: str, mode: str, build, metric=None, top_n=None, extra: tuple = ()):
+    """
+    Figure dari cache untuk (versi dataset, filter global, halaman, mode, metrik, Top N, extra);
+    kalau belum ada, build() dipanggil. Hitung data grafik di dalam build supaya ikut dilewati saat hit.
+    """
+    ctx = data_context()
+    key = (ctx["version"], tuple(sorted(ctx["selected"])), page, mode, metric, top_n) + tuple(extra)
+    return figure_cache().get_or_build(key, build)
+
+
+# =========================
+# EXPORT EXCEL (dibuat saat tombol unduh diklik, bytes di-cache)
+# =========================
+EXPORT_CACHE_ENTRIES = 8
+
+
+@st.cache_resource(max_entries=EXPORT_CACHE_ENTRIES, show_spinner=False)
+def _excel_cached(data_version: str, view_key: tuple, columns: tuple, kind: str, _df, _prepare):
+    frame = _df[list(columns)]
+    if _prepare is not None:
+        frame = _prepare(frame)
+    return export_excel(frame)[0]
+
+
+def excel_download(
+    df, kind: str = "data", prepare=None, view_key: tuple = (), data_version: str = None, columns=None
+):
+    """
+    Callable untuk st.download_button(data=...) (butuh Streamlit >= 1.52, lihat
+    requirements.txt): xlsx baru dibuat saat tombol diklik (di thread terpisah, bukan saat
+    rerun), bytes di-cache per (versi dataset, filter global, view_key, kolom, kind).
+    kind = nama transformasi `prepare` (mis. "rekomendasi"), jadi halaman yang mengekspor
+    isi yang sama memakai bytes yang sama.
+    columns: kolom yang diekspor (default semua); dipilih saat klik, bukan df[cols] tiap rerun.
+    data_version: untuk data di luar data context (mis. Manual Input).
+    """
+    if data_version is None:
+        ctx = data_context()
+        data_version = ctx["version"]
+        view_key = (tuple(sorted(ctx["selected"])),) + tuple(view_key)
+    columns = tuple(df.columns if columns is None else columns)
+    view_key = tuple(view_key)
+    return lambda: _excel_cached(data_version, view_key, columns, kind, df, prepare)
+
+
+# =========================
+# TIMING PER RERUN (halaman Diagnostik)
+# =========================
+# jumlah rerun terakhir yang disimpan per halaman
+TIMING_HISTORY = 20
+
+
+def begin_page_timing(page: str) -> None:
+    """Panggil di awal script halaman: mulai run timing baru + simpan di riwayat session."""
+    run = timing.new_run(page)
+    history = st.session_state.setdefault("timing_history", {})
+    if page not in history:
+        history[page] = deque(maxlen=TIMING_HISTORY)
+    history[page].append(run)  # run diisi terus selama script jalan
+
+
+def end_page_timing() -> None:
+    """Panggil di akhir script halaman (halaman yang berhenti lewat st.stop tetap tercatat)."""
+    timing.end_run()
@@ -0,0 +1,169 @@
+# app/sketch.py
+"""
+Sketch kuantil streaming (KLL) untuk data per chunk / out-of-core.
+
+Tiap partisi bisa punya sketch sendiri (QuantileSketch.merge) lalu dijadikan
+ambang global (kuantil skor 5%–95% dan kuantil outlier 99.5%) lewat
+thresholds_from_sketches; mode out-of-core memakai jalur yang sama. Galat rank <= ~2.5/k
+dari jumlah data dengan probabilitas tinggi (lihat QuantileSketch.from_error).
+Selama data belum pernah dikompaksi (n kecil), hasil kuantil = np.quantile persis.
+"""
+import math
+
+import numpy as np
+import pandas as pd
+
+from app.core import KPI_DECIMALS, NUMERIC_COLS, OUTLIER_COLS, OUTLIER_Q, SCORE_COLS, kpi_kernel, to_num
+
+DEFAULT_K = 400
+
+# kuantil clipping skor (sama dengan default clip_minmax_score)
+SCORE_Q = (0.05, 0.95)
+
+# kolom KPI yang di-sketch: kolom skor + kolom outlier
+SKETCH_COLS = sorted(set(OUTLIER_COLS) | set(SCORE_COLS))
+
+
+class QuantileSketch:
+    """KLL sketch: update per batch, merge antar partisi, query kuantil."""
+
+    _C = 2.0 / 3.0
+    _ERR = 2.5  # galat rank ~ _ERR / k (empiris, worst case dari banyak seed)
+
+    def __init__(self, k: int = DEFAULT_K, seed=None):
+        self.k = int(k)
+        self.n = 0
+        self.levels = [np.empty(0, dtype=np.float64)]
+        self._rng = np.random.default_rng(seed)
+
+    @classmethod
+    def from_error(cls, eps: float, seed=None) -> "QuantileSketch":
+        """Sketch dengan galat rank ±eps (mis. 0.005 = ±0.5% dari n)."""
+        return cls(k=max(8, math.ceil(cls._ERR / eps)), seed=seed)
+
+    @property
+    def eps(self) -> float:
+        """Perkiraan galat rank (fraksi dari n); 0 kalau masih exact."""
+        return 0.0 if self.exact else self._ERR / self.k
+
+    @property
+    def exact(self) -> bool:
+        return len(self.levels) == 1
+
+    def _capacity(self, h: int) -> int:
+        depth = len(self.levels) - 1 - h
+        return max(2, int(math.ceil(self.k * self._C ** depth)))
+
+    def _compress(self):
+        h = 0
+        while h < len(self.levels):
+            lvl = self.levels[h]
+            if len(lvl) > self._capacity(h):
+                if h + 1 == len(self.levels):
+                    self.levels.append(np.empty(0, dtype=np.float64))
+                lvl = np.sort(lvl)
+                keep = lvl[-1:] if len(lvl) % 2 else lvl[:0]
+                body = lvl[: len(lvl) - len(keep)]
+                promoted = body[int(self._rng.integers(0, 2)) :: 2]
+                self.levels[h] = keep
+                self.levels[h + 1] = np.concatenate([self.levels[h + 1], promoted])
+                h = 0  # kapasitas berubah kalau level bertambah -> cek ulang dari bawah
+                continue
+            h += 1
+
+    def update(self, values) -> "QuantileSketch":
+        v = np.asarray(values, dtype=np.float64).ravel()
+        v = v[~np.isnan(v)]
+        if len(v):
+            self.n += len(v)
+            self.levels[0] = np.concatenate([self.levels[0], v])
+            self._compress()
+        return self
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0, dtype=np.float64))
+        for h, lvl in enumerate(other.levels):
+            self.levels[h] = np.concatenate([self.levels[h], lvl])
+        self.n += other.n
+        self._compress()
+        return self
+
+    def _weighted(self):
+        vals = np.concatenate(self.levels)
+        w = np.concatenate([np.full(len(lvl), 2.0 ** h) for h, lvl in enumerate(self.levels)])
+        order = np.argsort(vals, kind="stable")
+        return vals[order], np.cumsum(w[order])
+
+    def quantiles(self, qs, decimals: int = None) -> np.ndarray:
+        """Kuantil; decimals -> kuantil dari nilai yang dibulatkan (pembulatan monoton, urutan tetap)."""
+        qs = np.atleast_1d(np.asarray(qs, dtype=np.float64))
+        if self.n == 0:
+            return np.full(len(qs), np.nan)
+        if self.exact:
+            v = self.levels[0] if decimals is None else np.round(self.levels[0], decimals)
+            return np.quantile(v, qs)
+        vals, cum = self._weighted()
+        idx = np.searchsorted(cum, qs * cum[-1], side="left").clip(0, len(vals) - 1)
+        return vals[idx] if decimals is None else np.round(vals[idx], decimals)
+
+    def quantile(self, q: float) -> float:
+        return float(self.quantiles([q])[0])
+
+    def rank(self, x) -> np.ndarray:
+        """Perkiraan jumlah nilai < x."""
+        x = np.atleast_1d(np.asarray(x, dtype=np.float64))
+        if self.n == 0:
+            return np.zeros(len(x))
+        vals, cum = self._weighted()
+        idx = np.searchsorted(vals, x, side="left")
+        return np.where(idx > 0, cum[np.maximum(idx - 1, 0)], 0.0)
+
+
+# =========================
+# SKETCH KPI (chunk / partisi)
+# =========================
+def chunk_kpis(df: pd.DataFrame) -> dict:
+    """KPI satu chunk data mentah (array NumPy), via kpi_kernel."""
+    num = [np.ascontiguousarray(to_num(df[c]).to_numpy(dtype=np.float64)) for c in NUMERIC_COLS]
+    return kpi_kernel(*num)
+
+
+def kpi_sketches(chunks, k: int = DEFAULT_K, seed=None, on_chunk=None) -> dict:
+    """
+    Satu lintasan atas chunk data mentah (iterable of DataFrame) ->
+    dict {kolom KPI: QuantileSketch} untuk SKETCH_COLS (nilai KPI penuh, belum dibulatkan).
+    on_chunk(chunk, kpis): dipanggil per chunk (mis. spill KPI ke disk di app/outofcore.py).
+    """
+    sketches = {c: QuantileSketch(k=k, seed=seed) for c in SKETCH_COLS}
+    for chunk in chunks:
+        kpis = chunk_kpis(chunk)
+        for c in SKETCH_COLS:
+            sketches[c].update(kpis[c])
+        if on_chunk is not None:
+            on_chunk(chunk, kpis)
+    return sketches
+
+
+def thresholds_from_sketches(sketches: dict, quantiles=None) -> dict:
+    """
+    Ambang global (urutan sama dengan compute_kpis: outlier dari KPI penuh,
+    skor dari KPI yang sudah dibulatkan KPI_DECIMALS):
+    - "bounds": {KPI: (q5%, q95%)} untuk clip_minmax_score
+    - "outlier": {KPI: q99.5%} untuk Perlu_Verifikasi
+    quantiles(kolom, qs, decimals): sumber kuantil; default perkiraan dari sketch,
+    mode out-of-core memberi kuantil exact dari spill.
+    """
+    if quantiles is None:
+        def quantiles(c, qs, decimals=None):
+            return sketches[c].quantiles(qs, decimals=decimals)
+
+    # clip_minmax_score pakai Series.quantile -> np.percentile(q * 100): q dibentuk ulang sama persis
+    score_q = np.true_divide(np.asarray(SCORE_Q) * 100.0, 100)
+    bounds, outlier = {}, {}
+    for c in SCORE_COLS:
+        lo, hi = quantiles(c, score_q, KPI_DECIMALS)
+        bounds[c] = (float(lo), float(hi))
+    for c in OUTLIER_COLS:
+        outlier[c] = float(quantiles(c, [OUTLIER_Q])[0])
+    return {"bounds": bounds, "outlier": outlier}
@@ -0,0 +1,97 @@
+# app/timing.py
+"""
+Instrumentasi waktu per tahap (tanpa Streamlit).
+
+Satu "run" = satu rerun script halaman. Run aktif disimpan per thread
+(Streamlit menjalankan script tiap session di thread sendiri), jadi fungsi di
+app/core.py cukup dibungkus @timed / `with stage(...)`: kalau tidak ada run
+aktif (CLI, benchmark, worker process), overhead-nya cuma satu getattr.
+Riwayat per halaman disimpan di session_state lewat app/session.py.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+_local = threading.local()
+
+
+def new_run(label: str) -> dict:
+    """Mulai run baru untuk thread ini (run sebelumnya yang belum ditutup ditinggal)."""
+    run = {
+        "label": label,
+        "started_at": time.time(),
+        "t0": time.perf_counter(),
+        "stages": [],
+        "depth": 0,
+        "total_ms": None,
+    }
+    _local.run = run
+    return run
+
+
+def current_run():
+    return getattr(_local, "run", None)
+
+
+def end_run():
+    """Tutup run aktif: catat total durasi script. Return run (atau None)."""
+    run = current_run()
+    if run is not None:
+        run["total_ms"] = (time.perf_counter() - run["t0"]) * 1000
+        _local.run = None
+    return run
+
+
+def run_total_ms(run: dict) -> float:
+    """Total run; kalau script berhenti sebelum end_run (st.stop), pakai akhir tahap terakhir."""
+    if run["total_ms"] is not None:
+        return run["total_ms"]
+    ends = [s["start_ms"] + s["ms"] for s in run["stages"] if s["ms"] is not None]
+    return max(ends, default=0.0)
+
+
+@contextmanager
+def stage(name: str, rows=None):
+    """
+    Catat durasi satu tahap di run aktif. Yield dict record, jadi jumlah baris
+    bisa diisi belakangan: `with stage("x") as rec: ...; rec["rows"] = len(out)`.
+    """
+    run = current_run()
+    if run is None:
+        yield {}
+        return
+
+    t = time.perf_counter()
+    rec = {"stage": name, "start_ms": (t - run["t0"]) * 1000, "ms": None, "rows": rows, "depth": run["depth"]}
+    run["stages"].append(rec)
+    run["depth"] += 1
+    try:
+        yield rec
+    finally:
+        run["depth"] -= 1
+        rec["ms"] = (time.perf_counter() - t) * 1000
+
+
+def _rows_of(args) -> int:
+    if args and hasattr(args[0], "__len__") and not isinstance(args[0], (str, bytes, dict)):
+        return len(args[0])
+    return None
+
+
+def timed(name: str = None):
+    """Decorator: catat fungsi sebagai tahap; rows = len(argumen pertama) kalau ada."""
+
+    def deco(fn):
+        label = name or fn.__name__
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if current_run() is None:
+                return fn(*args, **kwargs)
+            with stage(label, rows=_rows_of(args)):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return deco
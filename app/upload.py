@@ -1,22 +1,40 @@
 # app/upload.py
-import io
 import hashlib
 import pandas as pd
 import streamlit as st
 
-@st.cache_data(show_spinner=False)
-def _read_excel_bytes(file_bytes: bytes) -> pd.DataFrame:
-    return pd.read_excel(io.BytesIO(file_bytes))
+from app.core import REQUIRED_COLS
+
+from app.ingest import SKIPPED_ATTR, SUPPORTED_TYPES, read_upload_batch
+from app.parse_cache import load_frame, store_frame
+from app.session import clear_data_context
+from app.timing import stage
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _read_upload_batch(batch_hash: str, _files: list) -> pd.DataFrame:
+    # xlsx: streaming read-only per sheet; csv/tsv/parquet: parser cepat masing-masing format.
+    # semua hanya ambil kolom wajib + opsional, diparse paralel di process pool
+    return read_upload_batch(_files)
+
+
+def _batch_hash(files: list) -> str:
+    """Hash gabungan (nama + isi) semua file; nama ikut karena jadi kolom Sumber File."""
+    h = hashlib.md5()
+    for name, file_bytes in files:
+        h.update(name.encode())
+        h.update(hashlib.md5(file_bytes).digest())
+    return h.hexdigest()
 
 def render_upload_box():
     """
     Kotak upload untuk ditaruh di MAIN CONTENT (bukan sidebar).
     Simpan hasil ke st.session_state["df_upload"].
     """
-    st.markdown("### 📤 Upload Excel")
+    st.markdown("### 📤 Upload Data")
     uploaded = st.file_uploader(
-        "Pilih file Excel (.xlsx)",
-        type=["xlsx"],
+        "Pilih file (.xlsx / .csv / .tsv / .parquet) — boleh lebih dari satu",
+        type=SUPPORTED_TYPES,
+        accept_multiple_files=True,
         key="excel_uploader_main",
         label_visibility="collapsed",
     )
@@ -27,20 +45,51 @@ def render_upload_box():
         df = st.session_state["df_upload"]
         st.success(f"Data upload aktif: **{name}**")
         st.caption(f"Baris: {len(df):,} | Kolom: {df.shape[1]}")
+        if "Sumber File" in df.columns:
+            n_file = df["Sumber File"].nunique()
+            n_sheet = df.groupby(["Sumber File", "Sheet"]).ngroups
+            st.caption(f"Sumber: {n_file} file | {n_sheet} sheet")
+        skipped = st.session_state.get("upload_skipped") or []
+        if skipped:
+            st.warning("Dilewati (kolom wajib tidak lengkap): " + ", ".join(skipped))
 
         if st.button("🧹 Hapus data upload", use_container_width=True):
-            for k in ["df_upload", "upload_name", "upload_hash", "df_all", "df_filtered"]:
+            for k in ["df_upload", "upload_name", "upload_hash", "upload_skipped"]:
                 st.session_state.pop(k, None)
+            clear_data_context()
             st.rerun()
 
-    # upload baru
-    if uploaded is not None:
-        file_bytes = uploaded.getvalue()
-        file_hash = hashlib.md5(file_bytes).hexdigest()
+    # upload baru (bisa banyak file, tiap file bisa banyak sheet)
+    if uploaded:
+        files = [(u.name, u.getvalue()) for u in uploaded]
+        with stage("hash upload"):
+            file_hash = _batch_hash(files)
 
         if st.session_state.get("upload_hash") != file_hash:
-            st.session_state["df_upload"] = _read_excel_bytes(file_bytes)
-            st.session_state["upload_name"] = uploaded.name
+            # cache disk dulu (bertahan walau server restart), baru parse
+            with stage("cache disk (baca)") as rec:
+                df_new = load_frame(file_hash)
+                rec["rows"] = None if df_new is None else len(df_new)
+            if df_new is None:
+                try:
+                    with st.spinner(f"Membaca {len(files)} file..."), stage("parsing upload") as rec:
+                        df_new = _read_upload_batch(file_hash, files)
+                        rec["rows"] = len(df_new)
+                except RuntimeError as e:
+                    st.error(f"File belum bisa dibaca: {e}")
+                    return
+                with stage("cache disk (simpan)", rows=len(df_new)):
+                    store_frame(file_hash, df_new)
+            skipped = df_new.attrs.get(SKIPPED_ATTR, [])
+            if df_new.empty:
+                st.error(
+                    f"Tidak ada sheet / file dengan kolom wajib lengkap ({', '.join(REQUIRED_COLS)}). "
+                    "Dilewati: " + ", ".join(skipped)
+                )
+                return
+            st.session_state["df_upload"] = df_new
+            st.session_state["upload_skipped"] = skipped
+            st.session_state["upload_name"] = ", ".join(name for name, _ in files)
             st.session_state["upload_hash"] = file_hash
             st.success("✅ Upload berhasil. Data tersimpan.")
             st.rerun()
@@ -0,0 +1,114 @@
+# bench/bench_core.py
+"""
+Benchmark jalur utama app/core.py per ukuran data: waktu (terbaik dari N
+ulangan) dan puncak memori (tracemalloc, satu run terpisah supaya waktu tidak
+ikut melambat).
+
+Tahap: compute_kpis, score_and_classify, add_recommendations,
+data_quality_summary, export_excel (dibatasi --excel-cap baris), generate_pdf_report.
+
+Jalankan dari root project:
+    python -m bench.bench_core --rows 1000,10000,100000,1000000
+    python -m bench.bench_core --save bench_base.csv          # simpan acuan
+    python -m bench.bench_core --compare bench_base.csv       # exit 1 kalau ada regresi
+"""
+import argparse
+import sys
+import time
+import tracemalloc
+
+import pandas as pd
+
+from app.core import (
+    add_recommendations,
+    compute_kpis,
+    data_quality_summary,
+    export_excel,
+    generate_pdf_report,
+    report_inputs,
+    score_and_classify,
+)
+from bench.synth import make_ukm_frame
+
+
+def _stages(raw: pd.DataFrame, excel_cap: int) -> list:
+    """(nama, fungsi tanpa argumen); input tiap tahap disiapkan di luar pengukuran."""
+    kpis = compute_kpis(raw)
+    scored = score_and_classify(kpis)
+    full = add_recommendations(scored)
+    report_args = report_inputs(full)
+    return [
+        ("compute_kpis", lambda: compute_kpis(raw)),
+        ("score_and_classify", lambda: score_and_classify(kpis)),
+        ("add_recommendations", lambda: add_recommendations(scored)),
+        ("data_quality_summary", lambda: data_quality_summary(full)),
+        ("export_excel", lambda: export_excel(full.head(excel_cap))),
+        ("generate_pdf_report", lambda: generate_pdf_report(*report_args)),
+    ]
+
+
+def _best_time(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def _peak_bytes(fn) -> int:
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run(rows: list, repeat: int, excel_cap: int, seed: int) -> pd.DataFrame:
+    records = []
+    print(f"{'rows':>10} {'tahap':<22} {'waktu s':>9} {'puncak MiB':>11}")
+    for n in rows:
+        raw = make_ukm_frame(n, seed=seed)
+        for name, fn in _stages(raw, excel_cap):
+            t = _best_time(fn, repeat)
+            peak = _peak_bytes(fn)
+            records.append({"rows": n, "tahap": name, "waktu_s": t, "puncak_mib": peak / 2**20})
+            print(f"{n:>10,} {name:<22} {t:>9.4f} {peak / 2**20:>11.1f}")
+    return pd.DataFrame(records)
+
+
+def compare(result: pd.DataFrame, baseline: pd.DataFrame, tolerance: float) -> bool:
+    """True kalau tidak ada tahap yang lebih lambat / boros dari acuan x tolerance."""
+    m = result.merge(baseline, on=["rows", "tahap"], suffixes=("", "_acuan"))
+    m["rasio_waktu"] = m["waktu_s"] / m["waktu_s_acuan"]
+    m["rasio_memori"] = m["puncak_mib"] / m["puncak_mib_acuan"].where(m["puncak_mib_acuan"] > 0)
+    bad = m[(m["rasio_waktu"] > tolerance) | (m["rasio_memori"] > tolerance)]
+
+    print(f"\nbanding acuan (toleransi {tolerance:.2f}x):")
+    print(m[["rows", "tahap", "rasio_waktu", "rasio_memori"]].round(2).to_string(index=False))
+    if len(bad):
+        print(f"\nREGRESI: {len(bad)} tahap melewati toleransi")
+    return bad.empty
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--rows", default="1000,10000,100000,1000000")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--excel-cap", type=int, default=50_000, help="maks baris untuk export_excel (openpyxl lambat)")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--save", help="simpan hasil ke CSV (acuan)")
+    ap.add_argument("--compare", help="CSV acuan hasil --save sebelumnya")
+    ap.add_argument("--tolerance", type=float, default=1.5)
+    args = ap.parse_args()
+
+    result = run([int(x) for x in args.rows.split(",")], args.repeat, args.excel_cap, args.seed)
+    if args.save:
+        result.to_csv(args.save, index=False)
+    if args.compare and not compare(result, pd.read_csv(args.compare), args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
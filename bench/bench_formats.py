@@ -0,0 +1,58 @@
+# bench/bench_formats.py
+"""
+Bandingkan waktu parsing upload per format untuk dataset sintetis yang sama.
+
+Jalankan dari root project:
+    python -m bench.bench_formats --rows 20000 --extra-cols 10
+"""
+import argparse
+import io
+import time
+
+from app.ingest import read_upload_bytes
+from bench.synth import make_ukm_frame
+
+
+def _encode(df, fmt: str) -> bytes:
+    buf = io.BytesIO()
+    if fmt == "xlsx":
+        df.to_excel(buf, index=False)
+    elif fmt == "csv":
+        df.to_csv(buf, index=False)
+    elif fmt == "tsv":
+        df.to_csv(buf, index=False, sep="\t")
+    elif fmt == "parquet":
+        df.to_parquet(buf, index=False)
+    return buf.getvalue()
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--rows", type=int, default=20_000)
+    ap.add_argument("--extra-cols", type=int, default=10, help="kolom tambahan yang tidak dipakai (diabaikan parser)")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--formats", default="xlsx,csv,tsv,parquet")
+    args = ap.parse_args()
+
+    df = make_ukm_frame(args.rows, extra_cols=args.extra_cols)
+    print(f"rows={args.rows:,} extra_cols={args.extra_cols}")
+    print(f"{'format':<8} {'size MB':>9} {'parse s':>9} {'rows/s':>12}")
+
+    for fmt in args.formats.split(","):
+        try:
+            data = _encode(df, fmt)
+        except ImportError as e:
+            print(f"{fmt:<8} dilewati ({e})")
+            continue
+
+        best = float("inf")
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            out = read_upload_bytes(data, f"bench.{fmt}")
+            best = min(best, time.perf_counter() - t0)
+        assert len(out) == len(df)
+        print(f"{fmt:<8} {len(data) / 2**20:>9.2f} {best:>9.3f} {len(df) / best:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
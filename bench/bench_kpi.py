@@ -0,0 +1,84 @@
+# bench/bench_kpi.py
+"""
+Bandingkan compute_kpis (kernel NumPy satu lintasan) dengan implementasi lama
+(to_num berulang + safe_div per rasio + df.loc per aturan + df.round(2)).
+
+Jalankan dari root project:
+    python -m bench.bench_kpi --rows 10000,100000,1000000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.core import KPI_COLS, compute_kpis, safe_div, to_num
+from bench.synth import make_ukm_frame
+
+
+def legacy_compute_kpis(df: pd.DataFrame) -> pd.DataFrame:
+    """Salinan compute_kpis sebelum kernel (acuan benchmark & cek hasil)."""
+    df = df.copy()
+    df["Pendapatan Tahun Ini (Rp)"] = to_num(df["Pendapatan Tahun Ini (Rp)"])
+    df["Pendapatan Tahun Lalu (Rp)"] = to_num(df["Pendapatan Tahun Lalu (Rp)"])
+    df["Total Biaya (Rp)"] = to_num(df["Total Biaya (Rp)"])
+    df["Total Modal/Investasi (Rp)"] = to_num(df["Total Modal/Investasi (Rp)"])
+
+    df["Laba Bersih (Rp)"] = df["Pendapatan Tahun Ini (Rp)"] - df["Total Biaya (Rp)"]
+    df["ROI (%)"] = safe_div(df["Laba Bersih (Rp)"], df["Total Modal/Investasi (Rp)"]) * 100
+    df["Profit Margin (%)"] = safe_div(df["Laba Bersih (Rp)"], df["Pendapatan Tahun Ini (Rp)"]) * 100
+    df["Growth Rate (%)"] = safe_div(
+        (df["Pendapatan Tahun Ini (Rp)"] - df["Pendapatan Tahun Lalu (Rp)"]),
+        df["Pendapatan Tahun Lalu (Rp)"],
+    ) * 100
+    df["Cost Ratio"] = safe_div(df["Total Biaya (Rp)"], df["Pendapatan Tahun Ini (Rp)"])
+
+    df["Valid_Data"] = True
+    df.loc[df["Total Modal/Investasi (Rp)"].isna() | (df["Total Modal/Investasi (Rp)"] <= 0), "Valid_Data"] = False
+    df.loc[df["Pendapatan Tahun Ini (Rp)"].isna() | (df["Pendapatan Tahun Ini (Rp)"] <= 0), "Valid_Data"] = False
+    df.loc[df["Pendapatan Tahun Lalu (Rp)"].isna() | (df["Pendapatan Tahun Lalu (Rp)"] <= 0), "Valid_Data"] = False
+    df.loc[df["Total Biaya (Rp)"].isna() | (df["Total Biaya (Rp)"] < 0), "Valid_Data"] = False
+
+    df["Perlu_Verifikasi"] = False
+    for col in ["ROI (%)", "Profit Margin (%)", "Growth Rate (%)"]:
+        s = pd.to_numeric(df[col], errors="coerce")
+        if s.dropna().empty:
+            continue
+        thr = s.quantile(0.995)
+        df.loc[s > thr, "Perlu_Verifikasi"] = True
+
+    return df.round(2)
+
+
+def _best(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--rows", default="10000,100000,1000000")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    print(f"{'rows':>10} {'lama s':>9} {'kernel s':>9} {'speedup':>8}")
+    for n in [int(x) for x in args.rows.split(",")]:
+        df = make_ukm_frame(n)
+
+        # hasil harus sama dengan versi lama setelah pembulatan tampilan
+        new, old = compute_kpis(df), legacy_compute_kpis(df)
+        for c in KPI_COLS:
+            assert np.allclose(new[c].round(2), old[c], equal_nan=True, rtol=0, atol=0), c
+        assert (new["Valid_Data"] == old["Valid_Data"]).all()
+
+        t_old = _best(lambda: legacy_compute_kpis(df), args.repeat)
+        t_new = _best(lambda: compute_kpis(df), args.repeat)
+        print(f"{n:>10,} {t_old:>9.3f} {t_new:>9.3f} {t_old / t_new:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+# bench/bench_parallel.py
+"""
+Bandingkan prepare_base serial dengan mode partisi paralel (app/parallel.py).
+Hasil dicek identik dulu, lalu diukur waktunya. Pool worker dipanaskan sekali
+sebelum pengukuran (di server Streamlit pool juga dipakai ulang antar upload).
+
+Jalankan dari root project:
+    python -m bench.bench_parallel --rows 500000,2000000 --workers 2,4,8
+"""
+import argparse
+import os
+import time
+
+import pandas as pd
+
+from app.parallel import prepare_base_parallel, shutdown_pool
+from app.pipeline import prepare_base
+from bench.synth import make_ukm_frame
+
+
+def _best(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--rows", default="500000,2000000")
+    ap.add_argument("--workers", default=",".join(str(w) for w in sorted({2, os.cpu_count() or 1})))
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    workers = [int(w) for w in args.workers.split(",")]
+    print(f"cpu_count={os.cpu_count()}")
+    print(f"{'rows':>10} {'workers':>8} {'serial s':>9} {'paralel s':>10} {'speedup':>8}")
+    for n in [int(x) for x in args.rows.split(",")]:
+        df = make_ukm_frame(n)
+        serial, _ = prepare_base(df)
+        t_serial = _best(lambda: prepare_base(df), args.repeat)
+        for w in workers:
+            par, _ = prepare_base_parallel(df, workers=w)  # juga memanaskan pool
+            pd.testing.assert_frame_equal(serial, par, check_exact=True)
+            t_par = _best(lambda: prepare_base_parallel(df, workers=w), args.repeat)
+            print(f"{n:>10,} {w:>8} {t_serial:>9.3f} {t_par:>10.3f} {t_serial / t_par:>7.2f}x")
+    shutdown_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -3,12 +3,19 @@ import streamlit as st
 import pandas as pd
 
 from app.ui import inject_global_css, render_header
+from app.session import begin_page_timing, end_page_timing
+from app.timing import stage
 from app.upload import render_upload_box
 from app.core import (
+    DEFAULT_WEIGHTS,
     REQUIRED_COLS,
-    compute_kpis,
-    score_and_classify,
-    add_recommendations,
+    round_for_display,
+    with_recommendation_text,
+)
+from app.pipeline import dataset_version, frame_fingerprint, normalize_weights, source_version
+from app.outofcore import missing_result_cols
+from app.session import (
+    category_indexes, name_index, ooc_path, prepare_dataset, sector_cube, set_data_context, set_ooc_path,
 )
 
 st.set_page_config(
@@ -18,6 +25,8 @@ st.set_page_config(
     initial_sidebar_state="expanded",
 )
 
+begin_page_timing("00_Upload")
+
 inject_global_css(bg_path="image/bgsrg.png")
 render_header(logo_path="image/logo.png")
 
@@ -50,6 +59,42 @@ st.markdown('<div class="glass" style="padding:14px; margin-bottom:14px;">', uns
 render_upload_box()  # wajib: function ini harus set st.session_state["df_upload"]
 st.markdown("</div>", unsafe_allow_html=True)
 
+# =========================================================
+# MODE OUT-OF-CORE (data > RAM: file Parquet hasil app/outofcore.py)
+# =========================================================
+with st.expander("🗄️ Mode Out-of-Core (data besar)", expanded=ooc_path() is not None):
+    st.caption(
+        "Untuk data yang tidak muat di RAM: jalankan `python -m app.outofcore data_besar.csv -o hasil.parquet` "
+        "di server, lalu isi path file hasilnya. Dashboard menampilkan agregat per bidang dari file itu "
+        "(dibaca per row group, semua baris tidak dimuat)."
+    )
+    path_in = st.text_input("Path file Parquet hasil (di server):", value=ooc_path() or "")
+    oc1, oc2 = st.columns(2)
+    with oc1:
+        if st.button("✅ Pakai file ini", use_container_width=True):
+            path_in = path_in.strip()
+            try:
+                missing_ooc = missing_result_cols(path_in)
+            except Exception as e:
+                st.error(f"File tidak bisa dibaca sebagai Parquet: {e}")
+            else:
+                if missing_ooc:
+                    st.error(f"Bukan file hasil out-of-core, kolom tidak ada: {missing_ooc}")
+                else:
+                    set_ooc_path(path_in)
+                    st.rerun()
+    with oc2:
+        if st.button("↩️ Matikan", use_container_width=True, disabled=ooc_path() is None):
+            set_ooc_path(None)
+            st.rerun()
+
+if ooc_path() is not None:
+    st.info(
+        f"Mode out-of-core aktif: `{ooc_path()}`. Buka page **Dashboard** untuk ringkasannya; "
+        "halaman lain butuh data per baris, matikan mode ini untuk memakai data upload / manual."
+    )
+    st.stop()
+
 # =========================================================
 # SESSION DEFAULTS YANG DIPAKAI APP
 # =========================================================
@@ -84,10 +129,16 @@ if has_upload and use_manual:
 
 data_mode = st.radio("Pilih data:", options, index=0, horizontal=True)
 
+# key sumber data untuk cache pipeline (hash upload + hash isi manual)
+upload_key = st.session_state.get("upload_hash", "") if has_upload else ""
+manual_key = frame_fingerprint(df_manual) if use_manual else ""
+
 if data_mode == "Hanya Upload":
     df_raw = df_upload
+    source_key = upload_key
 elif data_mode == "Hanya Manual":
     df_raw = df_manual
+    source_key = manual_key
 else:
     parts = []
     if has_upload:
@@ -95,6 +146,7 @@ else:
     if use_manual:
         parts.append(df_manual)
     df_raw = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
+    source_key = f"{upload_key}+{manual_key}"
 
 st.markdown("</div>", unsafe_allow_html=True)
 
@@ -111,11 +163,51 @@ if missing:
     st.stop()
 
 # =========================================================
-# KPI + SCORE + RECOMMEND
+# BOBOT SKOR KPI
 # =========================================================
-df = compute_kpis(df_raw)
-df = score_and_classify(df, w_roi=0.40, w_pm=0.35, w_gr=0.25)
-df = add_recommendations(df)
+st.markdown('<div class="glass" style="padding:14px; margin-bottom:14px;">', unsafe_allow_html=True)
+st.markdown("### ⚖️ Bobot Skor KPI")
+
+# bobot disimpan di key non-widget (seperti selected_bidang): state widget slider dibuang
+# Streamlit saat halaman lain dibuka, jadi slider cuma menampilkan / mengubah "bobot_kpi"
+WEIGHT_KEYS = ["w_roi", "w_pm", "w_gr"]
+st.session_state.setdefault("bobot_kpi", list(DEFAULT_WEIGHTS))
+
+
+def simpan_bobot(i: int, key: str) -> None:
+    st.session_state.bobot_kpi[i] = st.session_state[key]
+
+
+def reset_bobot() -> None:
+    # callback jalan sebelum slider dibuat: state widget dibuang, slider mulai lagi dari value
+    st.session_state.bobot_kpi = list(DEFAULT_WEIGHTS)
+    for k in WEIGHT_KEYS:
+        st.session_state.pop(k, None)
+
+
+bobot = st.session_state.bobot_kpi
+wc1, wc2, wc3, wc4 = st.columns([1, 1, 1, 0.8])
+for i, (col, label, key) in enumerate(zip([wc1, wc2, wc3], ["ROI", "Profit Margin", "Growth"], WEIGHT_KEYS)):
+    with col:
+        st.slider(
+            label, 0.0, 1.0, value=float(bobot[i]), step=0.05, key=key, on_change=simpan_bobot, args=(i, key)
+        )
+with wc4:
+    st.write("")
+    st.button("↩️ Default", use_container_width=True, on_click=reset_bobot)
+
+weights = normalize_weights(st.session_state.bobot_kpi)
+st.caption(
+    f"Skor KPI = {weights[0]:.2f}×Skor_ROI + {weights[1]:.2f}×Skor_PM + {weights[2]:.2f}×Skor_GR "
+    "(bobot dinormalisasi jadi total 1)"
+)
+st.markdown("</div>", unsafe_allow_html=True)
+
+# =========================================================
+# KPI + SCORE + RECOMMEND (di-cache per sumber + mode; bobot hanya re-scoring)
+# =========================================================
+with stage("pipeline KPI/skor (cache)", rows=len(df_raw)):
+    df, mem_report = prepare_dataset(df_raw, source_key, data_mode, weights)
 
 # =========================================================
 # 3) FILTER GLOBAL (MAIN CONTENT) - FIX ERROR DEFAULT NOT IN OPTIONS
@@ -123,7 +215,13 @@ df = add_recommendations(df)
 st.markdown('<div class="glass" style="padding:14px; margin-bottom:14px;">', unsafe_allow_html=True)
 st.markdown("### 🎛 Filter Global")
 
-bidang_list = sorted(df["Bidang Usaha"].dropna().astype(str).unique().tolist())
+# index kategori -> posisi baris (app/index.py): urutan & isi baris tidak bergantung bobot,
+# jadi dibangun sekali per sumber + mode (rows_version), bukan per versi dataset
+version = dataset_version(source_key, data_mode, weights)
+rows_version = source_version(source_key, data_mode)
+indexes = category_indexes(df, rows_version)
+bidang_index = indexes["Bidang Usaha"]
+bidang_list = bidang_index.categories
 if not bidang_list:
     st.warning("Kolom Bidang Usaha kosong. Cek data kamu.")
     st.stop()
@@ -153,20 +251,33 @@ selected = st.multiselect(
 # simpan lagi (yang sudah valid)
 st.session_state.selected_bidang = selected
 
-filtered_df = df[df["Bidang Usaha"].astype(str).isin(selected)].copy()
-st.metric("📍 Jumlah UKM ditampilkan", int(len(filtered_df)))
+# filter = gabungan posisi baris dari index (frame tidak disalin); semua bidang dipilih -> None
+with stage("filter bidang", rows=len(df)) as rec:
+    if set(selected) == set(bidang_list) and bidang_index.n_rows == sum(bidang_index.counts.values()):
+        positions = None
+        n_filtered = len(df)
+    else:
+        positions = bidang_index.positions(selected)
+        n_filtered = len(positions)
+    rec["rows"] = n_filtered
+st.metric("📍 Jumlah UKM ditampilkan", int(n_filtered))
 
 st.markdown("</div>", unsafe_allow_html=True)
 
-if filtered_df.empty:
+if n_filtered == 0:
     st.warning("Filter menghasilkan 0 data.")
     st.stop()
 
 # =========================================================
-# SIMPAN UNTUK HALAMAN LAIN
+# SIMPAN UNTUK HALAMAN LAIN (data context: satu frame dasar + posisi filter)
 # =========================================================
-st.session_state["df_all"] = df
-st.session_state["df_filtered"] = filtered_df
+if "Nama Usaha" in df.columns:
+    with stage("index nama (trigram)", rows=len(df)):
+        indexes = {**indexes, "Nama Usaha": name_index(df, rows_version)}
+set_data_context(
+    df, version, selected, positions=positions, cube=sector_cube(df, version), indexes=indexes,
+    rows_version=rows_version,
+)
 
 # =========================================================
 # PREVIEW
@@ -174,5 +285,14 @@ st.session_state["df_filtered"] = filtered_df
 st.markdown('<div class="glass" style="padding:14px;">', unsafe_allow_html=True)
 st.markdown("<b>✅ Data siap.</b> Kamu bisa buka page <b>Dashboard</b> sekarang.", unsafe_allow_html=True)
 st.caption("Preview 20 baris pertama (sesuai filter):")
-st.dataframe(filtered_df.head(20), use_container_width=True, hide_index=True)
+preview = df.head(20) if positions is None else df.take(positions[:20])
+with stage("render tabel (Arrow)", rows=20):
+    st.dataframe(round_for_display(with_recommendation_text(preview)), use_container_width=True, hide_index=True)
+
+if not mem_report.empty:
+    with st.expander(f"💾 Memori data: hemat {mem_report['Hemat (byte)'].sum() / 2**20:,.2f} MB setelah kompaksi"):
+        with stage("render tabel (Arrow)", rows=len(mem_report)):
+            st.dataframe(mem_report, use_container_width=True, hide_index=True)
 st.markdown("</div>", unsafe_allow_html=True)
+
+end_page_timing()
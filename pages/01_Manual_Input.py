@@ -1,9 +1,15 @@
 import streamlit as st
 import pandas as pd
 from app.ui import inject_global_css, render_header
-from app.core import REQUIRED_COLS, export_excel
+from app.session import begin_page_timing, end_page_timing, excel_download
+from app.timing import stage
+from app.core import REQUIRED_COLS, XLSX_MIME
+from app.pipeline import frame_fingerprint
 
 st.set_page_config(page_title="Manual Input", page_icon="🧾", layout="wide")
+
+begin_page_timing("01_Manual_Input")
+
 inject_global_css()
 
 inject_global_css(bg_path="image/bgsrg.png")
@@ -41,7 +47,8 @@ if submitted:
 
 st.markdown("### 📌 Data Manual Saat Ini")
 dfm = st.session_state.df_manual.copy()
-st.dataframe(dfm, use_container_width=True, hide_index=True, height=420)
+with stage("render tabel (Arrow)", rows=len(dfm)):
+    st.dataframe(dfm, use_container_width=True, hide_index=True, height=420)
 
 c1, c2 = st.columns(2)
 with c1:
@@ -49,7 +56,16 @@ with c1:
         st.session_state.df_manual = pd.DataFrame(columns=REQUIRED_COLS)
         st.success("Data manual direset.")
 with c2:
-    excel_bytes, fname = export_excel(dfm, filename="Data_Manual_UKM.xlsx")
-    st.download_button("⬇️ Export Data Manual (Excel)", excel_bytes, file_name=fname, use_container_width=True)
+    # xlsx baru dibuat saat tombol diklik, di-cache per isi data manual
+    st.download_button(
+        "⬇️ Export Data Manual (Excel)",
+        excel_download(dfm, data_version=frame_fingerprint(dfm)),
+        file_name="Data_Manual_UKM.xlsx",
+        mime=XLSX_MIME,
+        on_click="ignore",
+        use_container_width=True,
+    )
 
 st.info("Data manual akan ikut digabung di Home jika kamu pilih mode 'Gabung Upload + Manual'.")
+
+end_page_timing()
@@ -3,7 +3,13 @@ import streamlit as st
 import plotly.express as px
 
 from app.ui import inject_global_css, render_header
-from app.core import export_excel
+from app.session import (
+    begin_page_timing, cached_figure, data_context, end_page_timing, excel_download, filtered_frame, has_data,
+    ooc_path, ooc_summary, top_rows,
+)
+from app.timing import stage
+from app.cube import rollup
+from app.core import KATEGORI_ORDER, XLSX_MIME, round_for_display, with_recommendation_text
 
 st.set_page_config(
     page_title="Dashboard KPI UMKM Serang",
@@ -12,16 +18,114 @@ st.set_page_config(
     initial_sidebar_state="expanded",
 )
 
+begin_page_timing("02_Dashboard")
+
 inject_global_css(bg_path="image/bgsrg.png")
 render_header(logo_path="image/logo.png")
 
+
+def kpi_cards(n_ukm, avg_sc, avg_roi, avg_gr, hint_total="Jumlah sesuai filter"):
+    st.markdown(f"""
+<div class="kpi-grid">
+  <div class="glass kpi-card">
+    <div class="kpi-icon">👥</div>
+    <div class="kpi-label">Total UKM</div>
+    <div class="kpi-value">{n_ukm}</div>
+    <div class="kpi-hint">{hint_total}</div>
+  </div>
+
+  <div class="glass kpi-card">
+    <div class="kpi-icon">⭐</div>
+    <div class="kpi-label">Skor KPI rata-rata</div>
+    <div class="kpi-value">{avg_sc:.2f}</div>
+    <div class="kpi-hint">Gabungan ROI/PM/Growth (0–100)</div>
+  </div>
+
+  <div class="glass kpi-card">
+    <div class="kpi-icon">📈</div>
+    <div class="kpi-label">Rata-rata ROI</div>
+    <div class="kpi-value">{avg_roi:.2f}%</div>
+    <div class="kpi-hint">Return on Investment</div>
+  </div>
+
+  <div class="glass kpi-card">
+    <div class="kpi-icon">🚀</div>
+    <div class="kpi-label">Rata-rata Growth</div>
+    <div class="kpi-value">{avg_gr:.2f}%</div>
+    <div class="kpi-hint">Pertumbuhan pendapatan</div>
+  </div>
+</div>
+""", unsafe_allow_html=True)
+
+
+def category_pie(counts):
+    """counts: Series jumlah per Kategori_Skor."""
+    cc = counts.rename_axis("Kategori").reset_index(name="Jumlah")
+    cc = cc[cc["Jumlah"] > 0]
+    fig = px.pie(cc, names="Kategori", values="Jumlah", hole=0.55)
+    fig.update_layout(
+        template="plotly_dark",
+        height=320,
+        margin=dict(l=10, r=10, t=10, b=10),
+        legend_title_text=""
+    )
+    return fig
+
+
+# =========================
+# MODE OUT-OF-CORE (agregat dari file Parquet hasil app/outofcore.py)
+# =========================
+path = ooc_path()
+if path is not None:
+    try:
+        with stage("agregat out-of-core (Parquet)"):
+            total = ooc_summary(path, by=None).iloc[0]
+            per_bidang = ooc_summary(path)
+    except Exception as e:
+        st.error(f"File out-of-core tidak bisa dibaca ({path}): {e}")
+        st.stop()
+
+    st.caption(f"🗄️ Mode out-of-core: agregat dari `{path}` (filter bidang & Top 10 tidak tersedia).")
+    kpi_cards(
+        int(total["Jumlah UKM"]), float(total["Skor_KPI"]), float(total["ROI (%)"]), float(total["Growth Rate (%)"]),
+        hint_total="Semua baris file hasil",
+    )
+    st.markdown('<div class="divider"></div>', unsafe_allow_html=True)
+
+    colA, colB = st.columns([1.15, 1.0], gap="large")
+    with colA:
+        st.markdown('<div class="glass" style="padding:14px;">', unsafe_allow_html=True)
+        st.markdown('<div class="small-title">📌 Mini Summary</div>', unsafe_allow_html=True)
+        m1, m2, m3 = st.columns(3)
+        m1.metric("Baik ✅", int(total["Baik"]))
+        m2.metric("Sedang ⚠️", int(total["Sedang"]))
+        m3.metric("Kurang ❌", int(total["Kurang"]))
+        st.caption("Kategori berbasis Skor KPI (0–100).")
+        st.markdown('</div>', unsafe_allow_html=True)
+    with colB:
+        st.markdown('<div class="glass" style="padding:14px;">', unsafe_allow_html=True)
+        st.markdown('<div class="small-title">🍩 Distribusi Kategori</div>', unsafe_allow_html=True)
+        with stage("render grafik (Plotly)"):
+            st.plotly_chart(category_pie(total[KATEGORI_ORDER].astype(int)), use_container_width=True)
+        st.markdown('</div>', unsafe_allow_html=True)
+
+    st.markdown('<div class="divider"></div>', unsafe_allow_html=True)
+    st.markdown('<div class="glass" style="padding:14px;">', unsafe_allow_html=True)
+    st.markdown('<div class="small-title">🏭 Ringkasan per Bidang Usaha</div>', unsafe_allow_html=True)
+    with stage("render tabel (Arrow)", rows=len(per_bidang)):
+        st.dataframe(
+            round_for_display(per_bidang.sort_values("Skor_KPI", ascending=False)),
+            use_container_width=True,
+            hide_index=True,
+        )
+    st.markdown('</div>', unsafe_allow_html=True)
+    st.stop()
+
 # =========================
 # GET DATA FROM SESSION (dari page Upload)
 # =========================
-filtered_df = st.session_state.get("df_filtered")
-df_all = st.session_state.get("df_all")
 
-if filtered_df is None or df_all is None:
+if not has_data():
     st.markdown("""
     <div class="glass" style="padding:16px;">
       <div style="font-weight:900; font-size:16px;">⚠️ Data belum siap</div>
@@ -38,16 +142,17 @@ if filtered_df is None or df_all is None:
             pass
     st.stop()
 
+filtered_df = filtered_frame()
+
 # =========================
 # QUICK INSIGHT
 # =========================
 dominan = filtered_df["Kategori_Skor"].value_counts().idxmax()
 
-top_sektor = (
-    filtered_df.groupby("Bidang Usaha")["Growth Rate (%)"]
-    .mean(numeric_only=True)
-    .sort_values(ascending=False)
-)
+# rata-rata dari cube agregat (dibangun sekali di halaman Upload), bukan groupby tiap rerun
+ctx = data_context()
+cube, selected_bidang = ctx["cube"], ctx["selected"]
+top_sektor = rollup(cube, bidang=selected_bidang)[("Growth Rate (%)", "mean")].sort_values(ascending=False)
 top_sektor_name = top_sektor.index[0] if len(top_sektor) else "-"
 
 st.markdown(f"""
@@ -64,46 +169,17 @@ st.markdown('<div class="divider"></div>', unsafe_allow_html=True)
 # =========================
 # KPI CARDS
 # =========================
-avg_roi = float(filtered_df["ROI (%)"].mean(skipna=True))
-avg_pm  = float(filtered_df["Profit Margin (%)"].mean(skipna=True)) if "Profit Margin (%)" in filtered_df.columns else 0.0
-avg_gr  = float(filtered_df["Growth Rate (%)"].mean(skipna=True))
-avg_sc  = float(filtered_df["Skor_KPI"].mean(skipna=True))
+total = rollup(cube, by=None, bidang=selected_bidang).iloc[0]
+avg_roi = float(total[("ROI (%)", "mean")])
+avg_pm  = float(total[("Profit Margin (%)", "mean")])
+avg_gr  = float(total[("Growth Rate (%)", "mean")])
+avg_sc  = float(total[("Skor_KPI", "mean")])
 
 baik = int((filtered_df["Kategori_Skor"] == "Baik").sum())
 sedang = int((filtered_df["Kategori_Skor"] == "Sedang").sum())
 kurang = int((filtered_df["Kategori_Skor"] == "Kurang").sum())
 
-st.markdown(f"""
-<div class="kpi-grid">
-  <div class="glass kpi-card">
-    <div class="kpi-icon">👥</div>
-    <div class="kpi-label">Total UKM</div>
-    <div class="kpi-value">{len(filtered_df)}</div>
-    <div class="kpi-hint">Jumlah sesuai filter</div>
-  </div>
-
-  <div class="glass kpi-card">
-    <div class="kpi-icon">⭐</div>
-    <div class="kpi-label">Skor KPI rata-rata</div>
-    <div class="kpi-value">{avg_sc:.2f}</div>
-    <div class="kpi-hint">Gabungan ROI/PM/Growth (0–100)</div>
-  </div>
-
-  <div class="glass kpi-card">
-    <div class="kpi-icon">📈</div>
-    <div class="kpi-label">Rata-rata ROI</div>
-    <div class="kpi-value">{avg_roi:.2f}%</div>
-    <div class="kpi-hint">Return on Investment</div>
-  </div>
-
-  <div class="glass kpi-card">
-    <div class="kpi-icon">🚀</div>
-    <div class="kpi-label">Rata-rata Growth</div>
-    <div class="kpi-value">{avg_gr:.2f}%</div>
-    <div class="kpi-hint">Pertumbuhan pendapatan</div>
-  </div>
-</div>
-""", unsafe_allow_html=True)
+kpi_cards(len(filtered_df), avg_sc, avg_roi, avg_gr)
 
 st.markdown('<div class="divider"></div>', unsafe_allow_html=True)
 
@@ -125,16 +201,14 @@ with colA:
 with colB:
     st.markdown('<div class="glass" style="padding:14px;">', unsafe_allow_html=True)
     st.markdown('<div class="small-title">🍩 Distribusi Kategori</div>', unsafe_allow_html=True)
-    cc = filtered_df["Kategori_Skor"].value_counts().reset_index()
-    cc.columns = ["Kategori", "Jumlah"]
-    fig = px.pie(cc, names="Kategori", values="Jumlah", hole=0.55)
-    fig.update_layout(
-        template="plotly_dark",
-        height=320,
-        margin=dict(l=10, r=10, t=10, b=10),
-        legend_title_text=""
-    )
-    st.plotly_chart(fig, use_container_width=True)
+
+    def build_pie():
+        return category_pie(filtered_df["Kategori_Skor"].value_counts())
+
+    with stage("bangun grafik (Plotly)", rows=len(filtered_df)):
+        fig = cached_figure("02_Dashboard", "pie", build_pie, metric="Kategori_Skor")
+    with stage("render grafik (Plotly)"):
+        st.plotly_chart(fig, use_container_width=True)
     st.markdown('</div>', unsafe_allow_html=True)
 
 # =========================
@@ -142,38 +216,41 @@ with colB:
 # =========================
 st.markdown('<div class="divider"></div>', unsafe_allow_html=True)
 
-if "Valid_Data" in filtered_df.columns:
-    valid_only = filtered_df[filtered_df["Valid_Data"] == True].copy()
-else:
-    valid_only = filtered_df.copy()
+# dari index rank Skor_KPI (sekali per versi dataset), hanya data valid sesuai filter
+best10 = top_rows("Skor_KPI", 10, ascending=False, valid_only=True)
+risk10 = top_rows("Skor_KPI", 10, ascending=True, valid_only=True)
 
-if "Skor_KPI" in valid_only.columns and len(valid_only) > 0:
-    best10 = valid_only.sort_values("Skor_KPI", ascending=False).head(10)
-    risk10 = valid_only.sort_values("Skor_KPI", ascending=True).head(10)
+if len(best10) > 0:
 
     cL, cR = st.columns(2, gap="large")
     with cL:
         st.markdown('<div class="glass" style="padding:14px;">', unsafe_allow_html=True)
         st.markdown('<div class="small-title">🏆 Top 10 Terbaik</div>', unsafe_allow_html=True)
         cols_show = [c for c in ["Nama Usaha", "Bidang Usaha", "Skor_KPI", "Kategori_Skor"] if c in best10.columns]
-        st.dataframe(best10[cols_show], use_container_width=True, hide_index=True, height=320)
+        with stage("render tabel (Arrow)", rows=len(best10)):
+            st.dataframe(round_for_display(best10[cols_show]), use_container_width=True, hide_index=True, height=320)
         st.markdown('</div>', unsafe_allow_html=True)
 
     with cR:
         st.markdown('<div class="glass" style="padding:14px;">', unsafe_allow_html=True)
         st.markdown('<div class="small-title">🧯 Top 10 Butuh Perhatian</div>', unsafe_allow_html=True)
         cols_show = [c for c in ["Nama Usaha", "Bidang Usaha", "Skor_KPI", "Kategori_Skor"] if c in risk10.columns]
-        st.dataframe(risk10[cols_show], use_container_width=True, hide_index=True, height=320)
+        with stage("render tabel (Arrow)", rows=len(risk10)):
+            st.dataframe(round_for_display(risk10[cols_show]), use_container_width=True, hide_index=True, height=320)
         st.markdown('</div>', unsafe_allow_html=True)
 
 # =========================
 # EXPORT
 # =========================
 st.markdown('<div class="divider"></div>', unsafe_allow_html=True)
-excel_bytes, fname = export_excel(filtered_df, filename="Evaluasi_KPI_UMKM_Serang.xlsx")
+# xlsx baru dibuat saat tombol diklik (bukan tiap rerun), bytes di-cache per versi data + filter
 st.download_button(
     "⬇️ Unduh Data (Excel) - sesuai filter",
-    excel_bytes,
-    file_name=fname,
+    excel_download(filtered_df, kind="rekomendasi", prepare=with_recommendation_text),
+    file_name="Evaluasi_KPI_UMKM_Serang.xlsx",
+    mime=XLSX_MIME,
+    on_click="ignore",
     use_container_width=True
 )
+
+end_page_timing()
@@ -4,17 +4,21 @@ import pandas as pd
 import plotly.express as px
 
 from app.ui import inject_global_css, render_header
-from app.core import data_quality_summary
+from app.session import begin_page_timing, end_page_timing, base_frame, has_data
+from app.timing import stage
+from app.core import data_quality_summary, round_for_display
 
 st.set_page_config(page_title="Data Quality", page_icon="🧪", layout="wide")
 
+begin_page_timing("03_Data_Quality")
+
 inject_global_css(bg_path="image/bgsrg.png")
 render_header(logo_path="image/logo.png")
 
 # =========================
 # GUARD: data harus dari halaman Upload
 # =========================
-if "df_all" not in st.session_state:
+if not has_data():
     st.markdown("""
     <div class="glass" style="padding:16px;">
       <div style="font-weight:900; font-size:16px;">⚠️ Data belum tersedia</div>
@@ -31,7 +35,7 @@ if "df_all" not in st.session_state:
             pass
     st.stop()
 
-df = st.session_state["df_all"].copy()
+df = base_frame()
 
 st.title("🧪 Data Quality & Cleaning")
 
@@ -46,9 +50,11 @@ c4.metric("Perlu Verifikasi (Outlier)", s["need_verify"])
 st.markdown("### 🔎 Missing Value per Kolom Wajib")
 miss = pd.DataFrame([s["missing_by_col"]]).T.reset_index()
 miss.columns = ["Kolom", "Jumlah Missing"]
-fig = px.bar(miss, x="Jumlah Missing", y="Kolom", orientation="h")
-fig.update_layout(template="plotly_dark", height=420, margin=dict(l=10, r=10, t=10, b=10))
-st.plotly_chart(fig, use_container_width=True)
+with stage("bangun grafik (Plotly)", rows=len(miss)):
+    fig = px.bar(miss, x="Jumlah Missing", y="Kolom", orientation="h")
+    fig.update_layout(template="plotly_dark", height=420, margin=dict(l=10, r=10, t=10, b=10))
+with stage("render grafik (Plotly)"):
+    st.plotly_chart(fig, use_container_width=True)
 
 st.markdown("### ⚠️ Baris Bermasalah")
 
@@ -57,13 +63,13 @@ valid_col = "Valid_Data" if "Valid_Data" in df.columns else None
 verify_col = "Perlu_Verifikasi" if "Perlu_Verifikasi" in df.columns else None
 
 if valid_col and verify_col:
-    bad = df[(df[valid_col] == False) | (df[verify_col] == True)].copy()
+    bad = df[(df[valid_col] == False) | (df[verify_col] == True)]
 elif valid_col:
-    bad = df[df[valid_col] == False].copy()
+    bad = df[df[valid_col] == False]
 elif verify_col:
-    bad = df[df[verify_col] == True].copy()
+    bad = df[df[verify_col] == True]
 else:
-    bad = df.copy()
+    bad = df
 
 cols_wanted = [
     "Bidang Usaha","Nama Usaha","Pendapatan Tahun Ini (Rp)","Pendapatan Tahun Lalu (Rp)",
@@ -73,11 +79,14 @@ cols_wanted = [
 ]
 cols_show = [c for c in cols_wanted if c in bad.columns]
 
-st.dataframe(
-    bad[cols_show],
-    use_container_width=True,
-    hide_index=True,
-    height=520
-)
+with stage("render tabel (Arrow)", rows=len(bad)):
+    st.dataframe(
+        round_for_display(bad[cols_show]),
+        use_container_width=True,
+        hide_index=True,
+        height=520
+    )
 
 st.caption("Outlier ditandai jika KPI sangat ekstrem (di atas kuantil 99.5%) → sebaiknya diverifikasi.")
+
+end_page_timing()
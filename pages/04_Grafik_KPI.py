@@ -4,16 +4,24 @@ import pandas as pd
 import plotly.express as px
 
 from app.ui import inject_global_css, render_header
+from app.session import (
+    begin_page_timing, cached_figure, data_context, end_page_timing, filtered_frame, has_data, top_rows,
+)
+from app.timing import stage
+from app.cube import sector_means
+from app.charts import BOX_MAX_OUTLIERS, box_figure, box_stats
 
 st.set_page_config(page_title="Grafik KPI", page_icon="📊", layout="wide")
 
+begin_page_timing("04_Grafik_KPI")
+
 inject_global_css(bg_path="image/bgsrg.png")
 render_header(logo_path="image/logo.png")
 
 # =========================
 # GUARD: data harus dari halaman Upload
 # =========================
-if "df_filtered" not in st.session_state:
+if not has_data():
     st.markdown("""
     <div class="glass" style="padding:16px;">
       <div style="font-weight:900; font-size:16px;">⚠️ Data belum tersedia</div>
@@ -30,7 +38,7 @@ if "df_filtered" not in st.session_state:
             pass
     st.stop()
 
-df = st.session_state["df_filtered"].copy()
+df = filtered_frame()
 
 st.title("📊 Grafik KPI")
 
@@ -77,7 +85,7 @@ if view_mode == "Top UMKM (Ranking)":
         st.warning(f"Kolom **{sort_by}** tidak ditemukan di data.")
         st.stop()
 
-    d = df.dropna(subset=[sort_by]).sort_values(sort_by, ascending=False).head(top_n).copy()
+    d = top_rows(sort_by, top_n)  # index rank per KPI: geser Top N tanpa sort data penuh
     if d.empty:
         st.warning("Tidak ada data valid untuk ditampilkan.")
         st.stop()
@@ -86,27 +94,32 @@ if view_mode == "Top UMKM (Ranking)":
         st.warning("Kolom **Nama Usaha** tidak ditemukan.")
         st.stop()
 
-    d["Nama Pendek"] = d["Nama Usaha"].astype(str).str.slice(0, 18) + "…"
+    def build_top():
+        d["Nama Pendek"] = d["Nama Usaha"].astype(str).str.slice(0, 18) + "…"
+
+        melt_cols = [c for c in kpi_cols if c in d.columns]
+        long = d[["Nama Pendek", "Nama Usaha"] + melt_cols].melt(
+            id_vars=["Nama Pendek", "Nama Usaha"],
+            var_name="KPI",
+            value_name="Nilai"
+        )
+        fig = px.bar(
+            long,
+            x="Nama Pendek",
+            y="Nilai",
+            color="KPI",
+            barmode="group",
+            hover_data={"Nama Usaha": True, "Nama Pendek": False, "Nilai": ":.2f"},
+        )
+        fig.update_layout(template="plotly_dark", height=560, margin=dict(l=10, r=10, t=10, b=10))
+        fig.update_xaxes(tickangle=-30, automargin=True)
+        return fig
 
-    melt_cols = [c for c in kpi_cols if c in d.columns]
-    long = d[["Nama Pendek", "Nama Usaha"] + melt_cols].melt(
-        id_vars=["Nama Pendek", "Nama Usaha"],
-        var_name="KPI",
-        value_name="Nilai"
-    )
+    with stage("bangun grafik (Plotly)", rows=len(d)):
+        fig = cached_figure("04_Grafik_KPI", "top", build_top, metric=sort_by, top_n=top_n)
 
-    fig = px.bar(
-        long,
-        x="Nama Pendek",
-        y="Nilai",
-        color="KPI",
-        barmode="group",
-        hover_data={"Nama Usaha": True, "Nama Pendek": False, "Nilai": ":.2f"},
-    )
-    fig.update_layout(template="plotly_dark", height=560, margin=dict(l=10, r=10, t=10, b=10))
-    fig.update_xaxes(tickangle=-30, automargin=True)
-
-    st.plotly_chart(fig, use_container_width=True)
+    with stage("render grafik (Plotly)"):
+        st.plotly_chart(fig, use_container_width=True)
     st.caption(f"Top {len(d)} berdasarkan **{sort_by}**. Hover untuk nama lengkap.")
 
 # =========================
@@ -122,16 +135,12 @@ elif view_mode == "Ringkasan per Bidang":
         st.warning("Kolom KPI tidak ditemukan.")
         st.stop()
 
-    summary = (
-        df.groupby("Bidang Usaha")[cols_agg]
-        .mean(numeric_only=True)
-        .round(2)
-        .reset_index()
-    )
+    summary = sector_means(data_context()["cube"], cols_agg, bidang=data_context()["selected"])
     if "Skor_KPI" in summary.columns:
         summary = summary.sort_values("Skor_KPI", ascending=False)
 
-    st.dataframe(summary, use_container_width=True, hide_index=True, height=360)
+    with stage("render tabel (Arrow)", rows=len(summary)):
+        st.dataframe(summary, use_container_width=True, hide_index=True, height=360)
 
     metric = st.selectbox(
         "Grafik bidang berdasarkan:",
@@ -139,15 +148,21 @@ elif view_mode == "Ringkasan per Bidang":
         index=0
     )
 
-    fig = px.bar(
-        summary,
-        x=metric,
-        y="Bidang Usaha",
-        orientation="h",
-        hover_data=[c for c in cols_agg if c in summary.columns]
-    )
-    fig.update_layout(template="plotly_dark", height=560, margin=dict(l=10, r=10, t=10, b=10), yaxis_title="")
-    st.plotly_chart(fig, use_container_width=True)
+    def build_bidang():
+        fig = px.bar(
+            summary,
+            x=metric,
+            y="Bidang Usaha",
+            orientation="h",
+            hover_data=[c for c in cols_agg if c in summary.columns]
+        )
+        fig.update_layout(template="plotly_dark", height=560, margin=dict(l=10, r=10, t=10, b=10), yaxis_title="")
+        return fig
+
+    with stage("bangun grafik (Plotly)", rows=len(summary)):
+        fig = cached_figure("04_Grafik_KPI", "bidang", build_bidang, metric=metric)
+    with stage("render grafik (Plotly)"):
+        st.plotly_chart(fig, use_container_width=True)
 
 # =========================
 # MODE 3: BOX PLOT DISTRIBUSI KPI
@@ -159,27 +174,47 @@ else:
         index=0
     )
 
-    d = df.dropna(subset=[kpi]).copy()
-    if d.empty:
+    if not df[kpi].notna().any():
         st.warning("Tidak ada data valid.")
         st.stop()
 
     group = st.checkbox("Kelompokkan per Bidang (Top 12)", value=True)
 
     if group:
-        if "Bidang Usaha" not in d.columns:
+        if "Bidang Usaha" not in df.columns:
             st.warning("Kolom **Bidang Usaha** tidak ditemukan.")
             st.stop()
 
-        top_bidang = d["Bidang Usaha"].value_counts().head(12).index
-        d = d[d["Bidang Usaha"].isin(top_bidang)]
-
-        fig = px.box(d, x="Bidang Usaha", y=kpi, points="outliers")
-        fig.update_layout(template="plotly_dark", height=560, margin=dict(l=10, r=10, t=10, b=10))
-        fig.update_xaxes(tickangle=-25, automargin=True)
-        st.plotly_chart(fig, use_container_width=True)
-        st.caption("Box plot untuk melihat sebaran + outlier. Ditampilkan Top 12 bidang agar tetap rapi.")
+        def build_box_bidang():
+            # kuartil/whisker dihitung di server; browser cuma menerima statistik + sampel outlier
+            with stage("statistik box (groupby)", rows=len(df)):
+                stats, outliers = box_stats(df, kpi, by="Bidang Usaha")
+                stats = stats.nlargest(12, "n", keep="first")
+                outliers = outliers[outliers["Bidang Usaha"].isin(stats.index)]
+            fig = box_figure(stats, outliers, kpi)
+            fig.update_layout(template="plotly_dark", height=560, margin=dict(l=10, r=10, t=10, b=10))
+            fig.update_xaxes(tickangle=-25, automargin=True)
+            return fig
+
+        with stage("bangun grafik (Plotly)", rows=len(df)):
+            fig = cached_figure("04_Grafik_KPI", "box", build_box_bidang, metric=kpi, extra=("per bidang",))
+        with stage("render grafik (Plotly)"):
+            st.plotly_chart(fig, use_container_width=True)
+        st.caption(
+            "Box plot untuk melihat sebaran + outlier. Ditampilkan Top 12 bidang agar tetap rapi. "
+            f"Outlier ditampilkan sampel maks {BOX_MAX_OUTLIERS} titik per bidang (nilai terkecil & terbesar selalu ikut)."
+        )
     else:
-        fig = px.box(d, y=kpi, points="outliers")
-        fig.update_layout(template="plotly_dark", height=520, margin=dict(l=10, r=10, t=10, b=10))
-        st.plotly_chart(fig, use_container_width=True)
+        def build_box():
+            with stage("statistik box (groupby)", rows=len(df)):
+                stats, outliers = box_stats(df, kpi)
+            fig = box_figure(stats, outliers, kpi)
+            fig.update_layout(template="plotly_dark", height=520, margin=dict(l=10, r=10, t=10, b=10))
+            return fig
+
+        with stage("bangun grafik (Plotly)", rows=len(df)):
+            fig = cached_figure("04_Grafik_KPI", "box", build_box, metric=kpi)
+        with stage("render grafik (Plotly)"):
+            st.plotly_chart(fig, use_container_width=True)
+
+end_page_timing()
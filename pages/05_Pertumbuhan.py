@@ -2,19 +2,26 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-import plotly.graph_objects as go
 
 from app.ui import inject_global_css, render_header
+from app.session import (
+    begin_page_timing, cached_figure, data_context, end_page_timing, filtered_frame, has_data, top_rows,
+)
+from app.timing import stage
+from app.charts import SCATTER_MODE_LABEL, revenue_scatter, scatter_mode
+from app.cube import rollup, sector_means
 
 st.set_page_config(page_title="Pertumbuhan", page_icon="📈", layout="wide")
 
+begin_page_timing("05_Pertumbuhan")
+
 inject_global_css(bg_path="image/bgsrg.png")
 render_header(logo_path="image/logo.png")
 
 # =========================
 # GUARD: data harus dari halaman Upload
 # =========================
-if "df_filtered" not in st.session_state:
+if not has_data():
     st.markdown("""
     <div class="glass" style="padding:16px;">
       <div style="font-weight:900; font-size:16px;">⚠️ Data belum tersedia</div>
@@ -31,7 +38,7 @@ if "df_filtered" not in st.session_state:
             pass
     st.stop()
 
-df = st.session_state["df_filtered"].copy()
+df = filtered_frame()
 
 st.title("📈 Analisis Pertumbuhan")
 
@@ -57,46 +64,53 @@ if mode == "Scatter (Tahun Lalu vs Tahun Ini)":
         st.warning("Kolom pendapatan tidak lengkap untuk scatter.")
         st.stop()
 
-    d = df.dropna(subset=needed).copy()
-    if d.empty:
+    complete = df[needed].notna().all(axis=1)
+    n_points = int(complete.sum())
+    if n_points == 0:
         st.warning("Data pendapatan belum lengkap.")
         st.stop()
+    scatter_render = scatter_mode(n_points)
 
-    color_col = "Bidang Usaha" if "Bidang Usaha" in d.columns else None
-    hover_name = "Nama Usaha" if "Nama Usaha" in d.columns else None
+    color_col = "Bidang Usaha" if "Bidang Usaha" in df.columns else None
+    hover_name = "Nama Usaha" if "Nama Usaha" in df.columns else None
 
     hover_data = {}
-    if "Growth Rate (%)" in d.columns:
+    if "Growth Rate (%)" in df.columns:
         hover_data["Growth Rate (%)"] = ":.2f"
-    if "Skor_KPI" in d.columns:
+    if "Skor_KPI" in df.columns:
         hover_data["Skor_KPI"] = ":.2f"
-    if "Kategori_Skor" in d.columns:
+    if "Kategori_Skor" in df.columns:
         hover_data["Kategori_Skor"] = True
 
-    fig = px.scatter(
-        d,
-        x="Pendapatan Tahun Lalu (Rp)",
-        y="Pendapatan Tahun Ini (Rp)",
-        color=color_col,
-        hover_name=hover_name,
-        hover_data=hover_data,
-        opacity=0.75
+    # min/max kedua kolom pendapatan dari cube agregat (bukan concat + min/max atas baris)
+    stats = rollup(data_context()["cube"], by=None, bidang=data_context()["selected"]).iloc[0]
+    bounds = (
+        float(min(stats[(c, "min")] for c in needed)),
+        float(max(stats[(c, "max")] for c in needed)),
     )
 
-    minv = float(pd.concat([d["Pendapatan Tahun Lalu (Rp)"], d["Pendapatan Tahun Ini (Rp)"]]).min())
-    maxv = float(pd.concat([d["Pendapatan Tahun Lalu (Rp)"], d["Pendapatan Tahun Ini (Rp)"]]).max())
-
-    fig.add_trace(go.Scatter(
-        x=[minv, maxv],
-        y=[minv, maxv],
-        mode="lines",
-        name="Garis y=x (stabil)",
-        line=dict(dash="dash")
-    ))
+    def build_scatter():
+        fig, _ = revenue_scatter(
+            df[complete],
+            x="Pendapatan Tahun Lalu (Rp)",
+            y="Pendapatan Tahun Ini (Rp)",
+            bounds=bounds,
+            color=color_col,
+            hover_name=hover_name,
+            hover_data=hover_data,
+            mode=scatter_render,
+        )
+        fig.update_layout(template="plotly_dark", height=640, margin=dict(l=10, r=10, t=10, b=10))
+        return fig
 
-    fig.update_layout(template="plotly_dark", height=640, margin=dict(l=10, r=10, t=10, b=10))
-    st.plotly_chart(fig, use_container_width=True)
-    st.caption("Di atas garis y=x berarti pendapatan naik.")
+    with stage("bangun grafik (Plotly)", rows=n_points):
+        fig = cached_figure("05_Pertumbuhan", "scatter", build_scatter, metric=scatter_render)
+    with stage("render grafik (Plotly)"):
+        st.plotly_chart(fig, use_container_width=True)
+    st.caption(
+        f"Di atas garis y=x berarti pendapatan naik. {n_points:,} titik, dirender sebagai "
+        f"{SCATTER_MODE_LABEL[scatter_render]}."
+    )
 
 # =========================
 # MODE 2: TOP GROWTH
@@ -108,36 +122,42 @@ elif mode == "Top Growth Rate":
 
     top_n = st.slider("Top N", 10, 200, int(st.session_state.get("top_n", 50)), 5)
 
-    d = df.dropna(subset=["Growth Rate (%)"]).sort_values("Growth Rate (%)", ascending=False).head(top_n).copy()
+    d = top_rows("Growth Rate (%)", top_n)  # index rank: tanpa sort data penuh per rerun
     if d.empty:
         st.warning("Tidak ada Growth Rate valid.")
         st.stop()
 
-    if "Nama Usaha" in d.columns:
-        d["Nama Pendek"] = d["Nama Usaha"].astype(str).str.slice(0, 18) + "…"
-        x_col = "Nama Pendek"
-    else:
-        d["Nama Pendek"] = [f"UKM {i+1}" for i in range(len(d))]
-        x_col = "Nama Pendek"
-
-    hover_data = {"Growth Rate (%)": ":.2f"}
-    if "Nama Usaha" in d.columns:
-        hover_data["Nama Usaha"] = True
-        hover_data["Nama Pendek"] = False
-    if "Skor_KPI" in d.columns:
-        hover_data["Skor_KPI"] = ":.2f"
-    if "Kategori_Skor" in d.columns:
-        hover_data["Kategori_Skor"] = True
+    def build_top():
+        if "Nama Usaha" in d.columns:
+            d["Nama Pendek"] = d["Nama Usaha"].astype(str).str.slice(0, 18) + "…"
+            x_col = "Nama Pendek"
+        else:
+            d["Nama Pendek"] = [f"UKM {i+1}" for i in range(len(d))]
+            x_col = "Nama Pendek"
+
+        hover_data = {"Growth Rate (%)": ":.2f"}
+        if "Nama Usaha" in d.columns:
+            hover_data["Nama Usaha"] = True
+            hover_data["Nama Pendek"] = False
+        if "Skor_KPI" in d.columns:
+            hover_data["Skor_KPI"] = ":.2f"
+        if "Kategori_Skor" in d.columns:
+            hover_data["Kategori_Skor"] = True
 
-    fig = px.bar(
-        d,
-        x=x_col,
-        y="Growth Rate (%)",
-        hover_data=hover_data
-    )
-    fig.update_layout(template="plotly_dark", height=560, margin=dict(l=10, r=10, t=10, b=10))
-    fig.update_xaxes(tickangle=-30, automargin=True)
-    st.plotly_chart(fig, use_container_width=True)
+        fig = px.bar(
+            d,
+            x=x_col,
+            y="Growth Rate (%)",
+            hover_data=hover_data
+        )
+        fig.update_layout(template="plotly_dark", height=560, margin=dict(l=10, r=10, t=10, b=10))
+        fig.update_xaxes(tickangle=-30, automargin=True)
+        return fig
+
+    with stage("bangun grafik (Plotly)", rows=len(d)):
+        fig = cached_figure("05_Pertumbuhan", "top", build_top, metric="Growth Rate (%)", top_n=top_n)
+    with stage("render grafik (Plotly)"):
+        st.plotly_chart(fig, use_container_width=True)
 
 # =========================
 # MODE 3: RINGKASAN PER BIDANG
@@ -152,27 +172,31 @@ else:
         st.warning("Kolom yang dibutuhkan untuk ringkasan tidak tersedia.")
         st.stop()
 
-    summary = (
-        df.groupby("Bidang Usaha")[cols]
-        .mean(numeric_only=True)
-        .round(2)
-        .reset_index()
-    )
+    summary = sector_means(data_context()["cube"], cols, bidang=data_context()["selected"])
     if "Growth Rate (%)" in summary.columns:
         summary = summary.sort_values("Growth Rate (%)", ascending=False)
 
-    st.dataframe(summary, use_container_width=True, hide_index=True, height=360)
+    with stage("render tabel (Arrow)", rows=len(summary)):
+        st.dataframe(summary, use_container_width=True, hide_index=True, height=360)
 
     if "Growth Rate (%)" in summary.columns:
         hover_cols = [c for c in ["Pendapatan Tahun Lalu (Rp)", "Pendapatan Tahun Ini (Rp)", "Skor_KPI"] if c in summary.columns]
-        fig = px.bar(
-            summary,
-            x="Growth Rate (%)",
-            y="Bidang Usaha",
-            orientation="h",
-            hover_data=hover_cols
-        )
-        fig.update_layout(template="plotly_dark", height=560, margin=dict(l=10, r=10, t=10, b=10), yaxis_title="")
-        st.plotly_chart(fig, use_container_width=True)
+        def build_bidang():
+            fig = px.bar(
+                summary,
+                x="Growth Rate (%)",
+                y="Bidang Usaha",
+                orientation="h",
+                hover_data=hover_cols
+            )
+            fig.update_layout(template="plotly_dark", height=560, margin=dict(l=10, r=10, t=10, b=10), yaxis_title="")
+            return fig
+
+        with stage("bangun grafik (Plotly)", rows=len(summary)):
+            fig = cached_figure("05_Pertumbuhan", "bidang", build_bidang, metric="Growth Rate (%)")
+        with stage("render grafik (Plotly)"):
+            st.plotly_chart(fig, use_container_width=True)
     else:
         st.caption("Kolom Growth Rate (%) tidak ada, jadi grafik tidak ditampilkan.")
+
+end_page_timing()
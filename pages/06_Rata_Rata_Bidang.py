@@ -4,16 +4,21 @@ import pandas as pd
 import plotly.express as px
 
 from app.ui import inject_global_css, render_header
+from app.session import begin_page_timing, cached_figure, data_context, end_page_timing, filtered_frame, has_data
+from app.timing import stage
+from app.cube import sector_means
 
 st.set_page_config(page_title="Rata-rata Bidang", page_icon="🏭", layout="wide")
 
+begin_page_timing("06_Rata_Rata_Bidang")
+
 inject_global_css(bg_path="image/bgsrg.png")
 render_header(logo_path="image/logo.png")
 
 # =========================
 # GUARD: data harus dari halaman Upload
 # =========================
-if "df_filtered" not in st.session_state:
+if not has_data():
     st.markdown("""
     <div class="glass" style="padding:16px;">
       <div style="font-weight:900; font-size:16px;">⚠️ Data belum tersedia</div>
@@ -30,7 +35,7 @@ if "df_filtered" not in st.session_state:
             pass
     st.stop()
 
-df = st.session_state["df_filtered"].copy()
+df = filtered_frame()
 
 st.title("🏭 Rata-rata KPI per Bidang Usaha")
 
@@ -46,31 +51,39 @@ if not kpi_cols:
     st.dataframe(df.head(50), use_container_width=True)
     st.stop()
 
-summary = (
-    df.groupby("Bidang Usaha")[kpi_cols]
-    .mean(numeric_only=True)
-    .round(2)
-    .reset_index()
-)
+# dari cube agregat (halaman Upload): ganti filter cuma gabung ulang sel cube
+summary = sector_means(data_context()["cube"], kpi_cols, bidang=data_context()["selected"])
 
 if "Skor_KPI" in summary.columns:
     summary = summary.sort_values("Skor_KPI", ascending=False)
 
-st.dataframe(summary, use_container_width=True, hide_index=True, height=420)
+with stage("render tabel (Arrow)", rows=len(summary)):
+    st.dataframe(summary, use_container_width=True, hide_index=True, height=420)
 
 metric_options = [c for c in ["Skor_KPI", "Growth Rate (%)", "ROI (%)", "Profit Margin (%)", "Cost Ratio"] if c in summary.columns]
 metric = st.selectbox("Tampilkan grafik:", metric_options, index=0)
 
 hover_cols = [c for c in kpi_cols_all if c in summary.columns]
 
-fig = px.bar(
-    summary,
-    x=metric,
-    y="Bidang Usaha",
-    orientation="h",
-    hover_data=hover_cols
-)
-fig.update_layout(template="plotly_dark", height=560, margin=dict(l=10, r=10, t=10, b=10), yaxis_title="")
-st.plotly_chart(fig, use_container_width=True)
+
+
+def build_bar():
+    fig = px.bar(
+        summary,
+        x=metric,
+        y="Bidang Usaha",
+        orientation="h",
+        hover_data=hover_cols
+    )
+    fig.update_layout(template="plotly_dark", height=560, margin=dict(l=10, r=10, t=10, b=10), yaxis_title="")
+    return fig
+
+
+with stage("bangun grafik (Plotly)", rows=len(summary)):
+    fig = cached_figure("06_Rata_Rata_Bidang", "bidang", build_bar, metric=metric)
+with stage("render grafik (Plotly)"):
+    st.plotly_chart(fig, use_container_width=True)
 
 st.caption("Catatan: Cost Ratio lebih kecil = lebih efisien (biaya dibanding pendapatan).")
+
+end_page_timing()
@@ -3,15 +3,21 @@ import streamlit as st
 import pandas as pd
 
 from app.ui import inject_global_css, render_header
+from app.session import begin_page_timing, end_page_timing, base_frame, data_context, has_data
+from app.timing import stage
+from app.cube import sector_means
 
 st.set_page_config(page_title="Rekomendasi Kecamatan", page_icon="🏛️", layout="wide")
+
+begin_page_timing("07_Rekomendasi_Kecamatan")
+
 inject_global_css(bg_path="image/bgsrg.png")
 render_header(logo_path="image/logo.png")
 
 # =========================
 # GUARD: data harus disiapkan dari Upload
 # =========================
-if "df_all" not in st.session_state:
+if not has_data():
     st.markdown("""
     <div class="glass" style="padding:16px;">
       <div style="font-weight:900; font-size:16px;">⚠️ Data belum tersedia</div>
@@ -28,7 +34,7 @@ if "df_all" not in st.session_state:
             pass
     st.stop()
 
-df = st.session_state["df_all"].copy()
+df = base_frame()
 
 # =========================
 # HEADER
@@ -59,21 +65,18 @@ if not kpi_cols:
     st.dataframe(df.head(50), use_container_width=True)
     st.stop()
 
-# pastikan numeric
-for c in kpi_cols:
-    df[c] = pd.to_numeric(df[c], errors="coerce")
-
 # =========================
 # (OPSIONAL) FILTER KECAMATAN kalau ada kolomnya
 # =========================
-if "Kecamatan" in df.columns:
+selected_kec = []
+kec_index = data_context()["indexes"].get("Kecamatan")  # daftar kecamatan (app/index.py); angka dari cube
+if kec_index is not None:
     st.markdown('<div class="glass" style="padding:14px; margin-bottom:14px;">', unsafe_allow_html=True)
     st.markdown("### 🎯 Fokus Wilayah (Opsional)")
-    kec_opts = sorted(df["Kecamatan"].dropna().astype(str).unique().tolist())
+    kec_opts = kec_index.categories
     default_kec = ["Serang"] if "Serang" in kec_opts else []
     selected_kec = st.multiselect("Pilih kecamatan:", options=kec_opts, default=default_kec)
     if selected_kec:
-        df = df[df["Kecamatan"].astype(str).isin(selected_kec)].copy()
         st.caption(f"Menampilkan data untuk: **{', '.join(selected_kec)}**")
     else:
         st.caption("Tidak memilih kecamatan → menampilkan semua data.")
@@ -82,23 +85,14 @@ if "Kecamatan" in df.columns:
 # =========================
 # RINGKASAN SEKTOR (MEAN)
 # =========================
-sektor = (
-    df.groupby("Bidang Usaha")[kpi_cols]
-      .mean()
-      .round(2)
-      .reset_index()
-)
-
-# stability: std growth
-if "Growth Rate (%)" in df.columns:
-    stab = (
-        df.groupby("Bidang Usaha")["Growth Rate (%)"]
-          .std()
-          .reset_index()
-          .rename(columns={"Growth Rate (%)": "Std Growth"})
-    )
-    sektor = sektor.merge(stab, on="Bidang Usaha", how="left")
-else:
+# mean + std growth (stabilitas) sekaligus dari cube agregat, tanpa groupby/merge ulang
+sektor = sector_means(
+    data_context()["cube"],
+    kpi_cols,
+    std_cols=["Growth Rate (%)"],
+    kecamatan=selected_kec or None,
+).rename(columns={"Std Growth Rate (%)": "Std Growth"})
+if "Std Growth" not in sektor.columns:
     sektor["Std Growth"] = pd.NA
 
 # ranking default
@@ -139,7 +133,8 @@ st.markdown(f"""
 # TABEL RINGKASAN SEKTOR
 # =========================
 st.markdown("### 📌 Ringkasan Sektor (Rata-rata KPI)")
-st.dataframe(sektor, use_container_width=True, hide_index=True, height=420)
+with stage("render tabel (Arrow)", rows=len(sektor)):
+    st.dataframe(sektor, use_container_width=True, hide_index=True, height=420)
 
 # =========================
 # INSIGHT + PRIORITAS PROGRAM (lebih "policy")
@@ -267,3 +262,5 @@ for title, when, actions in recs:
     """, unsafe_allow_html=True)
 
 st.info("Catatan: rekomendasi bersifat data-driven dari rata-rata KPI per sektor. Kamu bisa pakai ini untuk narasi program kerja kecamatan.")
+
+end_page_timing()
@@ -3,17 +3,24 @@ import streamlit as st
 import pandas as pd
 
 from app.ui import inject_global_css, render_header
-from app.core import export_excel
+from app.session import (
+    begin_page_timing, end_page_timing, excel_download, filtered_frame, has_data, search_rows, sort_order,
+)
+from app.timing import stage
+from app.core import XLSX_MIME, round_for_display, with_recommendation_text
+from app.search import SEARCH_MODES
 
 st.set_page_config(page_title="Tabel KPI", page_icon="📋", layout="wide")
 
+begin_page_timing("08_Tabel_KPI")
+
 inject_global_css(bg_path="image/bgsrg.png")
 render_header(logo_path="image/logo.png")
 
 # =========================
 # GUARD: data harus dari halaman Upload
 # =========================
-if "df_filtered" not in st.session_state:
+if not has_data():
     st.markdown("""
     <div class="glass" style="padding:16px;">
       <div style="font-weight:900; font-size:16px;">⚠️ Data belum tersedia</div>
@@ -30,17 +37,26 @@ if "df_filtered" not in st.session_state:
             pass
     st.stop()
 
-df = st.session_state["df_filtered"].copy()
+df = filtered_frame()
 
 st.title("📋 Tabel Evaluasi KPI (Filtered)")
 
 # =========================
 # SEARCH
 # =========================
-q = st.text_input("🔎 Cari Nama Usaha (opsional):", "")
+sc1, sc2 = st.columns([3, 1])
+with sc1:
+    q = st.text_input("🔎 Cari Nama Usaha (opsional):", "")
+with sc2:
+    search_mode = st.selectbox("Cara cari", list(SEARCH_MODES), format_func=SEARCH_MODES.get)
 if q.strip():
     if "Nama Usaha" in df.columns:
-        df = df[df["Nama Usaha"].astype(str).str.contains(q, case=False, na=False)].copy()
+        # index trigram (dibangun di halaman Upload): biaya ~ jumlah hasil, bukan jumlah baris
+        with stage("cari nama (trigram)", rows=len(df)) as rec:
+            df = search_rows(q, search_mode)
+            rec["rows"] = len(df)
+        if search_mode == "fuzzy":
+            st.caption("Mode toleran typo: hasil diurutkan dari nama yang paling mirip.")
     else:
         st.warning("Kolom **Nama Usaha** tidak ditemukan, fitur pencarian tidak bisa dipakai.")
 
@@ -62,51 +78,94 @@ if not cols_exist:
     st.dataframe(df.head(50), use_container_width=True)
     st.stop()
 
-df_show = df[cols_exist].copy()
-df_show.insert(0, "No", range(1, len(df_show) + 1))
-
 # =========================
-# STYLE KATEGORI
+# TABEL BERHALAMAN (sort di server, yang dikirim ke browser cuma 1 halaman)
 # =========================
-def hl(val):
-    if val == "Baik":
-        return "background-color:#14532d;color:white"
-    if val == "Sedang":
-        return "background-color:#78350f;color:white"
-    if val == "Kurang":
-        return "background-color:#7f1d1d;color:white"
-    return ""
-
-if "Kategori_Skor" in df_show.columns:
-    styled = df_show.style.applymap(hl, subset=["Kategori_Skor"])
+PAGE_SIZES = [25, 50, 100, 200]
+NO_SORT = "(urutan data)"
+
+t1, t2, t3, t4 = st.columns([2, 1, 1, 1])
+with t1:
+    sort_col = st.selectbox("Urutkan berdasarkan", [NO_SORT] + cols_exist, index=0)
+with t2:
+    ascending = st.radio("Arah", ["Naik", "Turun"], index=1, horizontal=True) == "Naik"
+with t3:
+    page_size = st.selectbox("Baris per halaman", PAGE_SIZES, index=1)
+
+n_rows = len(df)
+n_pages = max(1, -(-n_rows // page_size))
+with t4:
+    page_no = st.number_input("Halaman", min_value=1, max_value=n_pages, value=1, step=1)
+page_no = min(int(page_no), n_pages)
+start = (page_no - 1) * page_size
+stop = min(start + page_size, n_rows)
+
+if sort_col == NO_SORT:
+    page_pos = list(range(start, stop))
 else:
-    styled = df_show
-
-st.dataframe(
-    styled,
-    use_container_width=True,
-    hide_index=True,
-    height=520
-)
+    # urutan di-cache per (data, filter, pencarian, kolom, arah); per rerun cuma slice
+    with stage("urutkan tabel", rows=n_rows):
+        page_pos = sort_order(df, sort_col, ascending, view_key=(q.strip(), search_mode))[start:stop]
+
+# take dulu baru pilih kolom: df[list] menyalin semua baris, take cuma baris halaman
+page = round_for_display(df.take(page_pos)[cols_exist])
+page.insert(0, "No", range(start + 1, start + len(page) + 1))
+
+# warna kategori: label kategori diganti badge (ganti nama kategori, bukan render per sel)
+KATEGORI_BADGE = {"Baik": "🟢 Baik", "Sedang": "🟡 Sedang", "Kurang": "🔴 Kurang", "Tidak Valid": "⚪ Tidak Valid"}
+if "Kategori_Skor" in page.columns and isinstance(page["Kategori_Skor"].dtype, pd.CategoricalDtype):
+    page["Kategori_Skor"] = page["Kategori_Skor"].cat.rename_categories(
+        lambda c: KATEGORI_BADGE.get(c, c)
+    )
+
+with stage("render tabel (Arrow)", rows=len(page)):
+    st.dataframe(
+        page,
+        use_container_width=True,
+        hide_index=True,
+        height=min(520, 38 + 35 * max(len(page), 1)),
+        column_config={
+            "No": st.column_config.NumberColumn("No", width="small"),
+            "Kategori_Skor": st.column_config.TextColumn("Kategori", help="🟢 Baik · 🟡 Sedang · 🔴 Kurang · ⚪ Tidak Valid"),
+            "Valid_Data": st.column_config.CheckboxColumn("Valid"),
+            "Perlu_Verifikasi": st.column_config.CheckboxColumn("Perlu Verifikasi"),
+        },
+    )
+st.caption(f"Menampilkan baris {start + 1 if n_rows else 0:,}–{stop:,} dari {n_rows:,} (halaman {page_no} / {n_pages}).")
 
 # =========================
 # REKOMENDASI
 # =========================
-if all(c in df.columns for c in ["Nama Usaha", "Bidang Usaha", "Skor_KPI", "Kategori_Skor", "Rekomendasi"]):
+rec_col = "Rekomendasi_Kode" if "Rekomendasi_Kode" in df.columns else "Rekomendasi"
+if all(c in df.columns for c in ["Nama Usaha", "Bidang Usaha", "Skor_KPI", "Kategori_Skor", rec_col]):
     st.markdown("### 🧠 Rekomendasi Otomatis")
-    with st.expander("Lihat rekomendasi per UKM (Top 50 sesuai tabel)"):
-        small = df[["Nama Usaha", "Bidang Usaha", "Skor_KPI", "Kategori_Skor", "Rekomendasi"]].head(50).copy()
-        st.dataframe(small, use_container_width=True, hide_index=True, height=520)
+    with st.expander("Lihat rekomendasi per UKM (halaman tabel yang tampil)"):
+        # teks rekomendasi hanya dibuat untuk baris halaman yang tampil
+        small = with_recommendation_text(df.take(page_pos)[["Nama Usaha", "Bidang Usaha", "Skor_KPI", "Kategori_Skor", rec_col]])
+        with stage("render tabel (Arrow)", rows=len(small)):
+            st.dataframe(round_for_display(small), use_container_width=True, hide_index=True, height=520)
 else:
     st.caption("Rekomendasi tidak ditampilkan karena beberapa kolom belum tersedia.")
 
 # =========================
 # EXPORT
 # =========================
-excel_bytes, fname = export_excel(df_show, filename="Tabel_Evaluasi_KPI_UMKM.xlsx")
+def with_row_number(frame):
+    out = frame.copy(deep=False)
+    out.insert(0, "No", range(1, len(out) + 1))
+    return out
+
+
+# seluruh hasil filter + pencarian (bukan cuma halaman tampil); xlsx dibuat saat tombol diklik
 st.download_button(
     "⬇️ Unduh Tabel (Excel)",
-    excel_bytes,
-    file_name=fname,
+    excel_download(
+        df, kind="tabel", prepare=with_row_number, view_key=(q.strip(), search_mode), columns=cols_exist
+    ),
+    file_name="Tabel_Evaluasi_KPI_UMKM.xlsx",
+    mime=XLSX_MIME,
+    on_click="ignore",
     use_container_width=True
 )
+
+end_page_timing()
@@ -1,19 +1,25 @@
 # pages/Generate_Report.py
 import streamlit as st
-import pandas as pd
 
 from app.ui import inject_global_css, render_header
-from app.core import export_excel, generate_pdf_report
+from app.session import (
+    begin_page_timing, data_context, end_page_timing, excel_download, filtered_frame, has_data, top_rows,
+)
+from app.timing import stage
+from app.cube import sector_means
+from app.core import XLSX_MIME, generate_pdf_report, report_inputs, round_for_display, with_recommendation_text
 
 st.set_page_config(page_title="Generate Report", page_icon="📄", layout="wide")
 
+begin_page_timing("09_Generate_Report")
+
 inject_global_css(bg_path="image/bgsrg.png")
 render_header(logo_path="image/logo.png")
 
 # =========================
 # GUARD: data harus dari halaman Upload
 # =========================
-if "df_filtered" not in st.session_state:
+if not has_data():
     st.markdown("""
     <div class="glass" style="padding:16px;">
       <div style="font-weight:900; font-size:16px;">⚠️ Data belum tersedia</div>
@@ -30,7 +36,7 @@ if "df_filtered" not in st.session_state:
             pass
     st.stop()
 
-df = st.session_state["df_filtered"].copy()
+df = filtered_frame()
 
 st.title("📄 Generate Report (Excel + PDF)")
 
@@ -39,68 +45,38 @@ st.title("📄 Generate Report (Excel + PDF)")
 # =========================
 st.markdown("### ✅ Ringkasan Otomatis")
 
-if "Valid_Data" in df.columns:
-    valid = df[df["Valid_Data"] == True].copy()
-else:
-    valid = df.copy()
-
-def safe_mean(frame: pd.DataFrame, col: str) -> float:
-    return float(frame[col].mean(skipna=True)) if col in frame.columns and len(frame) else 0.0
-
-baik = int((valid["Kategori_Skor"] == "Baik").sum()) if "Kategori_Skor" in valid.columns else 0
-sedang = int((valid["Kategori_Skor"] == "Sedang").sum()) if "Kategori_Skor" in valid.columns else 0
-kurang = int((valid["Kategori_Skor"] == "Kurang").sum()) if "Kategori_Skor" in valid.columns else 0
-
-metrics = {
-    "total": int(len(df)),
-    "avg_roi": safe_mean(valid, "ROI (%)"),
-    "avg_pm": safe_mean(valid, "Profit Margin (%)"),
-    "avg_gr": safe_mean(valid, "Growth Rate (%)"),
-    "avg_score": safe_mean(valid, "Skor_KPI"),
-    "baik": baik,
-    "sedang": sedang,
-    "kurang": kurang,
-}
+# rata-rata per sektor (data valid) dari cube agregat; metrics & top 10 sama dengan batch CLI (app/core.py)
+sektor_summary = sector_means(
+    data_context()["cube"],
+    ["ROI (%)", "Profit Margin (%)", "Growth Rate (%)", "Skor_KPI"],
+    bidang=data_context()["selected"],
+    valid=True,
+).sort_values("Growth Rate (%)", ascending=False)
+metrics, top_best, top_risk, sektor_summary = report_inputs(
+    df,
+    sektor_summary=sektor_summary,
+    top_best=top_rows("Skor_KPI", 10, valid_only=True),
+    top_risk=top_rows("Skor_KPI", 10, ascending=True, valid_only=True),
+)
 
 c1, c2, c3, c4 = st.columns(4)
 c1.metric("Total", metrics["total"])
 c2.metric("Skor rata-rata", f"{metrics['avg_score']:.2f}")
-c3.metric("Baik", baik)
-c4.metric("Kurang", kurang)
+c3.metric("Baik", metrics["baik"])
+c4.metric("Kurang", metrics["kurang"])
 
 # =========================
 # TOP 10
 # =========================
-if "Skor_KPI" in valid.columns and len(valid) > 0:
-    top_best = valid.sort_values("Skor_KPI", ascending=False).head(10)
-    top_risk = valid.sort_values("Skor_KPI", ascending=True).head(10)
-else:
-    top_best = valid.head(0)
-    top_risk = valid.head(0)
-
 st.markdown("### 🏆 Top 10 Terbaik")
 cols_best = [c for c in ["Nama Usaha", "Bidang Usaha", "Skor_KPI", "Kategori_Skor"] if c in top_best.columns]
-st.dataframe(top_best[cols_best], use_container_width=True, hide_index=True)
+with stage("render tabel (Arrow)", rows=len(top_best)):
+    st.dataframe(round_for_display(top_best[cols_best]), use_container_width=True, hide_index=True)
 
 st.markdown("### 🧯 Top 10 Butuh Perhatian")
 cols_risk = [c for c in ["Nama Usaha", "Bidang Usaha", "Skor_KPI", "Kategori_Skor", "Rekomendasi"] if c in top_risk.columns]
-st.dataframe(top_risk[cols_risk], use_container_width=True, hide_index=True)
-
-# =========================
-# RINGKASAN PER SEKTOR
-# =========================
-sektor_summary = pd.DataFrame()
-if "Bidang Usaha" in valid.columns:
-    kpi_cols = [c for c in ["ROI (%)", "Profit Margin (%)", "Growth Rate (%)", "Skor_KPI"] if c in valid.columns]
-    if kpi_cols:
-        sektor_summary = (
-            valid.groupby("Bidang Usaha")[kpi_cols]
-            .mean(numeric_only=True)
-            .round(2)
-            .reset_index()
-        )
-        if "Growth Rate (%)" in sektor_summary.columns:
-            sektor_summary = sektor_summary.sort_values("Growth Rate (%)", ascending=False)
+with stage("render tabel (Arrow)", rows=len(top_risk)):
+    st.dataframe(round_for_display(top_risk[cols_risk]), use_container_width=True, hide_index=True)
 
 # =========================
 # DOWNLOAD
@@ -108,12 +84,13 @@ if "Bidang Usaha" in valid.columns:
 st.markdown("---")
 st.markdown("## ⬇️ Download")
 
-# Excel
-excel_bytes, fname = export_excel(df, filename="Report_Evaluasi_KPI_UMKM.xlsx")
+# Excel: dibuat saat tombol diklik; isi sama dengan unduhan Dashboard, jadi bytes cache-nya dipakai bersama
 st.download_button(
     "⬇️ Download Excel (Filtered)",
-    excel_bytes,
-    file_name=fname,
+    excel_download(df, kind="rekomendasi", prepare=with_recommendation_text),
+    file_name="Report_Evaluasi_KPI_UMKM.xlsx",
+    mime=XLSX_MIME,
+    on_click="ignore",
     use_container_width=True
 )
 
@@ -131,3 +108,5 @@ except Exception as e:
         f"PDF belum bisa dibuat: {e}\n\n"
         "Solusi: pastikan `reportlab` terinstall (pip install reportlab)."
     )
+
+end_page_timing()
@@ -0,0 +1,130 @@
+# pages/98_Diagnostik.py
+import streamlit as st
+import pandas as pd
+import plotly.graph_objects as go
+
+from app.ui import inject_global_css, render_header
+from app.session import TIMING_HISTORY, figure_cache
+from app.timing import run_total_ms
+
+st.set_page_config(page_title="Diagnostik", page_icon="⏱️", layout="wide")
+
+inject_global_css(bg_path="image/bgsrg.png")
+render_header(logo_path="image/logo.png")
+
+st.title("⏱️ Diagnostik Performa")
+st.caption(
+    f"Durasi per tahap dari {TIMING_HISTORY} rerun terakhir tiap halaman (session ini saja). "
+    "Tahap bertingkat (mis. KPI di dalam pipeline) ditampilkan menjorok."
+)
+
+# =========================
+# CACHE FIGURE (bersama semua session di proses ini)
+# =========================
+fc = figure_cache().stats()
+f1, f2, f3, f4 = st.columns(4)
+f1.metric("Figure cache hit", f"{fc['hits']:,}")
+f2.metric("Figure cache miss", f"{fc['misses']:,}")
+f3.metric("Hit rate", f"{fc['hit_rate']:.0%}")
+f4.metric("Figure tersimpan", f"{fc['entries']:,}", help=f"{fc['bytes'] / 1e6:.1f} MB spec JSON")
+if fc["skipped"]:
+    st.caption(f"{fc['skipped']:,} figure tidak disimpan karena spec-nya terlalu besar (dibangun ulang tiap rerun).")
+
+history = st.session_state.get("timing_history", {})
+if not history:
+    st.info("Belum ada data timing. Buka halaman lain dulu (Upload, Dashboard, dll), lalu kembali ke sini.")
+    st.stop()
+
+# =========================
+# PILIH HALAMAN + RERUN
+# =========================
+c1, c2 = st.columns([1, 1])
+with c1:
+    page = st.selectbox("Halaman", sorted(history))
+runs = list(history[page])
+
+with c2:
+    n_show = st.slider("Jumlah rerun terakhir", 1, len(runs), min(10, len(runs))) if len(runs) > 1 else 1
+runs = runs[-n_show:]
+
+# =========================
+# RINGKASAN PER RERUN
+# =========================
+rows = []
+for i, run in enumerate(runs, start=1):
+    top = [s for s in run["stages"] if s["depth"] == 0 and s["ms"] is not None]
+    slowest = max(top, key=lambda s: s["ms"], default=None)
+    rows.append({
+        "Rerun": i,
+        "Waktu": pd.Timestamp(run["started_at"], unit="s", tz="Asia/Jakarta").strftime("%H:%M:%S"),
+        "Total (ms)": round(run_total_ms(run), 1),
+        "Tahap terlama": slowest["stage"] if slowest else "-",
+        "Tahap (ms)": round(slowest["ms"], 1) if slowest else 0.0,
+        "Selesai": run["total_ms"] is not None,
+    })
+summary = pd.DataFrame(rows)
+
+# total per rerun, ditumpuk per tahap level atas (sisa = kode halaman di luar tahap)
+fig = go.Figure()
+stage_names = list(dict.fromkeys(s["stage"] for run in runs for s in run["stages"] if s["depth"] == 0))
+for name in stage_names:
+    fig.add_bar(
+        name=name,
+        x=summary["Rerun"],
+        y=[sum(s["ms"] or 0 for s in run["stages"] if s["depth"] == 0 and s["stage"] == name) for run in runs],
+    )
+fig.add_bar(
+    name="(lain-lain)",
+    x=summary["Rerun"],
+    y=[max(run_total_ms(run) - sum(s["ms"] or 0 for s in run["stages"] if s["depth"] == 0), 0) for run in runs],
+    marker_color="rgba(148,163,184,.5)",
+)
+fig.update_layout(
+    barmode="stack", template="plotly_dark", height=360,
+    margin=dict(l=10, r=10, t=10, b=10), xaxis_title="Rerun", yaxis_title="ms", legend_title_text="",
+)
+st.plotly_chart(fig, use_container_width=True)
+st.dataframe(summary, use_container_width=True, hide_index=True)
+
+# =========================
+# WATERFALL SATU RERUN
+# =========================
+st.markdown("### 🌊 Waterfall")
+pick = st.selectbox("Rerun", summary["Rerun"].tolist()[::-1], format_func=lambda i: f"#{i} ({summary.loc[i - 1, 'Waktu']})")
+run = runs[pick - 1]
+
+stages = [s for s in run["stages"] if s["ms"] is not None]
+if not stages:
+    st.info("Rerun ini tidak punya tahap yang tercatat.")
+    st.stop()
+
+labels = [f"{i + 1:>2}. " + " " * s["depth"] + s["stage"] for i, s in enumerate(stages)]
+hover = [
+    f"{s['stage']}<br>mulai {s['start_ms']:.1f} ms<br>durasi {s['ms']:.1f} ms"
+    + (f"<br>{s['rows']:,} baris" if s["rows"] is not None else "")
+    for s in stages
+]
+wf = go.Figure(go.Bar(
+    y=labels,
+    x=[s["ms"] for s in stages],
+    base=[s["start_ms"] for s in stages],
+    orientation="h",
+    hovertext=hover,
+    hoverinfo="text",
+    marker_color=["#38bdf8" if s["depth"] == 0 else "#a78bfa" for s in stages],
+))
+wf.update_layout(
+    template="plotly_dark", height=max(240, 28 * len(stages) + 80),
+    margin=dict(l=10, r=10, t=10, b=10), xaxis_title="ms sejak awal rerun",
+)
+wf.update_yaxes(autorange="reversed")
+st.plotly_chart(wf, use_container_width=True)
+
+detail = pd.DataFrame([
+    {"Tahap": s["stage"], "Level": s["depth"], "Mulai (ms)": round(s["start_ms"], 1),
+     "Durasi (ms)": round(s["ms"], 2), "Baris": s["rows"]}
+    for s in stages
+])
+detail["Baris"] = detail["Baris"].astype("Int64")
+st.dataframe(detail, use_container_width=True, hide_index=True)
+st.caption(f"Total rerun: {run_total_ms(run):.1f} ms" + ("" if run["total_ms"] is not None else " (script berhenti lebih awal)"))
@@ -94,6 +94,7 @@ st.markdown("""
 st.markdown('<div class="glass" style="padding:14px; margin-bottom:12px;">', unsafe_allow_html=True)
 st.markdown("**Rumus Skor KPI (0–100):**")
 st.latex(r"\text{Skor KPI}=0.40\cdot Skor_{ROI}+0.35\cdot Skor_{PM}+0.25\cdot Skor_{GR}")
+st.caption("Bobot di atas adalah default. Bobot bisa diubah di halaman Upload (⚖️ Bobot Skor KPI); total bobot selalu dinormalisasi jadi 1.")
 st.markdown("</div>", unsafe_allow_html=True)
 
 st.markdown("""